@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+IVAS 本地模拟服务器
+
+按 接口文档v4.md 实现四个接口，用于在本机压测客户端：
+1. POST /jk-ivas/third/controller/zsLogin        登录，返回 JWT (HS512) token
+2. POST /jk-ivas/third/controller/reportUserData 位置上报 (URL 参数)
+3. POST /jk-ivas/non/controller/postTarPos       目标上报 (JSON body)
+4. GET  /jk-ivas/third/controller/outdoorTask    任务轮询
+
+token 过期或无效时返回 HTTP 401。基于 aiohttp，--workers 大于 1 时
+多个进程通过 SO_REUSEPORT 监听同一端口，token 无状态，任意进程都能校验。
+
+上报的无人机位置和目标位置写入空间索引 (spatial.py)，供下游工具查询最新状态：
+    GET /mock/{devices|targets}/radius?lat=&lon=&radius=     半径 (米) 内的实体
+    GET /mock/{devices|targets}/bbox?min_lat=&min_lon=&max_lat=&max_lon=
+    GET /mock/{devices|targets}/nearest?lat=&lon=&k=1        最近的 k 个实体
+可选参数 max_age (秒，只返回最近更新过的) 和 limit (最多返回条数，默认 1000)。
+
+使用方法：
+    python server.py --port 5001 --workers 4 --token-ttl 3600
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+from aiohttp import web
+
+from spatial import GridIndex
+
+
+LOGIN_PATH = '/jk-ivas/third/controller/zsLogin'
+REPORT_POSITION_PATH = '/jk-ivas/third/controller/reportUserData'
+POST_TARGETS_PATH = '/jk-ivas/non/controller/postTarPos'
+OUTDOOR_TASK_PATH = '/jk-ivas/third/controller/outdoorTask'
+
+# reportUserData 必填参数
+POSITION_REQUIRED = ('roomId', 'userX', 'userY', 'userZ', 'azimuth', 'localTime', 'validCount', 'deviceCode')
+
+# 空间查询默认最多返回的条数
+QUERY_LIMIT = 1000
+
+
+# ==================== JWT ====================
+
+def _b64encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=')
+
+
+def _b64decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b'=' * (-len(segment) % 4))
+
+
+class TokenIssuer:
+    """HS512 JWT 签发与校验
+
+    载荷字段与真实服务器一致 (sub / nbf / iss / userName / uuid / iat)，
+    额外加入 exp 用于过期判断。校验通过的 token 会缓存到过期时间，
+    热路径上不必每次重新计算 HMAC。
+    """
+
+    HEADER = _b64encode(b'{"alg":"HS512"}')
+
+    def __init__(self, secret: bytes, ttl: float):
+        """
+        Args:
+            secret: 签名密钥（多进程之间必须一致）
+            ttl: token 有效期 (秒)
+        """
+        self.secret = secret
+        self.ttl = ttl
+        self._verified: Dict[str, float] = {}
+
+    def issue(self, user_id: int, account: str) -> str:
+        """签发 token"""
+        now = int(time.time())
+        u = uuid.uuid4()
+        payload = {
+            'sub': str(user_id),
+            'nbf': now,
+            'iss': 'ivas_third',
+            'userName': account,
+            'uuid': {
+                'leastSignificantBits': (u.int & (2 ** 64 - 1)) - 2 ** 63,
+                'mostSignificantBits': (u.int >> 64) - 2 ** 63
+            },
+            'iat': now,
+            'exp': now + int(self.ttl)
+        }
+        signing_input = self.HEADER + b'.' + _b64encode(json.dumps(payload, separators=(',', ':')).encode())
+        signature = hmac.new(self.secret, signing_input, hashlib.sha512).digest()
+        return (signing_input + b'.' + _b64encode(signature)).decode()
+
+    def verify(self, token: Optional[str]) -> bool:
+        """校验签名和有效期"""
+        if not token:
+            return False
+
+        now = time.time()
+        exp = self._verified.get(token)
+        if exp is not None:
+            if now < exp:
+                return True
+            del self._verified[token]
+            return False
+
+        try:
+            header, payload, signature = token.encode().split(b'.')
+            expected = hmac.new(self.secret, header + b'.' + payload, hashlib.sha512).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                return False
+            claims = json.loads(_b64decode(payload))
+        except (ValueError, TypeError):
+            return False
+
+        exp = claims.get('exp')
+        if exp is None or now >= exp or now < claims.get('nbf', 0):
+            return False
+
+        if len(self._verified) > 100000:
+            self._verified.clear()
+        self._verified[token] = exp
+        return True
+
+
+# ==================== 接口处理 ====================
+
+def _encode(body: Dict[str, Any]) -> bytes:
+    return json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _finite(value) -> float:
+    """解析为有限浮点数，nan / inf 与无法解析的值一样抛出 ValueError"""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"不是有限数值: {value}")
+    return number
+
+
+def _json(body, status: int = 200) -> web.Response:
+    """body 可以是字典，也可以是预先编码好的 bytes"""
+    if not isinstance(body, bytes):
+        body = _encode(body)
+    return web.Response(body=body, status=status, content_type='application/json')
+
+
+# 固定不变的响应体预先编码，热路径上不再序列化
+UNAUTHORIZED = _encode({'data': None, 'resCode': 40, 'resData': None, 'resMsg': "未登陆"})
+BAD_PARAMS = _encode({'data': None, 'resCode': 2, 'resData': None, 'resMsg': "传入参数有误"})
+LOGIN_FAILED = _encode({'data': None, 'resCode': -1, 'resData': None, 'resMsg': "用户名或密码错误"})
+POSITION_OK = _encode({'data': {}, 'resCode': 0, 'resData': {}, 'resMsg': "操作成功"})
+TARGETS_OK = _encode({'data': {}, 'resCode': 0, 'resData': {}, 'resMsg': "成功"})
+NO_TASK = _encode({'code': 200, 'msg': "暂无任务", 'data': None})
+
+
+class MockIVAS:
+    """模拟 IVAS 服务器（单个进程内的状态）"""
+
+    def __init__(self, issuer: TokenIssuer, password: str, task_mode: str, task_rate: float,
+                 spatial_cell: float = 0.01):
+        """
+        Args:
+            issuer: token 签发器
+            password: 所有账号通用的登录密码
+            task_mode: 'none' 不下发任务，'random' 按 task_rate 概率随机下发
+            task_rate: 随机模式下每次轮询返回任务的概率
+            spatial_cell: 空间索引的网格边长 (度)，0 表示不建立索引
+        """
+        self.issuer = issuer
+        self.password = password
+        self.task_mode = task_mode
+        self.task_rate = task_rate
+        # 无人机按 deviceCode、目标按目标 id 保存最新位置
+        self.indexes: Dict[str, GridIndex] = {}
+        if spatial_cell > 0:
+            self.indexes = {'devices': GridIndex(spatial_cell), 'targets': GridIndex(spatial_cell)}
+        self.started = time.time()
+        self.counters = {
+            'zsLogin': 0,
+            'reportUserData': 0,
+            'postTarPos': 0,
+            'outdoorTask': 0,
+            'unauthorized': 0,
+            'bad_request': 0
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(LOGIN_PATH, self.login)
+        app.router.add_post(REPORT_POSITION_PATH, self.report_position)
+        app.router.add_post(POST_TARGETS_PATH, self.post_targets)
+        app.router.add_get(OUTDOOR_TASK_PATH, self.outdoor_task)
+        app.router.add_get('/mock/stats', self.stats)
+        app.router.add_get('/mock/{kind}/radius', self.query_radius)
+        app.router.add_get('/mock/{kind}/bbox', self.query_bbox)
+        app.router.add_get('/mock/{kind}/nearest', self.query_nearest)
+        return app
+
+    def _authorized(self, request: web.Request) -> bool:
+        if self.issuer.verify(request.headers.get('token')):
+            return True
+        self.counters['unauthorized'] += 1
+        return False
+
+    async def login(self, request: web.Request) -> web.Response:
+        self.counters['zsLogin'] += 1
+        try:
+            body = await request.json()
+            account = body['account']
+            password = body['password']
+            if not isinstance(account, str):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            self.counters['bad_request'] += 1
+            return _json(BAD_PARAMS)
+
+        if password != self.password:
+            return _json(LOGIN_FAILED)
+
+        user_id = int(hashlib.md5(account.encode()).hexdigest()[:6], 16)
+        return _json({
+            'resCode': 1,
+            'resMsg': "成功",
+            'resData': {
+                'login': {
+                    'id': user_id,
+                    'userName': account,
+                    'account': account,
+                    'createTime': int(self.started * 1000)
+                },
+                'token': self.issuer.issue(user_id, account)
+            },
+            'data': None
+        })
+
+    async def report_position(self, request: web.Request) -> web.Response:
+        self.counters['reportUserData'] += 1
+        if not self._authorized(request):
+            return _json(UNAUTHORIZED, status=401)
+
+        query = request.query
+        if any(key not in query for key in POSITION_REQUIRED):
+            self.counters['bad_request'] += 1
+            return _json(BAD_PARAMS)
+
+        devices = self.indexes.get('devices')
+        if devices is not None:
+            try:
+                lat, lon, alt = _finite(query['userX']), _finite(query['userY']), _finite(query['userZ'])
+                azimuth = _finite(query['azimuth'])
+            except ValueError:
+                self.counters['bad_request'] += 1
+                return _json(BAD_PARAMS)
+            devices.update(query['deviceCode'], lat, lon, alt, {'azimuth': azimuth})
+
+        return _json(POSITION_OK)
+
+    async def post_targets(self, request: web.Request) -> web.Response:
+        self.counters['postTarPos'] += 1
+        if not self._authorized(request):
+            return _json(UNAUTHORIZED, status=401)
+
+        try:
+            body = json.loads(await request.read())
+            objs = body['objs']
+            if 'timestamp' not in body or 'obj_cnt' not in body or not isinstance(objs, list):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            self.counters['bad_request'] += 1
+            return _json(BAD_PARAMS)
+
+        targets = self.indexes.get('targets')
+        if targets is not None:
+            # 先校验全部目标再写入索引，请求被拒绝时索引保持不变；
+            # id 是选填字段，没有 id 的目标无法跟踪最新状态，不写入索引
+            updates = []
+            try:
+                for obj in objs:
+                    lon, lat, alt = obj['gis']
+                    position = _finite(lat), _finite(lon), _finite(alt)
+                    target_id = obj.get('id')
+                    if target_id is None:
+                        continue
+                    if not isinstance(target_id, (int, str)):
+                        raise TypeError
+                    updates.append((target_id, position, obj.get('cls')))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self.counters['bad_request'] += 1
+                return _json(BAD_PARAMS)
+
+            now = time.time()
+            for target_id, (lat, lon, alt), cls in updates:
+                targets.update(target_id, lat, lon, alt, {'cls': cls}, now)
+
+        return _json(TARGETS_OK)
+
+    async def outdoor_task(self, request: web.Request) -> web.Response:
+        self.counters['outdoorTask'] += 1
+        if not self._authorized(request):
+            return _json(UNAUTHORIZED, status=401)
+
+        if self.task_mode == 'random' and random.random() < self.task_rate:
+            return _json({'code': 200, 'msg': "获取任务成功", 'data': self._random_task()})
+        return _json(NO_TASK)
+
+    @staticmethod
+    def _random_task() -> Dict[str, Any]:
+        """按任务枚举规则随机生成一个任务"""
+        mission = random.randint(1, 7)
+        if mission <= 3:
+            target_id = random.choice([99, random.randint(1, 3)])
+        else:
+            target_id = random.randint(1, 3)
+
+        task = {'mission': mission, 'id': target_id}
+        if mission == 4:
+            task.update({
+                'lon': 113.0 + random.uniform(-0.01, 0.01),
+                'lat': 23.0 + random.uniform(-0.01, 0.01),
+                'alt': random.uniform(20, 150)
+            })
+        return task
+
+    async def stats(self, request: web.Request) -> web.Response:
+        """本进程的请求计数和空间索引状态"""
+        return _json({
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'counters': self.counters,
+            'spatial': {kind: index.stats() for kind, index in self.indexes.items()}
+        })
+
+    # ==================== 空间查询 ====================
+
+    def _query(self, request: web.Request, *names: str):
+        """
+        解析空间查询的公共部分
+
+        Returns:
+            tuple: (索引, 必填参数值列表, max_age, limit)；参数有误时抛出 HTTPException
+        """
+        index = self.indexes.get(request.match_info['kind'])
+        if index is None:
+            raise web.HTTPNotFound(text=f"未知的实体类型或未启用空间索引: {request.match_info['kind']}")
+        query = request.query
+        try:
+            values = [_finite(query[name]) for name in names]
+            max_age = _finite(query['max_age']) if 'max_age' in query else None
+            limit = int(query.get('limit', QUERY_LIMIT))
+            if limit < 0:
+                raise ValueError(f"limit 不能为负数: {limit}")
+        except KeyError as e:
+            raise web.HTTPBadRequest(text=f"缺少参数: {e.args[0]}")
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=f"参数有误: {e}")
+        return index, values, max_age, limit
+
+    @staticmethod
+    def _items(found, limit: int) -> web.Response:
+        """found 为 (距离, 实体) 列表"""
+        return _json({'count': len(found), 'items': [e.to_dict(round(d, 2)) for d, e in found[:limit]]})
+
+    async def query_radius(self, request: web.Request) -> web.Response:
+        """半径 (米) 内的实体，按距离排序"""
+        index, (lat, lon, radius), max_age, limit = self._query(request, 'lat', 'lon', 'radius')
+        return self._items(index.radius(lat, lon, radius, max_age), limit)
+
+    async def query_bbox(self, request: web.Request) -> web.Response:
+        """矩形范围内的实体"""
+        index, bounds, max_age, limit = self._query(request, 'min_lat', 'min_lon', 'max_lat', 'max_lon')
+        found = index.bbox(*bounds, max_age=max_age)
+        return _json({'count': len(found), 'items': [e.to_dict() for e in found[:limit]]})
+
+    async def query_nearest(self, request: web.Request) -> web.Response:
+        """最近的 k 个实体"""
+        index, (lat, lon), max_age, _ = self._query(request, 'lat', 'lon')
+        try:
+            k = int(request.query.get('k', 1))
+            if k < 1:
+                raise ValueError(f"k 必须大于 0: {k}")
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=f"参数有误: {e}")
+        # 与 limit 相同，最多返回 QUERY_LIMIT 个
+        found = index.nearest(lat, lon, min(k, QUERY_LIMIT), max_age)
+        return self._items(found, len(found))
+
+
+# ==================== 启动 ====================
+
+def _serve(args, secret: bytes):
+    """单个工作进程"""
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    issuer = TokenIssuer(secret, args.token_ttl)
+    mock = MockIVAS(issuer, args.password, args.task_mode, args.task_rate, args.spatial_cell)
+
+    async def main():
+        runner = web.AppRunner(mock.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, args.host, args.port, reuse_port=args.workers > 1, backlog=4096)
+        await site.start()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IVAS 本地模拟服务器")
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址')
+    parser.add_argument('--port', type=int, default=5001, help='监听端口')
+    parser.add_argument('--workers', type=int, default=1, help='工作进程数 (>1 时使用 SO_REUSEPORT)')
+    parser.add_argument('--password', default='000000', help='所有账号通用的登录密码')
+    parser.add_argument('--token-ttl', type=float, default=3600, help='token 有效期 (秒)')
+    parser.add_argument('--secret', default=None, help='JWT 签名密钥 (默认随机生成)')
+    parser.add_argument('--task-mode', choices=['none', 'random'], default='random', help='任务下发模式')
+    parser.add_argument('--task-rate', type=float, default=0.2, help='随机模式下返回任务的概率')
+    parser.add_argument('--spatial-cell', type=float, default=0.01,
+                        help='空间索引网格边长 (度，约 1.1 km / 0.01)，0 表示不建立索引')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    secret = args.secret.encode() if args.secret else os.urandom(32)
+
+    print(f"IVAS 模拟服务器: http://{args.host}:{args.port}  工作进程: {args.workers}  token 有效期: {args.token_ttl}s")
+
+    if args.workers <= 1:
+        _serve(args, secret)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_serve, args=(args, secret), daemon=True)
+        for _ in range(args.workers)
+    ]
+    for p in processes:
+        p.start()
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        for p in processes:
+            p.terminate()
+
+
+if __name__ == '__main__':
+    main()
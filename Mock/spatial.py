@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+模拟服务器的空间索引
+
+保存每架无人机、每个目标的最新位置，供下游工具查询：
+1. 均匀经纬度网格 (cell × cell 度)，每个网格保存其中的实体；上报时 O(1) 更新 (只有跨网格时才移动)
+2. radius: 圆形范围查询，只检查与外接矩形相交的网格，再按大圆距离过滤
+3. bbox: 矩形范围查询
+4. nearest: 从查询点所在网格按环向外搜索，找到 k 个且下一环不可能更近时停止
+5. 需要检查的网格数超过非空网格数时改为遍历非空网格，范围很大或远离所有实体时不会退化成遍历大量空网格
+
+索引只保存在当前进程内 (--workers > 1 时每个工作进程只看到落到本进程的上报)。
+radius / bbox 查询不处理跨越 180° 经线的范围。
+"""
+
+import math
+import time
+from typing import Dict, Any, Hashable, List, Optional, Set, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# nearest 最多向外搜索的环数，超过后改为按网格距离排序查找
+MAX_RINGS = 64
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """两点之间的大圆距离 (米)"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Entity:
+    """一个实体的最新状态"""
+    __slots__ = ('id', 'lat', 'lon', 'alt', 'updated', 'cell', 'data')
+
+    def __init__(self, id: Hashable):
+        self.id = id
+        self.lat = self.lon = self.alt = 0.0
+        self.updated = 0.0
+        self.cell = None
+        self.data = None
+
+    def to_dict(self, distance: Optional[float] = None) -> Dict[str, Any]:
+        item = {'id': self.id, 'lat': self.lat, 'lon': self.lon, 'alt': self.alt, 'updated': self.updated}
+        if self.data:
+            item.update(self.data)
+        if distance is not None:
+            item['distance_m'] = distance
+        return item
+
+
+class GridIndex:
+    """均匀网格空间索引（单线程使用：aiohttp 处理函数都在同一个事件循环中执行）"""
+
+    def __init__(self, cell: float = 0.01):
+        """
+        Args:
+            cell: 网格边长 (度)，0.01 度约 1.1 km；应与常用查询半径同一量级
+        """
+        if cell <= 0:
+            raise ValueError(f"网格边长必须大于 0: {cell}")
+        self.cell = cell
+        self._entities: Dict[Hashable, Entity] = {}
+        self._cells: Dict[Tuple[int, int], Set[Entity]] = {}
+        self.updates = 0
+        self.moves = 0  # 跨网格的更新次数
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell), math.floor(lon / self.cell)
+
+    # ==================== 更新 ====================
+
+    def update(self, id: Hashable, lat: float, lon: float, alt: float = 0.0,
+               data: Optional[Dict[str, Any]] = None, now: Optional[float] = None):
+        """写入实体的最新位置"""
+        entity = self._entities.get(id)
+        if entity is None:
+            entity = self._entities[id] = Entity(id)
+        cell = self._cell_of(lat, lon)
+        if cell != entity.cell:
+            if entity.cell is not None:
+                members = self._cells[entity.cell]
+                members.discard(entity)
+                if not members:
+                    del self._cells[entity.cell]
+                self.moves += 1
+            self._cells.setdefault(cell, set()).add(entity)
+            entity.cell = cell
+        entity.lat, entity.lon, entity.alt = lat, lon, alt
+        entity.updated = time.time() if now is None else now
+        entity.data = data
+        self.updates += 1
+
+    def remove(self, id: Hashable) -> bool:
+        entity = self._entities.pop(id, None)
+        if entity is None:
+            return False
+        members = self._cells[entity.cell]
+        members.discard(entity)
+        if not members:
+            del self._cells[entity.cell]
+        return True
+
+    # ==================== 查询 ====================
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        """与矩形相交的网格中的实体（网格数超过实体数时遍历全部实体）"""
+        lo_i, lo_j = self._cell_of(min_lat, min_lon)
+        hi_i, hi_j = self._cell_of(max_lat, max_lon)
+        if (hi_i - lo_i + 1) * (hi_j - lo_j + 1) > len(self._cells):
+            for (i, j), members in self._cells.items():
+                if lo_i <= i <= hi_i and lo_j <= j <= hi_j:
+                    yield from members
+            return
+        for i in range(lo_i, hi_i + 1):
+            for j in range(lo_j, hi_j + 1):
+                members = self._cells.get((i, j))
+                if members:
+                    yield from members
+
+    @staticmethod
+    def _fresh(entity: Entity, cutoff: Optional[float]) -> bool:
+        return cutoff is None or entity.updated >= cutoff
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+             max_age: Optional[float] = None) -> List[Entity]:
+        """矩形范围内的实体"""
+        cutoff = time.time() - max_age if max_age is not None else None
+        return [e for e in self._candidates(min_lat, min_lon, max_lat, max_lon)
+                if min_lat <= e.lat <= max_lat and min_lon <= e.lon <= max_lon and self._fresh(e, cutoff)]
+
+    def radius(self, lat: float, lon: float, meters: float,
+               max_age: Optional[float] = None) -> List[Tuple[float, Entity]]:
+        """
+        圆形范围内的实体
+
+        Returns:
+            list: (距离米数, 实体)，按距离从近到远排序
+        """
+        cutoff = time.time() - max_age if max_age is not None else None
+        d_lat = meters / METERS_PER_DEGREE
+        d_lon = d_lat / max(math.cos(math.radians(lat)), 1e-6)
+        found = []
+        for e in self._candidates(lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon):
+            if not self._fresh(e, cutoff):
+                continue
+            d = distance_m(lat, lon, e.lat, e.lon)
+            if d <= meters:
+                found.append((d, e))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_age: Optional[float] = None) -> List[Tuple[float, Entity]]:
+        """
+        距离最近的 k 个实体
+
+        Returns:
+            list: (距离米数, 实体)，按距离从近到远排序
+        """
+        cutoff = time.time() - max_age if max_age is not None else None
+        ci, cj = self._cell_of(lat, lon)
+        best: List[Tuple[float, Entity]] = []
+        for ring in range(MAX_RINGS + 1):
+            if ring > 0 and len(best) >= k:
+                # 第 ring 环及更外层的点与查询点之间至少隔着 ring - 1 个网格；
+                # 网格宽度按这些环中纬度最高处的经度方向宽度计算 (最窄)
+                edge = min(abs(lat) + (ring + 1) * self.cell, 90.0)
+                cell_m = self.cell * METERS_PER_DEGREE * math.cos(math.radians(edge))
+                if best[k - 1][0] <= (ring - 1) * cell_m:
+                    return best[:k]
+            if ring * ring > len(self._cells) * 4 and ring > 2:
+                break  # 环内大部分是空网格，不如直接遍历非空网格
+            for i in range(ci - ring, ci + ring + 1):
+                step = 1 if abs(i - ci) == ring else 2 * ring
+                for j in range(cj - ring, cj + ring + 1, max(step, 1)):
+                    members = self._cells.get((i, j))
+                    if not members:
+                        continue
+                    for e in members:
+                        if self._fresh(e, cutoff):
+                            best.append((distance_m(lat, lon, e.lat, e.lon), e))
+            best.sort(key=lambda item: item[0])
+            del best[k:]
+
+        return self._nearest_by_cells(lat, lon, k, cutoff)
+
+    def _nearest_by_cells(self, lat: float, lon: float, k: int,
+                          cutoff: Optional[float]) -> List[Tuple[float, Entity]]:
+        """查询点附近很空时：非空网格按与查询点的最小距离排序，依次检查到不可能更近为止"""
+        c = self.cell
+        sin_lat, cos_lat = math.sin(math.radians(lat)), math.cos(math.radians(lat))
+        bounds = []
+        for (i, j), members in self._cells.items():
+            # 查询点到网格矩形的最小距离：固定纬度时经度差越小越近，最近点在较近的一条经线边上
+            # (经度差按跨越 180° 经线后较短的一侧计算)
+            west, east = j * c, (j + 1) * c
+            if west <= lon <= east:
+                near_lon = lon
+            else:
+                near_lon = west if (west - lon) % 360 <= (lon - east) % 360 else east
+            # 沿这条经线，距离在纬度 atan2(sin(lat), cos(lat)·cos(经度差)) 处最小、向两侧单调增大
+            peak = math.degrees(math.atan2(sin_lat, cos_lat * math.cos(math.radians(near_lon - lon))))
+            south, north = i * c, (i + 1) * c
+            if south <= peak <= north:
+                bound = distance_m(lat, lon, peak, near_lon)
+            else:
+                bound = min(distance_m(lat, lon, south, near_lon), distance_m(lat, lon, north, near_lon))
+            bounds.append((bound, members))
+        bounds.sort(key=lambda item: item[0])
+
+        best: List[Tuple[float, Entity]] = []
+        for bound, members in bounds:
+            if len(best) >= k and best[k - 1][0] <= bound:
+                break
+            for e in members:
+                if self._fresh(e, cutoff):
+                    best.append((distance_m(lat, lon, e.lat, e.lon), e))
+            best.sort(key=lambda item: item[0])
+            del best[k:]
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        索引状态
+
+        Returns:
+            dict: entities, cells (非空网格数), cell_deg, updates, moves
+        """
+        return {
+            'entities': len(self._entities),
+            'cells': len(self._cells),
+            'cell_deg': self.cell,
+            'updates': self.updates,
+            'moves': self.moves
+        }
@@ -6,17 +6,29 @@ Rich 可视化模块
 1. 从队列读取数据
 2. 实时更新3个区域的显示
 3. 一个窗口分3个区域（不是3个独立窗口）
+4. 支持任意数量的无人机：按最差状态排序并分页，每行的渲染对象缓存，只重建数据变化的无人机
+5. 限制帧率，标题栏显示每帧渲染耗时
 """
 
 import queue
 import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from rich.live import Live
 from rich.table import Table
 from rich.layout import Layout
 from rich.panel import Panel
-from rich.console import Group
+from rich.markup import escape
+from rich.text import Text
+
+
+# 行状态，数值越大越靠前显示
+OK = 0
+STALE = 1
+WAITING = 2
+ERROR = 3
+
+STATE_NAMES = {OK: "正常", STALE: "停滞", WAITING: "等待", ERROR: "异常"}
 
 
 class Display:
@@ -32,47 +44,107 @@ class Display:
         7: "预设多航点任务3"
     }
 
-    def __init__(self, data_queue: queue.Queue):
+    ERROR_TTL = 5.0  # 错误在任务面板中保留的秒数
+
+    def __init__(
+        self,
+        data_queue: queue.Queue,
+        device_codes: Iterable[int] = (),
+        report_hz: Optional[float] = None,
+        task_hz: Optional[float] = None,
+        max_fps: float = 10.0,
+        page_size: Optional[int] = None,
+        page_interval: float = 5.0,
+        sort: str = 'worst',
+        stale_after: float = 3.0
+    ):
         """
         Args:
-            data_queue: 数据队列
+            data_queue: 数据队列 (ivas.mailbox.Mailbox 或 queue.Queue)，信箱的合并/丢弃计数显示在标题栏
+            device_codes: 预先显示的设备编号（尚未收到数据时显示为等待），其余编号收到数据时自动加入
+            report_hz: 上报频率，仅用于面板标题
+            task_hz: 任务轮询频率，仅用于面板标题
+            max_fps: 最大刷新帧率
+            page_size: 每页显示的无人机数量，None 表示按终端高度自动计算
+            page_interval: 自动翻页间隔 (秒)
+            sort: 'worst' 按状态从差到好排序（异常 → 等待 → 停滞 → 正常），'id' 按设备编号排序
+            stale_after: 超过该秒数未收到位置数据视为停滞
         """
         self.queue = data_queue
+        self.report_hz = report_hz
+        self.task_hz = task_hz
+        self.frame_interval = 1.0 / max_fps
+        self.page_size = page_size
+        self.page_interval = page_interval
+        self.sort = sort
+        self.stale_after = stale_after
 
         # 状态存储
-        self.drone_states = {
-            1: {'position': None, 'targets': None, 'task': None, 'error': None, 'pos_count': 0, 'tar_count': 0, 'token': None, 'account': None},
-            2: {'position': None, 'targets': None, 'task': None, 'error': None, 'pos_count': 0, 'tar_count': 0, 'token': None, 'account': None},
-            3: {'position': None, 'targets': None, 'task': None, 'error': None, 'pos_count': 0, 'tar_count': 0, 'token': None, 'account': None}
-        }
+        self.drone_states: Dict[int, Dict[str, Any]] = {}
+        self._rows: Dict[int, Dict[str, Any]] = {}  # 每架无人机缓存的行: {'position': cells, ..., 'expires': ...}
+        self._dirty = set()  # 数据变化后尚未重建行的无人机（只在出现在当前页时重建）
+        self._changed = False  # 自上一帧以来是否收到新数据
+
+        self._page = 0
+        self._page_started = time.monotonic()
+
+        # 渲染统计
+        self._frames = 0
+        self._render_ms = 0.0
+        self._render_max_ms = 0.0
+        self._render_recent: List[float] = []
+
+        for drone_id in device_codes:
+            self._state(drone_id)
 
     def run(self):
         """启动可视化循环"""
-        with Live(self._render(), auto_refresh=False, screen=True) as live:
+        with Live(auto_refresh=False, screen=True) as live:
+            next_frame = time.monotonic()
+            last_frame = 0.0
             while True:
-                # 非阻塞读取所有队列数据
-                updated = False
+                # 在下一帧之前持续读取队列数据
+                timeout = next_frame - time.monotonic()
                 try:
-                    while True:
+                    if timeout > 0:
+                        msg_type, drone_id, data = self.queue.get(timeout=timeout)
+                    else:
                         msg_type, drone_id, data = self.queue.get_nowait()
-                        self._update_state(msg_type, drone_id, data)
-                        updated = True
+                    self._update_state(msg_type, drone_id, data)
+                    continue
                 except queue.Empty:
                     pass
 
-                # 更新显示
-                if updated:
-                    live.update(self._render(), refresh=True)
-
-                time.sleep(0.05)  # 20Hz 刷新
+                # 更新显示（帧率上限 max_fps；没有新数据时每秒刷新一次，用于翻页和停滞判断）
+                now = time.monotonic()
+                if self._changed or now - last_frame >= 1.0:
+                    started = time.perf_counter()
+                    live.update(self._render(live.console.size.height), refresh=True)
+                    self._record_frame((time.perf_counter() - started) * 1000)
+                    last_frame = now
+                next_frame = max(next_frame + self.frame_interval, time.monotonic())
+
+    def _state(self, drone_id: int) -> Dict[str, Any]:
+        """取得无人机状态，首次出现的设备编号自动加入"""
+        state = self.drone_states.get(drone_id)
+        if state is None:
+            state = self.drone_states[drone_id] = {
+                'position': None, 'targets': None, 'task': None, 'error': None,
+                'pos_count': 0, 'tar_count': 0, 'token': None, 'account': None,
+                'updated_at': None, 'error_at': None
+            }
+            self._dirty.add(drone_id)
+            self._changed = True
+        return state
 
     def _update_state(self, msg_type: str, drone_id: int, data: Any):
         """更新状态"""
-        state = self.drone_states[drone_id]
+        state = self._state(drone_id)
 
         if msg_type == 'position':
             state['position'] = data
             state['pos_count'] += 1
+            state['updated_at'] = time.monotonic()
             # 保存token和account
             if data.get('_token'):
                 state['token'] = data.get('_token')
@@ -84,39 +156,145 @@ class Display:
             state['task'] = data
         elif msg_type == 'error':
             state['error'] = (datetime.now(), data)
+            state['error_at'] = time.monotonic()
+        self._dirty.add(drone_id)
+        self._changed = True
 
-    def _render(self) -> Layout:
-        """渲染整个布局"""
-        layout = Layout()
+    # ==================== 排序与分页 ====================
 
-        layout.split_column(
-            Layout(name="header", size=3),
-            Layout(name="body"),
-        )
+    def _severity(self, drone_id: int, now: float) -> int:
+        """行状态：异常 (近期有错误) / 等待 (尚无数据) / 停滞 (位置数据过久未更新) / 正常"""
+        state = self.drone_states[drone_id]
+        if state['error_at'] is not None and now - state['error_at'] < self.ERROR_TTL:
+            return ERROR
+        updated_at = state['updated_at']
+        if updated_at is None:
+            return WAITING
+        if now - updated_at > self.stale_after:
+            return STALE
+        return OK
+
+    def _page_rows(self, height: int) -> int:
+        """每页行数：三个面板各自占用 行数 + 7 行 (边框、标题、表头)，标题栏 3 行"""
+        if self.page_size is not None:
+            return self.page_size
+        return max(1, (height - 3 - 3 * 7) // 3)
+
+    def _visible(self, height: int, now: float) -> Tuple[List[int], Dict[int, int], int, int]:
+        """
+        选出当前页的无人机
 
-        layout["header"].update(Panel(
-            "[bold cyan]IVAS 真实客户端 - 实时监控[/bold cyan]",
-            style="bold white on blue"
-        ))
+        Returns:
+            (当前页设备编号, 各状态的无人机数量, 当前页号, 总页数)
+        """
+        severity = {drone_id: self._severity(drone_id, now) for drone_id in self.drone_states}
+        counts = {level: 0 for level in STATE_NAMES}
+        for level in severity.values():
+            counts[level] += 1
+
+        if self.sort == 'worst':
+            order = sorted(severity, key=lambda d: (-severity[d], d))
+        else:
+            order = sorted(severity)
+
+        size = self._page_rows(height)
+        pages = max(1, (len(order) + size - 1) // size)
+        if now - self._page_started >= self.page_interval:
+            self._page += 1
+            self._page_started = now
+        self._page %= pages
+        start = self._page * size
+        return order[start:start + size], counts, self._page, pages
+
+    # ==================== 渲染 ====================
+
+    def _record_frame(self, ms: float):
+        self._frames += 1
+        self._render_ms = ms
+        self._render_max_ms = max(self._render_max_ms, ms)
+        self._render_recent.append(ms)
+        if len(self._render_recent) > 100:
+            del self._render_recent[:50]
+
+    def render_stats(self) -> Dict[str, Any]:
+        """
+        渲染耗时统计
 
-        # Body 分成3个区域
-        layout["body"].split_column(
-            Layout(name="positions", ratio=2),
-            Layout(name="targets", ratio=2),
-            Layout(name="tasks", ratio=1)
-        )
+        Returns:
+            dict: frames, last_ms, p95_ms (最近 50~100 帧), max_ms, drones
+        """
+        recent = sorted(self._render_recent)
+        return {
+            'frames': self._frames,
+            'last_ms': self._render_ms,
+            'p95_ms': recent[int(0.95 * (len(recent) - 1))] if recent else 0.0,
+            'max_ms': self._render_max_ms,
+            'drones': len(self.drone_states)
+        }
+
+    def _render(self, height: int = 50) -> Layout:
+        """渲染整个布局（只重建当前页中数据变化的行）"""
+        now = time.monotonic()
+        self._changed = False
+        visible, counts, page, pages = self._visible(height, now)
 
-        layout["positions"].update(self._make_position_panel())
-        layout["targets"].update(self._make_targets_panel())
-        layout["tasks"].update(self._make_tasks_panel())
+        for drone_id in visible:
+            rows = self._rows.get(drone_id)
+            # 任务面板中的错误超过 ERROR_TTL 后恢复显示
+            if drone_id in self._dirty or rows is None or (rows['expires'] is not None and now >= rows['expires']):
+                self._rows[drone_id] = self._make_rows(drone_id, now)
+                self._dirty.discard(drone_id)
+        rows = len(visible) + 7
 
+        layout = Layout()
+        layout.split_column(
+            Layout(self._make_header(counts, page, pages), name="header", size=3),
+            Layout(self._make_panel('position', visible), name="positions", size=rows),
+            Layout(self._make_panel('targets', visible), name="targets", size=rows),
+            Layout(self._make_panel('task', visible), name="tasks", size=rows)
+        )
         return layout
 
-    def _make_position_panel(self) -> Panel:
-        """创建位置数据面板"""
-        table = Table(title="位置数据上报 (10Hz)", show_header=True, header_style="bold magenta")
+    def _make_header(self, counts: Dict[int, int], page: int, pages: int) -> Panel:
+        """标题栏：机队状态汇总、分页和渲染耗时"""
+        summary = "  ".join(f"{STATE_NAMES[level]} {counts[level]}" for level in (ERROR, WAITING, STALE, OK))
+        order = "最差优先" if self.sort == 'worst' else "编号"
+        mailbox = ""
+        stats = getattr(self.queue, 'stats', None)
+        if stats is not None:
+            s = stats()
+            mailbox = f"  合并 {s['coalesced']} 丢弃 {s['dropped']}"
+        return Panel(
+            f"[bold cyan]IVAS 真实客户端 - 实时监控[/bold cyan]  "
+            f"无人机 {len(self.drone_states)}  {summary}  "
+            f"第 {page + 1}/{pages} 页 ({order})  "
+            f"渲染 {self._render_ms:.1f}ms (最大 {self._render_max_ms:.1f}ms){mailbox}",
+            style="bold white on blue"
+        )
 
-        table.add_column("无人机", style="cyan", width=8)
+    def _make_panel(self, kind: str, visible: List[int]) -> Panel:
+        """用缓存的行组装面板"""
+        if kind == 'position':
+            table = self._position_table()
+            border = "green"
+        elif kind == 'targets':
+            table = self._targets_table()
+            border = "yellow"
+        else:
+            table = self._tasks_table()
+            border = "blue"
+
+        for drone_id in visible:
+            table.add_row(*self._rows[drone_id][kind])
+        return Panel(table, border_style=border)
+
+    def _title(self, name: str, hz: Optional[float]) -> str:
+        return f"{name} ({hz:g}Hz)" if hz else name
+
+    def _position_table(self) -> Table:
+        table = Table(title=self._title("位置数据上报", self.report_hz), show_header=True, header_style="bold magenta")
+
+        table.add_column("无人机", style="cyan", width=10)
         table.add_column("账号", style="magenta", width=10)
         table.add_column("Token", style="dim white", width=8)
         table.add_column("纬度(userX)", style="green", width=12)
@@ -125,147 +303,153 @@ class Display:
         table.add_column("方向角", style="blue", width=8)
         table.add_column("动/静", style="white", width=6)
         table.add_column("上报次数", style="white", width=10)
+        return table
 
-        for drone_id in [1, 2, 3]:
-            state = self.drone_states[drone_id]
-            pos = state['position']
-            token = state['token']
-            account = state['account']
-
-            if pos:
-                motion_text = "移动" if pos.get('motion') == 1 else "静止"
-                token_prefix = token[-5:] if token else "N/A"
-                account_text = account if account else "N/A"
-
-                table.add_row(
-                    f"DRONE-{drone_id}",
-                    account_text,
-                    f"[dim]{token_prefix}...[/dim]",
-                    f"{pos.get('userX', 0):.6f}",
-                    f"{pos.get('userY', 0):.6f}",
-                    f"{pos.get('userZ', 0):.2f}m",
-                    f"{pos.get('azimuth', 0)}°",
-                    motion_text,
-                    f"{state['pos_count']}"
-                )
-            else:
-                table.add_row(
-                    f"DRONE-{drone_id}",
-                    "[dim]等待...[/dim]",
-                    "[dim]N/A[/dim]",
-                    "[dim]等待数据...[/dim]",
-                    "",
-                    "",
-                    "",
-                    "",
-                    "0",
-                )
-
-        return Panel(table, border_style="green")
+    def _targets_table(self) -> Table:
+        table = Table(title=self._title("目标数据上报", self.report_hz), show_header=True, header_style="bold magenta")
 
-    def _make_targets_panel(self) -> Panel:
-        """创建目标数据面板"""
-        table = Table(title="目标数据上报 (10Hz)", show_header=True, header_style="bold magenta")
-
-        table.add_column("无人机", style="cyan", width=8)
+        table.add_column("无人机", style="cyan", width=10)
         table.add_column("目标数", style="green", width=8)
         table.add_column("最新目标", style="yellow", width=60)
         table.add_column("上报次数", style="white", width=10)
+        return table
 
-        for drone_id in [1, 2, 3]:
-            state = self.drone_states[drone_id]
-            tar = state['targets']
-
-            if tar:
-                obj_cnt = tar.get('obj_cnt', 0)
-                objs = tar.get('objs', [])
-
-                if objs:
-                    # 显示第一个目标的信息
-                    first_obj = objs[0]
-                    cls = first_obj.get('cls', 0)
-                    cls_name = {0: "人", 1: "车", 2: "飞机"}.get(cls, "未知")
-                    gis = first_obj.get('gis', [0, 0, 0])
-                    obj_info = f"{cls_name} @ ({gis[0]:.6f}, {gis[1]:.6f}, {gis[2]:.2f}m)"
-                else:
-                    obj_info = "[dim]无目标[/dim]"
-
-                table.add_row(
-                    f"DRONE-{drone_id}",
-                    f"{obj_cnt}",
-                    obj_info,
-                    f"{state['tar_count']}"
-                )
-            else:
-                table.add_row(
-                    f"DRONE-{drone_id}",
-                    "[dim]等待数据...[/dim]",
-                    "",
-                    "0"
-                )
-
-        return Panel(table, border_style="yellow")
+    def _tasks_table(self) -> Table:
+        title = "任务轮询"
+        if self.task_hz:
+            title = f"任务轮询 ({self.task_hz:g}Hz / {1 / self.task_hz:g}秒)"
+        table = Table(title=title, show_header=True, header_style="bold magenta")
 
-    def _make_tasks_panel(self) -> Panel:
-        """创建任务数据面板"""
-        table = Table(title="任务轮询 (0.2Hz / 5秒)", show_header=True, header_style="bold magenta")
-
-        table.add_column("无人机", style="cyan", width=8)
+        table.add_column("无人机", style="cyan", width=10)
         table.add_column("任务类型", style="green", width=20)
         table.add_column("任务详情", style="yellow", width=50)
         table.add_column("状态", style="white", width=10)
+        return table
 
-        for drone_id in [1, 2, 3]:
-            state = self.drone_states[drone_id]
-            task = state['task']
-
-            if task and task.get('code') == 200 and task.get('data'):
-                data = task.get('data')
-                mission = data.get('mission')
-                mission_name = self.MISSION_NAMES.get(mission, f"未知任务({mission})")
-
-                # 构建详情
-                details = []
-                if mission == 4:
-                    lat = data.get('lat', 0)
-                    lon = data.get('lon', 0)
-                    alt = data.get('alt', 0)
-                    details.append(f"目标: ({lon:.6f}, {lat:.6f}, {alt:.2f}m)")
-
-                target_id = data.get('id')
-                if target_id:
-                    if target_id == 99:
-                        details.append("目标: 所有无人机")
-                    else:
-                        details.append(f"目标: DRONE-{target_id}")
+    # ==================== 行构建 ====================
 
-                details_text = " | ".join(details) if details else ""
+    def _make_rows(self, drone_id: int, now: float) -> Dict[str, Any]:
+        """重建一架无人机在三个面板中的行（Text 对象只解析一次标记）"""
+        state = self.drone_states[drone_id]
+        task_cells = self._task_cells(drone_id, state)
+        showing_error = task_cells[1] == "[red]错误[/red]"
+        return {
+            'position': tuple(Text.from_markup(cell) for cell in self._position_cells(drone_id, state)),
+            'targets': tuple(Text.from_markup(cell) for cell in self._targets_cells(drone_id, state)),
+            'task': tuple(Text.from_markup(cell) for cell in task_cells),
+            'expires': state['error_at'] + self.ERROR_TTL if showing_error else None
+        }
 
-                table.add_row(
-                    f"DRONE-{drone_id}",
-                    mission_name,
-                    details_text,
-                    "[green]接收[/green]"
-                )
+    def _position_cells(self, drone_id: int, state: Dict[str, Any]) -> Tuple[str, ...]:
+        pos = state['position']
+        token = state['token']
+        account = state['account']
+
+        if pos:
+            motion_text = "移动" if pos.get('motion') == 1 else "静止"
+            token_prefix = token[-5:] if token else "N/A"
+            account_text = account if account else "N/A"
+
+            return (
+                f"DRONE-{drone_id}",
+                account_text,
+                f"[dim]{token_prefix}...[/dim]",
+                f"{pos.get('userX', 0):.6f}",
+                f"{pos.get('userY', 0):.6f}",
+                f"{pos.get('userZ', 0):.2f}m",
+                f"{pos.get('azimuth', 0)}°",
+                motion_text,
+                f"{state['pos_count']}"
+            )
+        return (
+            f"DRONE-{drone_id}",
+            "[dim]等待...[/dim]",
+            "[dim]N/A[/dim]",
+            "[dim]等待数据...[/dim]",
+            "",
+            "",
+            "",
+            "",
+            "0",
+        )
+
+    def _targets_cells(self, drone_id: int, state: Dict[str, Any]) -> Tuple[str, ...]:
+        tar = state['targets']
+
+        if tar:
+            obj_cnt = tar.get('obj_cnt', 0)
+            objs = tar.get('objs', [])
+
+            if objs:
+                # 显示第一个目标的信息
+                first_obj = objs[0]
+                cls = first_obj.get('cls', 0)
+                cls_name = {0: "人", 1: "车", 2: "飞机"}.get(cls, "未知")
+                gis = first_obj.get('gis', [0, 0, 0])
+                obj_info = f"{cls_name} @ ({gis[0]:.6f}, {gis[1]:.6f}, {gis[2]:.2f}m)"
             else:
-                error = state.get('error')
-                if error:
-                    timestamp, err_msg = error
-                    age = (datetime.now() - timestamp).total_seconds()
-                    if age < 5:  # 5秒内的错误
-                        table.add_row(
-                            f"DRONE-{drone_id}",
-                            "[red]错误[/red]",
-                            f"{err_msg}",
-                            "[red]异常[/red]"
-                        )
-                        continue
-
-                table.add_row(
+                obj_info = "[dim]无目标[/dim]"
+
+            return (
+                f"DRONE-{drone_id}",
+                f"{obj_cnt}",
+                obj_info,
+                f"{state['tar_count']}"
+            )
+        return (
+            f"DRONE-{drone_id}",
+            "[dim]等待数据...[/dim]",
+            "",
+            "0"
+        )
+
+    def _task_cells(self, drone_id: int, state: Dict[str, Any]) -> Tuple[str, ...]:
+        task = state['task']
+
+        if task and task.get('code') == 200 and task.get('data'):
+            data = task.get('data')
+            mission = data.get('mission')
+            mission_name = self.MISSION_NAMES.get(mission, f"未知任务({mission})")
+
+            # 构建详情
+            details = []
+            if mission == 4:
+                lat = data.get('lat', 0)
+                lon = data.get('lon', 0)
+                alt = data.get('alt', 0)
+                details.append(f"目标: ({lon:.6f}, {lat:.6f}, {alt:.2f}m)")
+
+            target_id = data.get('id')
+            if target_id:
+                if target_id == 99:
+                    details.append("目标: 所有无人机")
+                else:
+                    details.append(f"目标: DRONE-{target_id}")
+
+            details_text = " | ".join(details) if details else ""
+
+            return (
+                f"DRONE-{drone_id}",
+                mission_name,
+                details_text,
+                "[green]接收[/green]"
+            )
+
+        error = state.get('error')
+        if error:
+            timestamp, err_msg = error
+            age = (datetime.now() - timestamp).total_seconds()
+            if age < self.ERROR_TTL:  # 5秒内的错误
+                return (
                     f"DRONE-{drone_id}",
-                    "[dim]等待任务...[/dim]",
-                    "",
-                    "[dim]空闲[/dim]"
+                    "[red]错误[/red]",
+                    escape(str(err_msg)),
+                    "[red]异常[/red]"
                 )
 
-        return Panel(table, border_style="blue")
+        return (
+            f"DRONE-{drone_id}",
+            "[dim]等待任务...[/dim]",
+            "",
+            "[dim]空闲[/dim]"
+        )
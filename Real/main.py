@@ -4,16 +4,35 @@ IVAS 真实客户端 - 主入口
 
 使用方法：
     python main.py
+    python main.py --metrics-port 9100   # 同时以 Prometheus 文本格式发布指标
+    python main.py --headless --report report.json   # 无头模式：周期输出汇总行，退出时写入 JSON 报告
+    python main.py --record traffic.bin    # 录制发出的请求，之后用 python -m ivas.traffic replay 回放
+    python main.py --store telemetry/      # 把上报的位置和目标数据写入列式存储，运行后用 ivas.store 分析
+    python main.py --spool spool/          # 上报失败时暂存到磁盘，服务器恢复后限速补发
+    python main.py --config fleet.json --headless   # drone_groups 描述的上万架机队，按启动窗口逐步创建
 """
 
+import argparse
 import json
-import queue
-import threading
+import signal
 import sys
+import time
 from pathlib import Path
 
+# 复用 ivas 包：显式把项目根目录加入 sys.path，不依赖 drone 模块的导入顺序
+ROOT = str(Path(__file__).resolve().parent.parent)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ivas.fleet import IVASFleet
 from drone import Drone
 from display import Display
+from ivas.exporter import MetricsExporter
+from ivas.mailbox import Mailbox
+from ivas.summary import FleetSummary
+from ivas.traffic import TrafficRecorder
+from ivas.store import TelemetryWriter
+from ivas.fleetspec import FleetSpec
 
 
 def load_config(config_file='config.json'):
@@ -24,11 +43,45 @@ def load_config(config_file='config.json'):
         sys.exit(1)
 
     with open(config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        config = json.load(f)
+    if 'drones' not in config and 'drone_groups' not in config:
+        print(f"错误: 配置文件 {config_file} 需要 drones (逐架列出) 或 drone_groups (按分组生成)")
+        sys.exit(1)
+    return config
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="IVAS 真实客户端")
+    parser.add_argument('--config', default='config.json',
+                        help='配置文件 (相对于 Real/ 目录)，可用 drone_groups 按分组描述大规模机队')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='指标 HTTP 端口（覆盖 config.json 中的 metrics.port 并启用导出）')
+    parser.add_argument('--headless', action='store_true',
+                        help='无头模式：不启动可视化、不逐条打印日志，按间隔输出机队汇总')
+    parser.add_argument('--summary-interval', type=float, default=None,
+                        help='无头模式汇总行输出间隔 (秒，覆盖 headless.interval)')
+    parser.add_argument('--report', default=None,
+                        help='无头模式退出时写入的 JSON 报告路径 (覆盖 headless.report)')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='无头模式运行时长 (秒)，默认一直运行到 Ctrl+C')
+    parser.add_argument('--record', default=None,
+                        help='把发出的请求录制到二进制流量日志 (用 python -m ivas.traffic replay 回放)')
+    parser.add_argument('--store', default=None,
+                        help='把上报成功的位置和目标数据写入列式存储目录 (需要 numpy，用 ivas.store.TelemetryReader 分析)')
+    parser.add_argument('--spool', default=None,
+                        help='失败上报暂存目录 (覆盖 fleet.spool)，服务器恢复后按 fleet.spool_rps 补发')
+    return parser.parse_args()
+
+
+def _interrupt(signum, frame):
+    """SIGTERM 与 Ctrl+C 走同一条退出流程"""
+    raise KeyboardInterrupt
 
 
 def main():
     """主函数"""
+    args = parse_args()
+
     print("=" * 60)
     print("IVAS 真实客户端")
     print("=" * 60)
@@ -36,60 +89,190 @@ def main():
 
     # 1. 加载配置
     print("1. 加载配置文件...")
-    config = load_config()
+    config = load_config(args.config)
     print(f"   服务器: {config['server']['base_url']}")
-    print(f"   无人机数量: {len(config['drones'])}")
+    spec = None
+    if 'drone_groups' in config:
+        # 按分组描述的大规模机队：配置在启动窗口轮到时才生成，无人机才创建
+        spec = FleetSpec(config['drone_groups'])
+        print(f"   无人机数量: {len(spec)} ({len(config['drone_groups'])} 个分组，启动时逐步创建)")
+    else:
+        print(f"   无人机数量: {len(config['drones'])}")
     print()
 
-    # 2. 创建队列
-    print("2. 创建通信队列...")
-    display_queue = queue.Queue(maxsize=1000)
-    print(f"   队列容量: 1000")
-    print()
+    headless_cfg = config.get('headless', {})
+    headless = args.headless or headless_cfg.get('enabled', False)
 
-    # 3. 启动无人机线程
-    print("3. 启动无人机线程（每个无人机独立登录）...")
-    threads = []
-
-    for drone_cfg in config['drones']:
-        drone = Drone(
-            device_code=drone_cfg['device_code'],
-            account=drone_cfg['account'],
-            password=config['server']['password'],
-            base_lat=drone_cfg['base_lat'],
-            base_lon=drone_cfg['base_lon'],
-            base_alt=drone_cfg['base_alt'],
-            coord_range=config['coord_range'],
-            base_url=config['server']['base_url'],
-            display_queue=display_queue,
-            report_hz=config['intervals']['report_hz'],
-            task_hz=config['intervals']['task_hz']
-        )
+    # 2. 创建信箱（每架无人机每类消息只保留最新一条，上报线程写入不阻塞）
+    if headless:
+        print("2. 无头模式：不创建可视化，不逐条打印日志")
+        display_queue = None
+    else:
+        print("2. 创建可视化信箱...")
+        display_queue = Mailbox()
+        print(f"   容量: 每架无人机每类消息 1 条")
+    print()
 
-        t = threading.Thread(
-            target=drone.run,
-            name=f"Drone-{drone_cfg['device_code']}",
-            daemon=True
-        )
-        t.start()
-        threads.append(t)
+    # 3. 启动无人机机队
+    print("3. 启动无人机机队（每个无人机独立登录）...")
+    http_cfg = config.get('http', {})
+    fleet_cfg = config.get('fleet', {})
+    token_cache = fleet_cfg.get('token_cache')
+    spool = args.spool or fleet_cfg.get('spool')
+    recorder = TrafficRecorder(args.record) if args.record else None
+    store = TelemetryWriter(args.store) if args.store else None
+    fleet = IVASFleet(
+        max_workers=fleet_cfg.get('max_workers', 16),
+        client_class=Drone,
+        ramp_up=fleet_cfg.get('ramp_up', 0.0),
+        login_retries=fleet_cfg.get('login_retries', 3),
+        token_cache=str(Path(__file__).parent / token_cache) if token_cache else None,
+        task_poll=fleet_cfg.get('task_poll', 'device'),
+        max_rps=fleet_cfg.get('max_rps'),
+        spool=str(Path(__file__).parent / spool) if spool else None,
+        spool_rps=fleet_cfg.get('spool_rps', 50.0),
+        circuit_breaker=fleet_cfg.get('circuit_breaker')
+    )
 
-        print(f"   ✓ DRONE-{drone_cfg['device_code']} ({drone_cfg['account']}) 已启动")
+    common = {
+        'password': config['server']['password'],
+        'coord_range': config['coord_range'],
+        'base_url': config['server']['base_url'],
+        'display_queue': display_queue,
+        'report_hz': config['intervals']['report_hz'],
+        'task_hz': config['intervals']['task_hz'],
+        'tick_policy': config['intervals'].get('tick_policy', 'skip'),
+        'adaptive_rate': config['intervals'].get('adaptive'),
+        'pool_size': http_cfg.get('pool_size', 16),
+        'share_pool': http_cfg.get('share_pool', True),
+        'request_budgets': http_cfg.get('request_budgets'),
+        'token_ttl': config['server'].get('token_ttl'),
+        'quiet': headless,
+        'traffic_recorder': recorder,
+        'telemetry_store': store
+    }
 
+    if spec is not None:
+        spec.defaults.update(common)
+        fleet.spawn(spec)
+        for group in spec.summary():
+            print(f"   ✓ DRONE-{group['first']} ~ DRONE-{group['last']} ({group['count']} 架，"
+                  f"{group['report_hz']} Hz) 等待启动窗口")
+    else:
+        for drone_cfg in config['drones']:
+            fleet.add({
+                **common,
+                'device_code': drone_cfg['device_code'],
+                'account': drone_cfg['account'],
+                'base_lat': drone_cfg['base_lat'],
+                'base_lon': drone_cfg['base_lon'],
+                'base_alt': drone_cfg['base_alt']
+            })
+            print(f"   ✓ DRONE-{drone_cfg['device_code']} ({drone_cfg['account']}) 已加入")
+        fleet.start()
+    print(f"   工作线程: {fleet.max_workers}")
+    if fleet.ramp_up > 0:
+        print(f"   启动窗口: {fleet.ramp_up}s")
+    if fleet.token_cache is not None:
+        print(f"   token 缓存: {fleet.token_cache.path} ({len(fleet.token_cache)} 条)")
+    if fleet.task_fanout is not None:
+        print(f"   任务轮询: 统一轮询 ({fleet.task_fanout.mode})")
+    if fleet.rate_budget is not None:
+        print(f"   请求预算: {fleet.rate_budget.rps:g} 请求/秒")
+    if fleet.breakers is not None:
+        print(f"   熔断器: {fleet.breakers.options or '默认参数'}")
+    if fleet.spool is not None:
+        print(f"   上报暂存: {fleet.spool.path} (积压 {fleet.spool.depth()} 条，补发 {fleet.spool.drain_rps:g} 条/秒)")
     print()
-    print("4. 启动可视化...")
+
+    # 可选: Prometheus 文本格式指标
+    metrics_cfg = config.get('metrics', {})
+    exporter = None
+    if args.metrics_port is not None or metrics_cfg.get('enabled', False):
+        exporter = MetricsExporter(
+            fleet,
+            port=args.metrics_port if args.metrics_port is not None else metrics_cfg.get('port', 9100),
+            host=metrics_cfg.get('host', '0.0.0.0'),
+            queues={'display': display_queue} if display_queue is not None else None,
+            per_device=metrics_cfg.get('per_device', True)
+        ).start()
+        print(f"   指标地址: http://{exporter.host}:{exporter.port}/metrics")
+        print()
+    summary = None
+    if headless:
+        summary = FleetSummary(
+            fleet,
+            interval=args.summary_interval or headless_cfg.get('interval', 5.0),
+            report_path=args.report or headless_cfg.get('report', 'report.json')
+        )
+        print(f"4. 无头模式：每 {summary.interval}s 输出一行汇总，退出时写入 {summary.report_path}")
+    else:
+        print("4. 启动可视化...")
     print()
     print("=" * 60)
     print("系统运行中 (按 Ctrl+C 退出)")
     print("=" * 60)
     print()
 
-    # 4. 启动可视化（主线程）
+    # 4. 启动可视化 / 汇总输出（主线程）
     try:
-        display = Display(display_queue)
+        if summary is not None:
+            signal.signal(signal.SIGTERM, _interrupt)
+            summary.start()
+            deadline = time.monotonic() + args.duration if args.duration else None
+            while deadline is None or time.monotonic() < deadline:
+                time.sleep(0.5)
+            raise KeyboardInterrupt
+
+        display_cfg = config.get('display', {})
+        display = Display(
+            display_queue,
+            device_codes=[d['device_code'] for d in config['drones']] if spec is None else (),
+            report_hz=config['intervals']['report_hz'],
+            task_hz=config['intervals']['task_hz'],
+            max_fps=display_cfg.get('max_fps', 10),
+            page_size=display_cfg.get('page_size'),
+            page_interval=display_cfg.get('page_interval', 5.0),
+            sort=display_cfg.get('sort', 'worst')
+        )
         display.run()
     except KeyboardInterrupt:
         print("\n\n收到退出信号，正在停止...")
+        fleet.shutdown(wait=False)
+        if exporter is not None:
+            exporter.stop()
+        startup = fleet.startup_stats()
+        ttfr = startup['time_to_first_report']
+        if startup['reported']:
+            print(f"启动耗时: {startup['reported']}/{startup['drones']} 架已上报，"
+                  f"首次上报 p50 {ttfr['p50']:.2f}s / p95 {ttfr['p95']:.2f}s / max {ttfr['max']:.2f}s")
+        tasks = fleet.task_stats()
+        if tasks is not None:
+            print(f"任务分发: 轮询 {tasks['polls']} 次，任务 {tasks['tasks']} (广播 {tasks['broadcast']})，"
+                  f"送达 {tasks['delivered']}，节省请求 {tasks['polls_saved']}，"
+                  f"fan-in p95 {tasks['fanin_ms']['p95']:.1f} ms")
+        breakers = fleet.breaker_stats()
+        if breakers:
+            print("熔断器: " + "，".join(f"{b['endpoint']} {b['state']} (打开 {b['trips']} 次，拦截 {b['short_circuited']})"
+                                     for b in breakers))
+        spooled = fleet.spool_stats()
+        if spooled is not None:
+            print(f"上报暂存: 暂存 {spooled['spooled']}，补发 {spooled['drained']}，丢弃 {spooled['dropped']}，"
+                  f"剩余积压 {spooled['depth']} 条 (下次启动继续补发)")
+        if display_queue is not None:
+            mailbox = display_queue.stats()
+            print(f"可视化信箱: 写入 {mailbox['puts']}，合并 {mailbox['coalesced']}，丢弃 {mailbox['dropped']}")
+        if summary is not None:
+            summary.stop()
+            print(f"报告已写入: {summary.report_path}")
+        if recorder is not None:
+            recorder.close()
+            traffic = recorder.stats()
+            print(f"流量日志: {recorder.path} ({traffic['records']} 条，{traffic['bytes']} 字节，丢弃 {traffic['dropped']})")
+        if store is not None:
+            store.close()
+            rows = store.stats()['rows']
+            print(f"遥测存储: {store.path} (位置 {rows['positions']} 行，目标帧 {rows['frames']} 行，目标 {rows['targets']} 行)")
         print("系统已停止")
 
 
@@ -8,6 +8,19 @@ IVAS Python SDK
 - 目标检测数据上报
 - 任务轮询
 - 自动 token 管理和过期处理
+- 基于 asyncio 的异步客户端，单进程驱动大规模机队
+- 多进程分片机队，用满全部 CPU 核心并汇总各进程的统计
+- 定时堆 + 线程池的机队调度器
+- 机队统一任务轮询，按任务 id 分发给目标无人机
+- 按延迟和错误自适应调整上报频率 (AIMD)，机队共享的每秒请求数预算
+- 服务器故障期间的失败上报暂存到磁盘队列，恢复后限速补发
+- 由周期截止时间推导的按接口请求超时，按 (base_url, 接口) 熔断与半开探测
+- 按分组描述的机队规格 (FleetSpec)，配置和客户端在启动窗口轮到时才创建
+- 按接口的请求计数与延迟直方图，可按 Prometheus 文本格式导出
+- 按 (无人机, 消息类型) 合并最新值的非阻塞可视化信箱
+- 无头模式的周期汇总行与最终 JSON 报告
+- 流量录制（紧凑二进制日志）与按原始间隔的加速回放
+- 遥测列式存储，运行后通过内存映射查询航迹、速率和上报中断
 
 使用示例:
     from ivas import IVASClient
@@ -33,7 +46,10 @@ IVAS Python SDK
 """
 
 from .client import IVASClient
+from .aio import AsyncIVASClient, AsyncFleetRunner
+from .fleet import IVASFleet
+from .sharded import ShardedFleet
 
 __version__ = '1.0.0'
 __author__ = 'IVAS Team'
-__all__ = ['IVASClient']
+__all__ = ['IVASClient', 'AsyncIVASClient', 'AsyncFleetRunner', 'IVASFleet', 'ShardedFleet']
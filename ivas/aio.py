@@ -0,0 +1,701 @@
+#!/usr/bin/env python3
+"""
+IVAS 异步客户端模块
+
+基于 asyncio + aiohttp 的非阻塞实现：
+1. AsyncIVASClient: 与 IVASClient 相同的登录、上报、任务轮询语义
+2. AsyncFleetRunner: 单个事件循环驱动成千上万架无人机
+
+依赖 aiohttp (pip install aiohttp)，未安装时导入本模块不会报错，
+创建客户端时才会提示安装。
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, Any, Optional, List
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - 可选依赖
+    aiohttp = None
+
+from .client import IVASClient
+from .session import PoolStats
+from .encoding import dumps
+from .metrics import endpoint_name, merge_snapshots, startup_stats
+from .auth import TokenCache
+from .tasks import DEVICE, TaskFanout
+from .rate import RateBudget
+from .spool import ReportSpool, should_spool, spool_stats
+from .breaker import BreakerBoard, breaker_stats, is_failure
+
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise ImportError("异步客户端需要 aiohttp，请执行: pip install aiohttp")
+
+
+def create_session(limit: int = 0, stats: Optional[PoolStats] = None) -> 'aiohttp.ClientSession':
+    """
+    创建带连接复用统计的 aiohttp 会话
+
+    Args:
+        limit: 最大并发连接数 (0 表示不限制)
+        stats: 连接复用统计对象，复用连接记为 hit，新建连接记为 miss
+
+    Returns:
+        aiohttp.ClientSession
+    """
+    _require_aiohttp()
+
+    trace_configs = []
+    if stats is not None:
+        async def on_reuse(session, ctx, params):
+            stats.record(True)
+
+        async def on_create(session, ctx, params):
+            stats.record(False)
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_reuseconn.append(on_reuse)
+        trace.on_connection_create_end.append(on_create)
+        trace_configs.append(trace)
+
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit)
+    return aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+
+
+class _Response:
+    """已读取完毕的响应，接口与 requests.Response 保持一致"""
+
+    __slots__ = ('status_code', 'content')
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class AsyncIVASClient(IVASClient):
+    """IVAS 异步无人机客户端
+
+    与 IVASClient 的参数和行为一致，但 run / login 及所有请求方法
+    都是协程，需要在事件循环中运行：
+
+        client = AsyncIVASClient(**config)
+        await client.run()
+
+    多个客户端可以通过 session 参数共享同一个 aiohttp 会话（连接池）。
+    """
+
+    def __init__(self, *args, session: Optional['aiohttp.ClientSession'] = None, **kwargs):
+        """
+        Args:
+            *args, **kwargs: 与 IVASClient 相同
+            session: 共享的 aiohttp.ClientSession (可选，不传则自行创建)
+        """
+        _require_aiohttp()
+        super().__init__(*args, **kwargs)
+
+        self._session = session
+        self._owns_session = session is None
+        self._stats = PoolStats()
+
+        # 单飞登录锁和后台刷新任务（在事件循环中首次使用时创建）
+        self._async_login_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def session(self) -> 'aiohttp.ClientSession':
+        """aiohttp 会话，首次访问时创建"""
+        if self._session is None:
+            self._session = create_session(limit=self.pool_size, stats=self._stats)
+        return self._session
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """连接复用统计（共享会话时由 AsyncFleetRunner 统计）"""
+        return self._stats.snapshot()
+
+    async def close(self):
+        """关闭自行创建的会话"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def run(self, login: bool = True):
+        """
+        主运行循环（协程）
+
+        Args:
+            login: 启动前是否先登录（由 AsyncFleetRunner 统一登录时传 False）
+        """
+        if self.start_requested_at is None:
+            self.start_requested_at = time.monotonic()
+
+        if login and not await self.login_cached():
+            self._log('error', "初始登录失败，无法启动")
+            return
+
+        self.ticker.reset()
+
+        try:
+            while self.running:
+                self.ticker.begin()
+                self._adapt_rate()
+
+                # token 即将过期时在后台刷新
+                self._maybe_refresh()
+
+                try:
+                    poll_task = self._task_due()
+                    await self.tick(poll_task=poll_task)
+
+                except Exception as e:
+                    self._log('error', f"循环异常: {e}")
+
+                await asyncio.sleep(max(0, self.ticker.advance() - time.monotonic()))
+        finally:
+            if self._refresh_task is not None and not self._refresh_task.done():
+                self._refresh_task.cancel()
+
+    async def tick(self, poll_task: bool = False):
+        """
+        执行一次上报周期：位置 + 目标 (+ 任务轮询)（协程）
+
+        Args:
+            poll_task: 本周期是否同时轮询任务
+        """
+        ops = [self._report_position, self._report_targets]
+        if poll_task:
+            ops.append(self._poll_task)
+
+        if not self.concurrent_tick:
+            for op in ops:
+                await op()
+            return
+
+        # 并发模式：与 IVASClient._tick_concurrent 的截止时间和日志顺序规则一致
+        tasks = []
+        for op in ops:
+            name = op.__name__
+            if name in self._inflight:
+                self.tick_skips += 1
+                continue
+            self._inflight.add(name)
+            task = asyncio.create_task(self._run_buffered_async(op))
+            task.add_done_callback(lambda _, name=name: self._inflight.discard(name))
+            tasks.append(task)
+
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.tick_deadline)
+
+        for task in tasks:
+            if not task.done():
+                self.tick_overruns += 1
+                continue
+            for log_type, data in task.result():
+                self._emit(log_type, data)
+
+    async def _run_buffered_async(self, op) -> list:
+        """执行单个请求协程，日志写入缓冲区（每个 asyncio 任务拥有独立上下文）"""
+        buffer = []
+        self._log_buffer.set(buffer)
+        try:
+            await op()
+        except Exception as e:
+            self._log('error', f"循环异常: {e}")
+        return buffer
+
+    def achieved_hz(self) -> float:
+        """实际达到的上报频率 (Hz)"""
+        return self.tick_stats.achieved_hz()
+
+    async def login(self) -> bool:
+        """
+        登录 IVAS 服务器获取 token（协程）
+
+        Returns:
+            bool: 登录成功返回 True，失败返回 False
+        """
+        url = self.encoder.login_url
+        payload = {
+            'account': self.account,
+            'password': self.password
+        }
+
+        try:
+            resp = await self._fetch('POST', url, 5, {'Content-Type': 'application/json'}, data=dumps(payload))
+            if resp.status_code == 200:
+                result = resp.json()
+                if result.get('resCode') == 1:
+                    self._set_token(result['resData']['token'])
+                    self._log('info', f"[{self.account}] 登录成功")
+                    return True
+                else:
+                    self._log('error', f"[{self.account}] 登录失败: {result.get('resMsg')}")
+                    return False
+            else:
+                self._log('error', f"[{self.account}] 登录失败: HTTP {resp.status_code}")
+                return False
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self._log('error', f"[{self.account}] 登录异常: {e!r}")
+            return False
+
+    async def login_cached(self) -> bool:
+        """启动时登录（协程）：token_cache 中有仍然有效的 token 时直接使用"""
+        if self.token_cache is not None:
+            token = self.token_cache.get(self.account, self.base_url)
+            if token is not None:
+                self._set_token(token)
+                self._log('info', f"[{self.account}] 使用缓存的 token")
+                return True
+        return await self.login()
+
+    # ==================== token 刷新 ====================
+
+    async def refresh_token(self) -> bool:
+        """后台提前刷新 token（协程，与 401 重新登录共用同一把锁）"""
+        ok = await self._relogin(self.token, background=True)
+        if not ok:
+            self._refresh_at = time.monotonic() + self.REFRESH_RETRY
+        return ok
+
+    def _maybe_refresh(self):
+        """到期时创建后台刷新任务，上报循环不等待"""
+        if not self.refresh_due():
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self.refresh_token())
+
+    async def _relogin(self, stale_token: Optional[str], background: bool = False) -> bool:
+        """单飞重新登录（协程），语义与 IVASClient._relogin 相同"""
+        if self._async_login_lock is None:
+            self._async_login_lock = asyncio.Lock()
+
+        async with self._async_login_lock:
+            if self.token != stale_token:
+                if not background:
+                    self.metrics.record_coalesced()
+                return self.token is not None
+
+            if background:
+                self._log('info', f"[{self.account}] Token 即将过期，后台刷新")
+            else:
+                self._log('warning', f"[{self.account}] Token 过期，重新登录")
+            self.metrics.record_relogin(background=background)
+            return await self.login()
+
+    # ==================== HTTP 请求方法 ====================
+
+    async def _fetch(self, method: str, url: str, timeout: float, headers: dict, **kwargs) -> _Response:
+        """发送一次请求并记录指标（异常原样抛出）"""
+        endpoint = endpoint_name(url)
+        sent = len(url) + len(kwargs.get('data') or b'')
+        start = time.perf_counter()
+        try:
+            async with self.session.request(
+                method, url, headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout), **kwargs
+            ) as resp:
+                content = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            finished = time.perf_counter()
+            self.metrics.record(endpoint, 'error', finished - start, sent)
+            if self.rate_control is not None:
+                self.rate_control.observe('error', finished - start)
+            if self.spool is not None:
+                self.spool.record_result(False)
+            if self.traffic_recorder is not None:
+                self.traffic_recorder.record(endpoint, self.device_code, start, finished, 'error', url, kwargs.get('data'))
+            raise
+        finished = time.perf_counter()
+        self.metrics.record(endpoint, resp.status, finished - start, sent, len(content))
+        if self.rate_control is not None:
+            self.rate_control.observe(resp.status, finished - start)
+        if self.spool is not None:
+            self.spool.record_result(not is_failure(resp.status))
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.record(
+                endpoint, self.device_code, start, finished, resp.status, url, kwargs.get('data'), content
+            )
+        return _Response(resp.status, content)
+
+    async def _send(self, method: str, url: str, timeout: float, token: Optional[str],
+                    headers: Optional[dict] = None, **kwargs) -> _Response:
+        # 每次请求复制一份请求头：模板 (如 encoder.json_headers) 被多个协程共用，不能写入 token
+        headers = {**(headers or {}), 'token': token or ''}
+        return await self._fetch(method, url, timeout, headers, **kwargs)
+
+    async def _request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> Optional[_Response]:
+        """
+        统一的 HTTP 请求入口，自动处理 token 过期（协程）
+
+        Args:
+            method: 'GET' 或 'POST'
+            url: 请求 URL
+            timeout: 超时时间 (秒)，默认为接口的请求时间预算 (见 IVASClient.request_budget)
+            **kwargs: 传递给 aiohttp 的参数 (params / json)
+
+        Returns:
+            _Response 对象，失败、熔断中或超出请求数预算时返回 None
+        """
+        endpoint = endpoint_name(url)
+        breaker = self.breakers.get(self.base_url, endpoint) if self.breakers is not None else None
+        if breaker is not None and not breaker.allow():
+            return None
+        if self.rate_budget is not None:
+            delay = self.rate_budget.reserve()
+            if delay is None:
+                if breaker is not None:
+                    breaker.cancel()
+                return None
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        budget = timeout or self.request_budget(endpoint)
+        started = time.monotonic()
+
+        try:
+            token = self.token
+            resp = await self._send(method, url, budget, token, **kwargs)
+
+            # 处理 401 token 过期（并发的 401 只触发一次登录）
+            if resp.status_code == 401:
+                if await self._relogin(token):
+                    # 在剩余的时间预算内重试一次，预算已用完则放弃
+                    remaining = budget - (time.monotonic() - started)
+                    if remaining > 0:
+                        resp = await self._send(
+                            method, url, max(remaining, self.MIN_REQUEST_TIMEOUT), self.token, **kwargs
+                        )
+
+            if breaker is not None:
+                breaker.record(resp.status_code)
+            return resp
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if breaker is not None:
+                breaker.record('error')
+            self._log('error', f"请求异常: {e!r}")
+            return None
+
+    async def _report_position(self):
+        """上报位置数据到 IVAS 服务器 (POST with URL params)"""
+        data = self._generate_position_data()
+        url = self.encoder.position_query_url(data)
+
+        resp = await self._request('POST', url)
+
+        if resp and resp.status_code == 200:
+            if self.first_report_at is None:
+                self.first_report_at = time.monotonic()
+            if self.telemetry_store is not None:
+                self.telemetry_store.add_position(self.device_code, data)
+            data['_token'] = self.token
+            data['_account'] = self.account
+            self._log('position', data)
+        else:
+            if resp:
+                self._log('error', f"位置上报失败: HTTP {resp.status_code}")
+            if self.spool is not None and should_spool(resp):
+                self.spool.append(self.device_code, 'reportUserData', url)
+
+    async def _report_targets(self):
+        """上报目标数据到 IVAS 服务器 (POST with JSON body)"""
+        url = self.encoder.targets_url
+        data = self._generate_target_data()
+        body = self.encoder.targets_body(data)
+
+        resp = await self._request('POST', url, data=body, headers=self.encoder.json_headers)
+
+        if resp and resp.status_code == 200:
+            if self.telemetry_store is not None:
+                self.telemetry_store.add_targets(self.device_code, data)
+            self._log('targets', data)
+        else:
+            if resp:
+                self._log('error', f"目标上报失败: HTTP {resp.status_code}")
+            if self.spool is not None and should_spool(resp):
+                self.spool.append(self.device_code, 'postTarPos', url, body)
+
+    async def resend(self, record) -> bool:
+        """补发一条暂存的上报（协程，由 AsyncFleetRunner 调用），失败时重新追加到暂存队尾"""
+        if record.body is not None:
+            resp = await self._request('POST', record.url, data=record.body, headers=self.encoder.json_headers)
+        else:
+            resp = await self._request('POST', record.url)
+        if resp and resp.status_code == 200:
+            self.spool.ack()
+            return True
+        if should_spool(resp):
+            self.spool.requeue(record)
+        else:
+            self.spool.reject()
+        return False
+
+    async def _poll_task(self):
+        """从 IVAS 服务器轮询任务 (GET)"""
+        result = await self.fetch_task()
+        if result is not None:
+            self._log('task', result)
+
+    async def fetch_task(self) -> Optional[Dict[str, Any]]:
+        """请求一次任务接口（协程，见 IVASClient.fetch_task）"""
+        url = self.encoder.task_url
+
+        resp = await self._request('GET', url)
+
+        if resp and resp.status_code == 200:
+            try:
+                return resp.json()
+            except Exception as e:
+                self._log('error', f"任务解析失败: {e}")
+        elif resp:
+            self._log('error', f"任务轮询失败: HTTP {resp.status_code}")
+        return None
+
+
+class AsyncFleetRunner:
+    """异步机队运行器
+
+    在一个事件循环中运行大量 AsyncIVASClient：
+    - 相同 base_url 的客户端共享一个 aiohttp 会话（连接池）
+    - 登录并发数受限，启动可分散到 ramp_up 时间窗口内，避免启动时的登录风暴
+    - 统计每架无人机实际频率与目标频率
+    - 可选按分组统一轮询任务并按 id 分发 (task_poll，见 ivas.tasks)
+    - 可选的机队每秒请求数预算 (max_rps，见 ivas.rate)
+    - 可选的失败上报暂存，服务器恢复后在事件循环中限速补发 (spool，见 ivas.spool)
+    - 可选的按 (base_url, 接口) 熔断，整个机队共用 (circuit_breaker，见 ivas.breaker)
+
+    使用示例:
+        runner = AsyncFleetRunner(device_configs, connection_limit=512)
+        asyncio.run(runner.run(duration=60))
+        for row in runner.rates():
+            print(row)
+    """
+
+    def __init__(
+        self,
+        device_configs: List[Dict[str, Any]],
+        connection_limit: int = 256,
+        login_concurrency: int = 64,
+        ramp_up: float = 0.0,
+        token_cache: Optional[str] = None,
+        task_poll: str = DEVICE,
+        max_rps: Optional[float] = None,
+        spool: Optional[str] = None,
+        spool_rps: float = 50.0,
+        circuit_breaker: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            device_configs: 设备配置列表，每项为 AsyncIVASClient 的关键字参数
+            connection_limit: 每个 base_url 的最大并发连接数
+            login_concurrency: 同时进行的登录请求数上限
+            ramp_up: 启动时间窗口 (秒)，各无人机的启动时间在窗口内均匀错开
+            token_cache: token 缓存文件路径 (可选)，未单独配置 token_cache 的客户端共用
+            task_poll: 任务轮询方式，'device' 每架无人机各自轮询，'fleet' / 'account' 按分组统一轮询后分发
+            max_rps: 整个机队的每秒请求数上限 (可选，登录请求不计入)
+            spool: 失败上报暂存目录 (可选)，未单独配置 spool 的客户端共用，见 ivas.spool
+            spool_rps: 服务器恢复后的补发速率 (条/秒)
+            circuit_breaker: 熔断器参数 (可选)，ivas.breaker.CircuitBreaker 的关键字参数，传入空字典使用默认值
+        """
+        _require_aiohttp()
+        self.device_configs = device_configs
+        self.connection_limit = connection_limit
+        self.login_concurrency = login_concurrency
+        self.ramp_up = ramp_up
+        self.token_cache = TokenCache(token_cache) if token_cache else None
+        self.task_poll = task_poll
+        self.task_fanout: Optional[TaskFanout] = None
+        self.rate_budget = RateBudget(max_rps) if max_rps else None
+        self.spool_path = spool
+        self.spool_rps = spool_rps
+        self.spool: Optional[ReportSpool] = None
+        self.breakers = BreakerBoard(**circuit_breaker) if circuit_breaker is not None else None
+
+        self.clients: List[AsyncIVASClient] = []
+        self.pool_stats: Dict[str, PoolStats] = {}
+        self._sessions: Dict[str, 'aiohttp.ClientSession'] = {}
+        self._stop_event = None
+
+    def _session_for(self, base_url: str) -> 'aiohttp.ClientSession':
+        key = base_url.rstrip('/')
+        if key not in self._sessions:
+            stats = PoolStats()
+            self.pool_stats[key] = stats
+            self._sessions[key] = create_session(limit=self.connection_limit, stats=stats)
+        return self._sessions[key]
+
+    async def run(self, duration: Optional[float] = None):
+        """
+        登录全部客户端并运行（协程）
+
+        Args:
+            duration: 运行时长 (秒)，None 表示直到调用 stop()
+        """
+        self._stop_event = asyncio.Event()
+
+        if self.spool_path is not None:
+            self.spool = ReportSpool(self.spool_path, drain_rps=self.spool_rps)
+
+        self.clients = []
+        for cfg in self.device_configs:
+            shared = (self.token_cache, self.rate_budget, self.spool, self.breakers)
+            if any(obj is not None for obj in shared):
+                cfg = dict(cfg)
+                if self.token_cache is not None:
+                    cfg.setdefault('token_cache', self.token_cache)
+                if self.rate_budget is not None:
+                    cfg.setdefault('rate_budget', self.rate_budget)
+                if self.spool is not None:
+                    cfg.setdefault('spool', self.spool)
+                if self.breakers is not None:
+                    cfg.setdefault('breakers', self.breakers)
+            self.clients.append(AsyncIVASClient(**cfg, session=self._session_for(cfg['base_url'])))
+
+        semaphore = asyncio.Semaphore(self.login_concurrency)
+        spacing = self.ramp_up / len(self.clients) if self.clients else 0.0
+        started = time.monotonic()
+
+        async def start(client: AsyncIVASClient, index: int):
+            client.start_requested_at = started
+            if spacing > 0:
+                await asyncio.sleep(index * spacing)
+            async with semaphore:
+                ok = await client.login_cached()
+            if not ok:
+                client._log('error', "初始登录失败，无法启动")
+                return
+            await client.run(login=False)
+
+        tasks = [asyncio.create_task(start(c, i)) for i, c in enumerate(self.clients)]
+
+        if self.task_poll != DEVICE:
+            self.task_fanout = TaskFanout(self.task_poll)
+            groups: Dict[Any, List[AsyncIVASClient]] = {}
+            for client in self.clients:
+                groups.setdefault(self.task_fanout.add(client), []).append(client)
+            for key, members in groups.items():
+                interval = min(client.task_interval for client in members)
+                tasks.append(asyncio.create_task(self._poll_group(key, interval)))
+
+        spools = {id(c.spool): c.spool for c in self.clients if c.spool is not None}
+        for spool in spools.values():
+            tasks.append(asyncio.create_task(self._drain_spool(spool)))
+
+        try:
+            if duration is None:
+                await self._stop_event.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=duration)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for client in self.clients:
+                client.stop()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for session in self._sessions.values():
+                await session.close()
+            self._sessions.clear()
+            if self.token_cache is not None:
+                self.token_cache.flush()
+            for spool in spools.values():
+                spool.close()
+
+    async def _poll_group(self, key, interval: float):
+        """统一任务轮询：每个周期由组内一架已登录的无人机轮询一次，结果按 id 分发"""
+        deadline = time.monotonic()
+        while True:
+            members = self.task_fanout.members(key)
+            leader = self.task_fanout.leader(members)
+            if leader is not None:
+                started = time.monotonic()
+                try:
+                    result = await leader.fetch_task()
+                except Exception as e:
+                    leader._log('error', f"任务轮询异常: {e}")
+                    result = None
+                self.task_fanout.deliver(result, members, started)
+            deadline = max(deadline + interval, time.monotonic())
+            await asyncio.sleep(deadline - time.monotonic())
+
+    async def _drain_spool(self, spool: ReportSpool):
+        """补发暂存的上报：服务器恢复后单路串行，每条间隔 1 / drain_rps 秒，不占用实时上报的调度"""
+        interval = 1.0 / spool.drain_rps
+        deadline = last_flush = time.monotonic()
+        while True:
+            record, client = spool.next_record()
+            if record is not None:
+                try:
+                    await client.resend(record)
+                except Exception as e:
+                    client._log('error', f"补发异常: {e}")
+                    spool.requeue(record)
+            now = time.monotonic()
+            if now - last_flush >= 1.0:
+                spool.flush()
+                last_flush = now
+            deadline = max(deadline + (interval if record is not None else max(interval, 0.2)), now)
+            await asyncio.sleep(deadline - now)
+
+    def stop(self):
+        """停止运行（需在事件循环线程中调用）"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def rates(self) -> List[Dict[str, Any]]:
+        """
+        每架无人机的频率统计
+
+        Returns:
+            list: 每项包含 device_code, target_hz, achieved_hz, ticks, missed, jitter_ms 等
+        """
+        rows = []
+        for client in self.clients:
+            stats = client.timing_stats()
+            stats['device_code'] = client.device_code
+            rows.append(stats)
+        return rows
+
+    def startup_stats(self) -> Dict[str, Any]:
+        """启动耗时汇总 (见 ivas.metrics.startup_stats)"""
+        return startup_stats(self.clients)
+
+    def task_stats(self) -> Optional[Dict[str, Any]]:
+        """统一任务轮询的分发统计 (见 ivas.tasks.TaskFanout.stats)，逐架轮询时为 None"""
+        return self.task_fanout.stats() if self.task_fanout is not None else None
+
+    def budget_stats(self) -> Optional[Dict[str, Any]]:
+        """请求数预算使用情况 (见 ivas.rate.RateBudget.stats)，未设置 max_rps 时为 None"""
+        return self.rate_budget.stats() if self.rate_budget is not None else None
+
+    def spool_stats(self) -> Optional[Dict[str, Any]]:
+        """失败上报暂存统计 (见 ivas.spool.spool_stats)，未使用暂存时为 None"""
+        return spool_stats(self.clients)
+
+    def breaker_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """熔断器状态 (见 ivas.breaker.BreakerBoard.stats)，未启用熔断时为 None"""
+        return breaker_stats(self.clients)
+
+    def request_stats(self, per_device: bool = False) -> Dict[str, Any]:
+        """
+        机队请求指标
+
+        Args:
+            per_device: 为 True 时返回 {device_code: 快照}，否则返回合并后的汇总
+
+        Returns:
+            dict: 见 ivas.metrics.ClientMetrics.snapshot / merge_snapshots
+        """
+        if per_device:
+            return {client.device_code: client.request_stats() for client in self.clients}
+        return merge_snapshots(client.request_stats() for client in self.clients)
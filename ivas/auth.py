@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+IVAS token 工具模块
+
+zsLogin 返回的 token 是 JWT (HS512)，客户端不校验签名，只读取载荷中的时间字段：
+1. decode_claims: 解码载荷 (base64url JSON)，非 JWT 时返回 None
+2. token_lifetime: 根据 exp 字段（或配置的有效期 + iat）计算 token 的签发时间和过期时间
+3. TokenCache: 按 账号 + base_url 保存 token 的磁盘缓存，重启后复用仍然有效的 token
+
+接口文档中的示例 token 不含 exp 字段，此时只有配置了 token_ttl 才能提前刷新，
+否则仍依赖 401 后重新登录。
+"""
+
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+
+def decode_claims(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    解码 JWT 载荷（不校验签名）
+
+    Args:
+        token: JWT 字符串
+
+    Returns:
+        dict: 载荷字段；token 为空或不是 JWT 时返回 None
+    """
+    if not token:
+        return None
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+    segment = parts[1]
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4)))
+    except (ValueError, TypeError):
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def token_lifetime(token: Optional[str], ttl: Optional[float] = None) -> Optional[Tuple[float, float]]:
+    """
+    计算 token 的有效期（Unix 时间戳）
+
+    Args:
+        token: JWT 字符串
+        ttl: 服务器配置的 token 有效期 (秒)，token 不含 exp 时使用 iat + ttl
+
+    Returns:
+        (issued_at, expires_at)，无法确定过期时间时返回 None
+    """
+    claims = decode_claims(token) or {}
+    now = time.time()
+    issued_at = claims.get('iat', claims.get('nbf', now))
+    expires_at = claims.get('exp')
+
+    if not isinstance(issued_at, (int, float)):
+        issued_at = now
+    if not isinstance(expires_at, (int, float)):
+        if ttl is None:
+            return None
+        expires_at = issued_at + ttl
+
+    return float(issued_at), float(expires_at)
+
+
+class TokenCache:
+    """token 磁盘缓存
+
+    文件为 JSON: {"<base_url>|<account>": {"token": ..., "expires_at": ...}}，
+    只保存过期时间已知的 token。写入通过临时文件 + os.replace 原子替换，权限 0600；
+    短时间内的多次写入合并为一次（启动时成百上千架无人机同时登录）。
+
+    使用示例:
+        cache = TokenCache('tokens.json')
+        client = IVASClient(..., token_cache=cache)
+    """
+
+    def __init__(self, path: str, min_valid: float = 60.0, flush_interval: float = 1.0):
+        """
+        Args:
+            path: 缓存文件路径
+            min_valid: 剩余有效期不足该秒数的 token 不再复用
+            flush_interval: 合并写入的时间窗口 (秒)
+        """
+        self.path = os.path.abspath(path)
+        self.min_valid = min_valid
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 保证快照按顺序落盘
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._load()
+
+    @staticmethod
+    def _key(account: str, base_url: str) -> str:
+        return f"{base_url.rstrip('/')}|{account}"
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self._entries = {
+                k: v for k, v in data.items()
+                if isinstance(v, dict) and 'token' in v and isinstance(v.get('expires_at'), (int, float))
+            }
+
+    def get(self, account: str, base_url: str) -> Optional[str]:
+        """
+        取出仍然有效的 token
+
+        Returns:
+            str: 剩余有效期不少于 min_valid 的 token，否则 None
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(account, base_url))
+        if entry is None or entry['expires_at'] - time.time() < self.min_valid:
+            return None
+        return entry['token']
+
+    def put(self, account: str, base_url: str, token: str, expires_at: Optional[float]):
+        """保存 token（过期时间未知时不缓存）"""
+        if expires_at is None:
+            return
+        key = self._key(account, base_url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['token'] == token:
+                return
+            self._entries[key] = {'token': token, 'expires_at': expires_at}
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """立即写入磁盘（清理已过期的条目）"""
+        with self._write_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                now = time.time()
+                self._entries = {k: v for k, v in self._entries.items() if v['expires_at'] > now}
+                data = dict(self._entries)
+                self._dirty = False
+
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.tokens-', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
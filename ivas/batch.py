@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+IVAS 机队遥测批量生成模块
+
+用 NumPy 一次性生成整支机队的位置和目标数据：
+1. generate_positions / generate_targets: 一次向量化调用生成 N 架无人机的数据
+2. 按块预生成：客户端通过 TelemetrySlot 逐条取用。生成器一次向量化生成 pool 列、每列 block 个周期的
+   随机量 (与无人机无关的单位噪声)；每个 TelemetrySlot 有自己的游标，用完一列再领取下一列，
+   取用时按本机的基准坐标和偏移范围换算。新增、移除无人机和各机上报频率不同都不会触发整支机队重新生成
+3. 每个生成器使用独立的随机数发生器，线程之间不再争用全局 random
+
+生成的字典与 IVASClient._generate_position_data / _generate_target_data
+的字段、顺序和类型完全一致。依赖 numpy (pip install numpy)。
+"""
+
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+
+# obj_img 只有 100 种取值，预先生成避免每个目标都格式化一次字符串
+_IMG_URLS = tuple(f"http://example.com/img/{i}.jpg" for i in range(101))
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("批量生成需要 numpy，请执行: pip install numpy")
+
+
+class FleetTelemetryGenerator:
+    """机队遥测生成器
+
+    使用示例:
+        gen = FleetTelemetryGenerator.from_clients(clients)
+        positions = gen.generate_positions()   # N 个位置字典
+        targets = gen.generate_targets()       # N 个目标字典
+
+        # 或者让客户端从预生成的数据块中取用
+        for client in clients:
+            gen.attach(client)
+        gen.detach(client)                     # 移除无人机时释放
+    """
+
+    def __init__(self, block: int = 32, seed: Optional[int] = None, pool: int = 256):
+        """
+        Args:
+            block: 每架无人机一次领取的周期数
+            seed: 随机种子 (可选)
+            pool: 按块取用时每次向量化生成的列数 (可供多少次领取)
+        """
+        _require_numpy()
+        self.block = block
+        self.pool = pool
+        self.rng = np.random.default_rng(seed)
+
+        # 按容量倍增的数组保存每架无人机的参数，加入无人机时追加一行，不重建整个数组
+        self.device_codes: List[int] = []
+        self._codes = np.empty(16, dtype=np.int64)
+        self._base = np.empty((16, 3), dtype=np.float64)     # [base_lat, base_lon, base_alt]
+        self._offset = np.empty((16, 3), dtype=np.float64)   # [lat_offset, lon_offset, alt_offset]
+        self._active = np.zeros(16, dtype=bool)
+
+        self._lock = threading.Lock()
+        self._pos_pool = None
+        self._pos_next = 0
+        self._tar_pool = None
+        self._tar_next = 0
+
+    @classmethod
+    def from_clients(cls, clients, **kwargs) -> 'FleetTelemetryGenerator':
+        """根据客户端列表创建生成器（不修改客户端）"""
+        gen = cls(**kwargs)
+        for client in clients:
+            gen.add(client.device_code, client.base_lat, client.base_lon, client.base_alt, client.coord_range)
+        return gen
+
+    def add(
+        self,
+        device_code: int,
+        base_lat: float,
+        base_lon: float,
+        base_alt: float,
+        coord_range: Dict[str, float]
+    ) -> int:
+        """
+        加入一架无人机
+
+        Returns:
+            int: 该无人机的下标
+        """
+        with self._lock:
+            index = len(self.device_codes)
+            if index == len(self._codes):
+                capacity = index * 2
+                self._codes = np.resize(self._codes, capacity)
+                self._base = np.resize(self._base, (capacity, 3))
+                self._offset = np.resize(self._offset, (capacity, 3))
+                self._active = np.concatenate([self._active, np.zeros(capacity - index, dtype=bool)])
+            self.device_codes.append(device_code)
+            self._codes[index] = device_code
+            self._base[index] = (base_lat, base_lon, base_alt)
+            self._offset[index] = (coord_range['lat_offset'], coord_range['lon_offset'], coord_range['alt_offset'])
+            self._active[index] = True
+            return index
+
+    def attach(self, client) -> 'TelemetrySlot':
+        """
+        让客户端从预生成的数据块中取用遥测数据
+
+        Returns:
+            TelemetrySlot: 同时赋值给 client.telemetry
+        """
+        index = self.add(client.device_code, client.base_lat, client.base_lon, client.base_alt, client.coord_range)
+        client.telemetry = TelemetrySlot(self, index)
+        return client.telemetry
+
+    def detach(self, client):
+        """客户端不再取用（机队移除无人机时调用），之后 generate_* 也不再包含它"""
+        slot = client.telemetry
+        if not isinstance(slot, TelemetrySlot) or slot.generator is not self:
+            return
+        with self._lock:
+            self._active[slot.index] = False
+        client.telemetry = None
+
+    def __len__(self) -> int:
+        return int(self._active[:len(self.device_codes)].sum())
+
+    # ==================== 向量化生成 ====================
+
+    def _columns(self):
+        """当前机队 (不含已移除的无人机) 的 (设备编号, 基准坐标, 偏移范围)"""
+        with self._lock:
+            n = len(self.device_codes)
+            mask = self._active[:n]
+            return self._codes[:n][mask], self._base[:n][mask], self._offset[:n][mask]
+
+    def _position_noise(self, ticks: int, m: int) -> Dict[str, Any]:
+        """ticks × m 的位置随机量，坐标为 [-1, 1) 的单位噪声 (乘偏移范围后加基准坐标)"""
+        rng = self.rng
+        return {
+            'u': rng.uniform(-1.0, 1.0, size=(ticks, m, 3)),
+            'azimuth': rng.integers(0, 360, size=(ticks, m)),
+            'motion': rng.integers(0, 2, size=(ticks, m)),
+            'validCount': rng.integers(5, 13, size=(ticks, m))
+        }
+
+    def _target_noise(self, ticks: int, m: int) -> Dict[str, Any]:
+        """ticks × m 的目标随机量，目标按 (周期, 列) 顺序平铺"""
+        rng = self.rng
+        counts = rng.integers(0, 4, size=(ticks, m))
+        total = int(counts.sum())
+        starts = np.zeros(ticks * m + 1, dtype=np.int64)
+        np.cumsum(counts.ravel(), out=starts[1:])
+        return {
+            'm': m,
+            'counts': counts,
+            'starts': starts,
+            'u': rng.uniform(-1.0, 1.0, size=(total, 2)),   # [lat, lon] 单位噪声
+            'dalt': rng.uniform(-10.0, 10.0, total),
+            'id': rng.integers(1000, 10000, total),
+            'cls': rng.integers(0, 3, total),
+            'bbox': rng.uniform((0.0, 0.0, 50.0, 50.0), (1920.0, 1080.0, 200.0, 200.0), size=(total, 4)),
+            'img': rng.integers(1, 101, total)
+        }
+
+    def generate_positions(self) -> List[Dict[str, Any]]:
+        """一次向量化调用生成全部无人机的位置数据"""
+        codes, base, offset = self._columns()
+        with self._lock:
+            noise = self._position_noise(1, len(codes))
+        coords = base + noise['u'][0] * offset
+        local_time = int(time.time() * 1000)
+        return [
+            {
+                'deviceCode': code,
+                'userX': x,
+                'userY': y,
+                'userZ': z,
+                'azimuth': az,
+                'localTime': local_time,
+                'motion': motion,
+                'validCount': valid,
+                'roomId': 22,
+                'refPositionType': 0
+            }
+            for code, x, y, z, az, motion, valid in zip(
+                codes.tolist(), coords[:, 0].tolist(), coords[:, 1].tolist(), coords[:, 2].tolist(),
+                noise['azimuth'][0].tolist(), noise['motion'][0].tolist(), noise['validCount'][0].tolist()
+            )
+        ]
+
+    def generate_targets(self) -> List[Dict[str, Any]]:
+        """一次向量化调用生成全部无人机的目标数据"""
+        codes, base, offset = self._columns()
+        with self._lock:
+            noise = self._target_noise(1, len(codes))
+        counts = noise['counts'][0]
+        owner = np.repeat(np.arange(len(codes)), counts)
+        lat = base[owner, 0] + noise['u'][:, 0] * offset[owner, 0]
+        lon = base[owner, 1] + noise['u'][:, 1] * offset[owner, 1]
+        alt = base[owner, 2] + noise['dalt']
+        timestamp = int(time.time())
+        objs = [
+            {
+                'id': obj_id,
+                'cls': cls,
+                'gis': gis,
+                'bbox': bbox,
+                'obj_img': _IMG_URLS[img]
+            }
+            for obj_id, cls, gis, bbox, img in zip(
+                noise['id'].tolist(), noise['cls'].tolist(), np.stack([lon, lat, alt], axis=1).tolist(),
+                noise['bbox'].tolist(), noise['img'].tolist()
+            )
+        ]
+        starts = noise['starts'].tolist()
+        return [
+            {
+                'timestamp': timestamp,
+                'obj_cnt': count,
+                'objs': objs[starts[i]:starts[i + 1]]
+            }
+            for i, count in enumerate(counts.tolist())
+        ]
+
+    # ==================== 按块取用 ====================
+
+    @staticmethod
+    def _as_lists(noise: Dict[str, Any]) -> Dict[str, Any]:
+        """逐条取用时按下标读 Python 列表比读 NumPy 数组快得多"""
+        return {key: value.tolist() if hasattr(value, 'tolist') else value for key, value in noise.items()}
+
+    def take_positions(self):
+        """
+        领取一列位置随机量 (block 个周期)，当前的 pool 列用完时才重新生成
+
+        Returns:
+            tuple: (随机量, 列号)
+        """
+        with self._lock:
+            if self._pos_pool is None or self._pos_next >= self.pool:
+                self._pos_pool = self._as_lists(self._position_noise(self.block, self.pool))
+                self._pos_next = 0
+            col = self._pos_next
+            self._pos_next += 1
+            return self._pos_pool, col
+
+    def take_targets(self):
+        """
+        领取一列目标随机量 (block 个周期)，当前的 pool 列用完时才重新生成
+
+        Returns:
+            tuple: (随机量, 列号)
+        """
+        with self._lock:
+            if self._tar_pool is None or self._tar_next >= self.pool:
+                self._tar_pool = self._as_lists(self._target_noise(self.block, self.pool))
+                self._tar_next = 0
+            col = self._tar_next
+            self._tar_next += 1
+            return self._tar_pool, col
+
+
+class TelemetrySlot:
+    """单架无人机在 FleetTelemetryGenerator 中的取用句柄（各自的游标和数据列）"""
+
+    __slots__ = (
+        'generator', 'index', 'device_code', 'base', 'offset',
+        '_pos', '_pos_col', '_pos_row', '_tar', '_tar_col', '_tar_row'
+    )
+
+    def __init__(self, generator: FleetTelemetryGenerator, index: int):
+        self.generator = generator
+        self.index = index
+        self.device_code = generator.device_codes[index]
+        self.base = tuple(generator._base[index].tolist())
+        self.offset = tuple(generator._offset[index].tolist())
+        self._pos = self._tar = None
+        self._pos_col = self._tar_col = 0
+        self._pos_row = self._tar_row = generator.block
+
+    def position(self) -> Dict[str, Any]:
+        row = self._pos_row
+        if row >= self.generator.block:
+            self._pos, self._pos_col = self.generator.take_positions()
+            row = 0
+        self._pos_row = row + 1
+        cols, col = self._pos, self._pos_col
+
+        u = cols['u'][row][col]
+        lat, lon, alt = self.base
+        d_lat, d_lon, d_alt = self.offset
+        return {
+            'deviceCode': self.device_code,
+            'userX': lat + u[0] * d_lat,
+            'userY': lon + u[1] * d_lon,
+            'userZ': alt + u[2] * d_alt,
+            'azimuth': cols['azimuth'][row][col],
+            'localTime': int(time.time() * 1000),
+            'motion': cols['motion'][row][col],
+            'validCount': cols['validCount'][row][col],
+            'roomId': 22,
+            'refPositionType': 0
+        }
+
+    def targets(self) -> Dict[str, Any]:
+        row = self._tar_row
+        if row >= self.generator.block:
+            self._tar, self._tar_col = self.generator.take_targets()
+            row = 0
+        self._tar_row = row + 1
+        cols, col = self._tar, self._tar_col
+
+        flat = row * cols['m'] + col
+        start, end = cols['starts'][flat], cols['starts'][flat + 1]
+        us, dalt, ids, classes, bbox, img = cols['u'], cols['dalt'], cols['id'], cols['cls'], cols['bbox'], cols['img']
+        lat, lon, alt = self.base
+        d_lat, d_lon, _ = self.offset
+        return {
+            'timestamp': int(time.time()),
+            'obj_cnt': cols['counts'][row][col],
+            'objs': [
+                {
+                    'id': ids[i],
+                    'cls': classes[i],
+                    'gis': [lon + us[i][1] * d_lon, lat + us[i][0] * d_lat, alt + dalt[i]],
+                    'bbox': bbox[i],
+                    'obj_img': _IMG_URLS[img[i]]
+                }
+                for i in range(start, end)
+            ]
+        }
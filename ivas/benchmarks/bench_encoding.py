@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+请求编码微基准测试
+
+对比一次上报（位置 + 目标）在两种编码方式下的开销：
+- 旧方式: requests 对 params 字典做 urlencode，对 json 字典做 json.dumps
+- 新方式: PayloadEncoder 预编码模板 + orjson/紧凑 json
+
+分别统计 "仅编码" 和 "经过 requests.PreparedRequest" 两种口径：
+- 每次上报的耗时 (us)
+- 每次上报发送的字节数 (URL + body)
+- 每次上报的内存分配 (tracemalloc 统计的临时分配峰值字节数)
+
+用法:
+    python3 bench_encoding.py --count 20000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+import requests
+
+from ivas import IVASClient
+from ivas.encoding import JSON_BACKEND
+
+
+def make_client():
+    return IVASClient(
+        device_code=1,
+        account='ZSDX001',
+        password='',
+        base_lat=23.0,
+        base_lon=113.0,
+        base_alt=100.0,
+        coord_range={'lat_offset': 0.001, 'lon_offset': 0.001, 'alt_offset': 10.0},
+        base_url='http://localhost:5001'
+    )
+
+
+def legacy_encode(client, position, targets):
+    """旧方式仅编码部分"""
+    url = f"{client.base_url}/jk-ivas/third/controller/reportUserData?" + urlencode(position)
+    body = json.dumps(targets).encode('utf-8')
+    return len(url) + len(client.encoder.targets_url) + len(body)
+
+
+def fast_encode(client, position, targets):
+    """预编码方式仅编码部分"""
+    encoder = client.encoder
+    url = encoder.position_query_url(position)
+    body = encoder.targets_body(targets)
+    return len(url) + len(encoder.targets_url) + len(body)
+
+
+def legacy_report(client, position, targets):
+    """旧编码路径：params 字典 + json 字典"""
+    url = f"{client.base_url}/jk-ivas/third/controller/reportUserData"
+    p = requests.Request('POST', url, params=position, headers={'token': 't'}).prepare()
+    url = f"{client.base_url}/jk-ivas/non/controller/postTarPos"
+    t = requests.Request('POST', url, json=targets, headers={'token': 't'}).prepare()
+    return len(p.url) + len(t.url) + len(t.body)
+
+
+def encoded_report(client, position, targets):
+    """新编码路径：预编码模板"""
+    encoder = client.encoder
+    headers = encoder.json_headers
+    headers['token'] = 't'
+    p = requests.Request('POST', encoder.position_query_url(position), headers={'token': 't'}).prepare()
+    t = requests.Request('POST', encoder.targets_url, data=encoder.targets_body(targets), headers=headers).prepare()
+    return len(p.url) + len(t.url) + len(t.body)
+
+
+def measure(fn, client, samples):
+    """返回 (us/次, 字节/次, 峰值分配字节/次)"""
+    start = time.perf_counter()
+    total_bytes = 0
+    for position, targets in samples:
+        total_bytes += fn(client, position, targets)
+    elapsed = time.perf_counter() - start
+
+    # 分配统计单独运行，避免 tracemalloc 影响计时
+    n = min(len(samples), 2000)
+    allocated = 0
+    tracemalloc.start()
+    for position, targets in samples[:n]:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        fn(client, position, targets)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current
+    tracemalloc.stop()
+
+    count = len(samples)
+    return elapsed / count * 1e6, total_bytes / count, allocated / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="请求编码微基准测试")
+    parser.add_argument('--count', type=int, default=20000, help='上报次数')
+    args = parser.parse_args()
+
+    client = make_client()
+    samples = [(client._generate_position_data(), client._generate_target_data()) for _ in range(args.count)]
+
+    print(f"JSON 后端: {JSON_BACKEND}")
+    print(f"{'方式':<16} {'耗时(us)':>10} {'字节/次':>10} {'分配B/次':>10}")
+    cases = (
+        ('旧方式 仅编码', legacy_encode),
+        ('预编码 仅编码', fast_encode),
+        ('旧方式 +requests', legacy_report),
+        ('预编码 +requests', encoded_report)
+    )
+    for name, fn in cases:
+        us, nbytes, allocated = measure(fn, client, samples)
+        print(f"{name:<16} {us:>10.1f} {nbytes:>10.0f} {allocated:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
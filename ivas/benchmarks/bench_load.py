@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+负载基准测试
+
+按 无人机数 × 上报频率 扫描，用 IVASFleet 对本地服务器（Mock/server.py）施加负载，
+每个组合统计：
+- 每个接口的吞吐量 (请求/秒)、延迟 p50/p95/p99/max、错误率、状态码分布
+- 客户端进程 CPU 占用和内存 (RSS)
+- 实际上报频率与错过截止时间的次数
+
+结果写入 JSON，可与保存的基线比较，用于发现 ivas 版本之间的性能回退
+（吞吐下降、延迟上升或错误率上升超过容差时退出码为 1）。
+
+用法:
+    python3 bench_load.py --spawn-server --drones 10 100 500 --hz 1 5 --duration 20 --output run.json
+    python3 bench_load.py --spawn-server --baseline baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+import ivas
+from ivas import IVASClient, IVASFleet
+from ivas.encoding import JSON_BACKEND
+from ivas.ticker import _percentile
+
+
+MOCK_SERVER = Path(__file__).resolve().parents[2] / 'Mock' / 'server.py'
+
+
+# ==================== 请求计时 ====================
+
+class Recorder:
+    """按接口汇总请求延迟和结果（所有客户端共用）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = defaultdict(list)
+            self.status = defaultdict(lambda: defaultdict(int))
+            self.errors = defaultdict(int)
+
+    def record(self, endpoint: str, elapsed: float, status, ok: bool):
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            self.status[endpoint][str(status)] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, duration: float) -> dict:
+        with self._lock:
+            result = {}
+            for endpoint, samples in self.latencies.items():
+                samples = sorted(samples)
+                count = len(samples)
+                result[endpoint] = {
+                    'requests': count,
+                    'throughput': count / duration,
+                    'errors': self.errors[endpoint],
+                    'error_rate': self.errors[endpoint] / count if count else 0.0,
+                    'status': dict(self.status[endpoint]),
+                    'latency_ms': {
+                        'p50': _percentile(samples, 0.50) * 1000,
+                        'p95': _percentile(samples, 0.95) * 1000,
+                        'p99': _percentile(samples, 0.99) * 1000,
+                        'max': (samples[-1] if samples else 0.0) * 1000
+                    }
+                }
+            return result
+
+
+class TimedClient(IVASClient):
+    """记录每次请求耗时的客户端，不输出日志"""
+
+    recorder: Recorder = None
+
+    def _request(self, method, url, **kwargs):
+        endpoint = url.split('?', 1)[0].rsplit('/', 1)[-1]
+        start = time.perf_counter()
+        resp = super()._request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        status = resp.status_code if resp is not None else 'exception'
+        self.recorder.record(endpoint, elapsed, status, resp is not None and resp.status_code == 200)
+        return resp
+
+    def login(self):
+        start = time.perf_counter()
+        ok = super().login()
+        self.recorder.record('zsLogin', time.perf_counter() - start, 'ok' if ok else 'failed', ok)
+        return ok
+
+    def _emit(self, log_type, data):
+        pass
+
+
+# ==================== 进程资源 ====================
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def rss_mb() -> float:
+    """当前 RSS (MB)，读不到 /proc 时退回峰值 RSS"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return max_rss_mb()
+
+
+def max_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+# ==================== 模拟服务器 ====================
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(workers: int, password: str):
+    """启动 Mock/server.py，返回 (进程, base_url)"""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, str(MOCK_SERVER), '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--password', password, '--task-mode', 'none'],
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{base_url}/mock/stats", timeout=0.5)
+            return proc, base_url
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("模拟服务器启动超时")
+
+
+# ==================== 负载运行 ====================
+
+def build_configs(count, report_hz, args):
+    return [
+        {
+            'device_code': i + 1,
+            'account': f"ZSDX{i + 1:03d}",
+            'password': args.password,
+            'base_lat': 23.0 + (i % 100) * 0.001,
+            'base_lon': 113.0 + (i // 100) * 0.001,
+            'base_alt': 100.0,
+            'coord_range': {'lat_offset': 0.001, 'lon_offset': 0.001, 'alt_offset': 10.0},
+            'base_url': args.base_url,
+            'report_hz': report_hz,
+            'task_hz': args.task_hz,
+            'share_pool': True,
+            'pool_size': args.pool_size
+        }
+        for i in range(count)
+    ]
+
+
+def run_case(count, report_hz, args) -> dict:
+    """运行一个 (无人机数, 频率) 组合，预热后统计 duration 秒"""
+    recorder = Recorder()
+    client_class = type('TimedClient', (TimedClient,), {'recorder': recorder})
+    fleet = IVASFleet(build_configs(count, report_hz, args), max_workers=args.max_workers, client_class=client_class)
+
+    fleet.start()
+    time.sleep(args.warmup)
+
+    recorder.reset()
+    ticks_before = {code: c.tick_stats.ticks for code, c in fleet.clients.items()}
+    missed_before = sum(c.tick_stats.missed for c in fleet.clients.values())
+    cpu_before = cpu_seconds()
+    start = time.monotonic()
+
+    time.sleep(args.duration)
+
+    elapsed = time.monotonic() - start
+    cpu = cpu_seconds() - cpu_before
+    endpoints = recorder.summary(elapsed)
+    ticks = sum(c.tick_stats.ticks - ticks_before[code] for code, c in fleet.clients.items())
+    missed = sum(c.tick_stats.missed for c in fleet.clients.values()) - missed_before
+    rss = rss_mb()
+
+    fleet.shutdown()
+
+    return {
+        'drones': count,
+        'report_hz': report_hz,
+        'duration': elapsed,
+        'target_rps': count * (2 * report_hz + args.task_hz),
+        'achieved_hz': ticks / elapsed / count if count else 0.0,
+        'missed_deadlines': missed,
+        'endpoints': endpoints,
+        'client': {
+            'cpu_percent': cpu / elapsed * 100,
+            'rss_mb': rss,
+            'max_rss_mb': max_rss_mb()
+        }
+    }
+
+
+# ==================== 基线比较 ====================
+
+def compare(result: dict, baseline: dict, tolerance: float, min_latency_ms: float) -> list:
+    """
+    与基线比较，返回回退项列表
+
+    - 吞吐量下降超过 tolerance
+    - p95 / p99 延迟上升超过 tolerance（且绝对差值大于 min_latency_ms）
+    - 错误率上升超过 1 个百分点
+    """
+    base_cases = {(c['drones'], c['report_hz']): c for c in baseline.get('cases', [])}
+    regressions = []
+
+    for case in result['cases']:
+        key = (case['drones'], case['report_hz'])
+        base = base_cases.get(key)
+        if base is None:
+            continue
+        for endpoint, cur in case['endpoints'].items():
+            old = base['endpoints'].get(endpoint)
+            if old is None or endpoint == 'zsLogin':
+                continue
+            label = f"{key[0]} 架 × {key[1]} Hz {endpoint}"
+
+            if cur['throughput'] < old['throughput'] * (1 - tolerance):
+                regressions.append(f"{label} 吞吐量 {old['throughput']:.1f} → {cur['throughput']:.1f} 请求/秒")
+
+            for q in ('p95', 'p99'):
+                before, after = old['latency_ms'][q], cur['latency_ms'][q]
+                if after > before * (1 + tolerance) and after - before > min_latency_ms:
+                    regressions.append(f"{label} {q} 延迟 {before:.2f} → {after:.2f} ms")
+
+            if cur['error_rate'] > old['error_rate'] + 0.01:
+                regressions.append(f"{label} 错误率 {old['error_rate']:.2%} → {cur['error_rate']:.2%}")
+
+    return regressions
+
+
+# ==================== 输出 ====================
+
+def print_case(case):
+    client = case['client']
+    print(
+        f"\n{case['drones']} 架 × {case['report_hz']} Hz  "
+        f"实际频率 {case['achieved_hz']:.2f} Hz  错过截止 {case['missed_deadlines']}  "
+        f"CPU {client['cpu_percent']:.0f}%  RSS {client['rss_mb']:.0f} MB"
+    )
+    print(f"  {'接口':<16} {'请求/秒':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'错误率':>8}")
+    for endpoint, stats in sorted(case['endpoints'].items()):
+        lat = stats['latency_ms']
+        print(
+            f"  {endpoint:<16} {stats['throughput']:>9.1f} {lat['p50']:>8.2f} {lat['p95']:>8.2f} "
+            f"{lat['p99']:>8.2f} {lat['max']:>8.2f} {stats['error_rate']:>8.2%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVAS 负载基准测试")
+    parser.add_argument('--base-url', default='http://localhost:5001', help='服务器地址')
+    parser.add_argument('--spawn-server', action='store_true', help='自动启动 Mock/server.py')
+    parser.add_argument('--server-workers', type=int, default=1, help='自动启动时服务器的工作进程数')
+    parser.add_argument('--password', default='000000', help='登录密码')
+    parser.add_argument('--drones', type=int, nargs='+', default=[10, 100], help='无人机数量')
+    parser.add_argument('--hz', type=float, nargs='+', default=[1.0, 5.0], help='上报频率 (Hz)')
+    parser.add_argument('--task-hz', type=float, default=0.2, help='任务轮询频率 (Hz)')
+    parser.add_argument('--duration', type=float, default=10.0, help='每个组合的统计时长 (秒)')
+    parser.add_argument('--warmup', type=float, default=2.0, help='每个组合的预热时长 (秒)')
+    parser.add_argument('--max-workers', type=int, default=32, help='IVASFleet 工作线程数')
+    parser.add_argument('--pool-size', type=int, default=32, help='共享连接池大小')
+    parser.add_argument('--output', help='结果 JSON 文件')
+    parser.add_argument('--baseline', help='基线 JSON 文件，与本次结果比较')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的相对变化 (默认 20%%)')
+    parser.add_argument('--min-latency-ms', type=float, default=1.0, help='延迟回退的最小绝对差值 (ms)')
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        server, args.base_url = spawn_server(args.server_workers, args.password)
+
+    result = {
+        'meta': {
+            'ivas_version': ivas.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'json_backend': JSON_BACKEND,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'base_url': args.base_url,
+            'spawned_server_workers': args.server_workers if args.spawn_server else None,
+            'duration': args.duration,
+            'max_workers': args.max_workers
+        },
+        'cases': []
+    }
+
+    try:
+        for count in args.drones:
+            for hz in args.hz:
+                case = run_case(count, hz, args)
+                result['cases'].append(case)
+                print_case(case)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance, args.min_latency_ms)
+        if regressions:
+            print(f"\n与基线 {args.baseline} 相比发现 {len(regressions)} 项回退:")
+            for item in regressions:
+                print(f"  - {item}")
+            sys.exit(1)
+        print(f"\n与基线 {args.baseline} 相比无回退 (容差 {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
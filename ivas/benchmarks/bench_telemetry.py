@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+遥测生成基准测试
+
+对比两种方式生成一个周期（N 架无人机各一条位置 + 目标数据）的耗时：
+- 逐架生成: IVASClient._generate_position_data / _generate_target_data
+- 批量生成: FleetTelemetryGenerator.generate_positions / generate_targets
+- 按块取用: FleetTelemetryGenerator.attach 后逐架调用（每 block 个周期向量化一次）
+
+用法:
+    python3 bench_telemetry.py
+    python3 bench_telemetry.py --sizes 100 1000 10000 --repeat 20
+"""
+
+import argparse
+import time
+
+from ivas import IVASClient
+from ivas.batch import FleetTelemetryGenerator
+
+
+def make_clients(n):
+    """创建 n 个不联网的客户端，仅用于生成数据"""
+    return [
+        IVASClient(
+            device_code=i,
+            account=f"ZSDX{i:03d}",
+            password='',
+            base_lat=23.0 + (i % 100) * 0.001,
+            base_lon=113.0 + (i // 100) * 0.001,
+            base_alt=100.0,
+            coord_range={'lat_offset': 0.001, 'lon_offset': 0.001, 'alt_offset': 10.0},
+            base_url='http://localhost:5001'
+        )
+        for i in range(n)
+    ]
+
+
+def best_of(fn, repeat):
+    """多次运行取最短耗时 (秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(n, repeat, block):
+    clients = make_clients(n)
+
+    def per_drone():
+        for c in clients:
+            c._generate_position_data()
+            c._generate_target_data()
+
+    gen = FleetTelemetryGenerator.from_clients(clients)
+
+    def batch():
+        gen.generate_positions()
+        gen.generate_targets()
+
+    block_clients = make_clients(n)
+    block_gen = FleetTelemetryGenerator(block=block)
+    for c in block_clients:
+        block_gen.attach(c)
+
+    def blocked():
+        for c in block_clients:
+            c._generate_position_data()
+            c._generate_target_data()
+
+    return best_of(per_drone, repeat), best_of(batch, repeat), best_of(blocked, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="遥测生成基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='机队规模')
+    parser.add_argument('--repeat', type=int, default=10, help='每项重复次数（取最短）')
+    parser.add_argument('--block', type=int, default=32, help='按块取用时的块大小')
+    args = parser.parse_args()
+
+    print(f"{'无人机数':>8} {'逐架(ms)':>10} {'批量(ms)':>10} {'按块(ms)':>10} {'批量加速':>8} {'按块加速':>8}")
+    for n in args.sizes:
+        per_drone, batch, blocked = bench(n, args.repeat, args.block)
+        print(
+            f"{n:>8} {per_drone * 1000:>10.2f} {batch * 1000:>10.2f} {blocked * 1000:>10.2f} "
+            f"{per_drone / batch:>7.1f}x {per_drone / blocked:>7.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
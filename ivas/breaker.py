@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+IVAS 熔断器模块
+
+服务器故障时每架无人机的每个请求都要等到超时才失败，上报周期被拖慢，恢复瞬间又有积压的
+请求一起涌入。熔断器按 (base_url, 接口) 统计连续失败：
+1. closed (正常)：请求照常发送，连续 failure_threshold 次失败 (请求异常、5xx、429) 后打开
+2. open (熔断)：请求不再发送、立即失败，计入 short_circuited；reset_timeout 秒后进入半开
+3. half_open (半开)：每 probe_interval 秒只放行一个探测请求 (涓流)，其余请求仍然立即失败；
+   连续 probe_successes 次探测成功后恢复 closed，任一探测失败重新 open
+4. 统计每个熔断器的状态、打开次数、被拦截的请求数和探测数
+
+同一 base_url 的全部无人机共用熔断器 (BreakerBoard 由机队创建后注入各客户端)，
+一架无人机发现服务器故障后整个机队立即停止发送。
+
+使用示例:
+    fleet = IVASFleet(device_configs, circuit_breaker={'failure_threshold': 5, 'reset_timeout': 5})
+    fleet.breaker_stats()
+    # [{'base_url': 'http://localhost:5001', 'endpoint': 'reportUserData', 'state': 'open',
+    #   'trips': 1, 'short_circuited': 5230, 'probes': 3, ...}, ...]
+"""
+
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 指标中的状态编号
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def is_failure(status) -> bool:
+    """
+    请求异常 ('error')、5xx 和 429 视为服务器故障，其他状态码说明服务器仍在响应
+
+    熔断器、AdaptiveRate 的拥塞判断和补发队列的健康判断共用这一条规则
+    """
+    return status == 'error' or status == 429 or (isinstance(status, int) and status >= 500)
+
+
+class CircuitBreaker:
+    """单个 (base_url, 接口) 的熔断器（线程安全）"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 5.0,
+        probe_interval: float = 1.0,
+        probe_successes: int = 2
+    ):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多少秒进入半开
+            probe_interval: 半开状态下每隔多少秒放行一个探测请求
+            probe_successes: 半开状态下连续多少次探测成功后关闭
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_interval = probe_interval
+        self.probe_successes = probe_successes
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._failures = 0        # 连续失败次数
+        self._successes = 0       # 半开状态下连续成功的探测数
+        self._opened_at = 0.0
+        self._next_probe = 0.0
+
+        self.trips = 0            # 打开次数
+        self.short_circuited = 0  # 被拦截、立即失败的请求数
+        self.probes = 0           # 半开状态下放行的探测请求数
+
+    def allow(self) -> bool:
+        """请求发送前调用，False 表示熔断中，请求应立即失败"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    self.short_circuited += 1
+                    return False
+                self.state = HALF_OPEN
+                self._successes = 0
+                self._next_probe = now
+            if now >= self._next_probe:
+                self._next_probe = now + self.probe_interval
+                self.probes += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def cancel(self):
+        """allow() 放行后请求没有发送 (例如被请求数预算拒绝) 时调用：半开状态下归还探测名额"""
+        with self._lock:
+            if self.state == HALF_OPEN and self.probes > 0:
+                self._next_probe = time.monotonic()
+                self.probes -= 1
+
+    def record(self, status):
+        """
+        请求完成后调用
+
+        Args:
+            status: HTTP 状态码，请求异常时为 'error'
+        """
+        with self._lock:
+            if is_failure(status):
+                self._failures += 1
+                if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                    self._trip()
+            else:
+                self._failures = 0
+                if self.state == HALF_OPEN:
+                    self._successes += 1
+                    if self._successes >= self.probe_successes:
+                        self.state = CLOSED
+
+    def _trip(self):
+        """打开熔断器（调用方需持有锁）"""
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        熔断器状态
+
+        Returns:
+            dict: state, trips, short_circuited, probes, failures (当前连续失败次数)
+        """
+        with self._lock:
+            return {
+                'state': self.state,
+                'trips': self.trips,
+                'short_circuited': self.short_circuited,
+                'probes': self.probes,
+                'failures': self._failures
+            }
+
+
+class BreakerBoard:
+    """按 (base_url, 接口) 创建和查找熔断器，整个机队共用一个实例"""
+
+    def __init__(self, **options):
+        """
+        Args:
+            **options: CircuitBreaker 的关键字参数
+                       (failure_threshold / reset_timeout / probe_interval / probe_successes)
+        """
+        CircuitBreaker(**options)  # 提前检查参数
+        self.options = options
+        self._lock = threading.Lock()
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, base_url: str, endpoint: str) -> CircuitBreaker:
+        """获取 (base_url, endpoint) 的熔断器，不存在时创建"""
+        key = (base_url.rstrip('/'), endpoint)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = self._breakers[key] = CircuitBreaker(**self.options)
+        return breaker
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        全部熔断器的状态
+
+        Returns:
+            list: 每项为 CircuitBreaker.stats() 加上 base_url, endpoint
+        """
+        with self._lock:
+            items = sorted(self._breakers.items())
+        return [{'base_url': base_url, 'endpoint': endpoint, **breaker.stats()}
+                for (base_url, endpoint), breaker in items]
+
+
+def merge_breaker_stats(rows: Iterable[Optional[List[Dict[str, Any]]]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    合并多个 BreakerBoard 的统计（多进程分片时使用）：计数相加，状态取最严重的
+
+    Returns:
+        list: 与 BreakerBoard.stats() 相同的格式，没有统计时为 None
+    """
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    found = False
+    for board in rows:
+        if board is None:
+            continue
+        found = True
+        for row in board:
+            key = (row['base_url'], row['endpoint'])
+            total = merged.get(key)
+            if total is None:
+                merged[key] = dict(row)
+                continue
+            for name in ('trips', 'short_circuited', 'probes', 'failures'):
+                total[name] += row[name]
+            if STATE_CODES[row['state']] > STATE_CODES[total['state']]:
+                total['state'] = row['state']
+    return [merged[key] for key in sorted(merged)] if found else None
+
+
+def breaker_stats(clients: List[Any]) -> Optional[List[Dict[str, Any]]]:
+    """机队使用的熔断器的合并统计（通常整个机队共用一个 BreakerBoard），没有时为 None"""
+    boards = {id(c.breakers): c.breakers for c in clients if getattr(c, 'breakers', None) is not None}
+    return merge_breaker_stats(board.stats() for board in boards.values())
@@ -6,13 +6,30 @@ IVAS 无人机客户端核心模块
 1. 位置数据上报
 2. 目标检测数据上报
 3. 任务轮询
-4. 自动 token 管理
+4. 自动 token 管理（过期前后台刷新，并发重新登录合并为一次）
+5. 按接口的请求计数与延迟直方图
+6. 可选的自适应上报频率 (AIMD) 和机队共享的请求数预算 (见 ivas.rate)
+7. 可选的失败上报暂存与补发 (见 ivas.spool)
+8. 按接口的请求时间预算 (由周期截止时间推导) 和可选的熔断器 (见 ivas.breaker)
 """
 
+import queue
 import requests
 import time
 import random
-from typing import Dict, Any, Optional
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Optional, List, Callable
+
+from .session import HTTPPool
+from .ticker import Ticker, TickStats, SKIP
+from .encoding import PayloadEncoder, dumps
+from .metrics import ClientMetrics, endpoint_name
+from .auth import token_lifetime
+from .rate import AdaptiveRate
+from .spool import should_spool
+from .breaker import is_failure
 
 
 class IVASClient:
@@ -24,13 +41,24 @@ class IVASClient:
 
     特性：
     - 自动登录和 token 管理
-    - 自动处理 token 过期重新登录
+    - 自动处理 token 过期重新登录，JWT 过期前在后台提前刷新
     - 随机数据生成
     - 可配置的上报频率
+    - keep-alive 连接池复用（可按 base_url 共享）
+    - 内置请求指标 (见 request_stats)
     """
 
     TARGET_TYPES = ["person", "vehicle", "aircraft"]  # 0:人, 1:车, 2:飞机
 
+    REFRESH_RETRY = 5.0  # 后台刷新失败后的重试间隔 (秒)
+
+    # 请求时间预算的上下限 (秒)：上限即原来固定的 3 秒超时
+    MIN_REQUEST_TIMEOUT = 0.1
+    MAX_REQUEST_TIMEOUT = 3.0
+
+    # 并发 tick 时收集日志的缓冲区（线程池线程和 asyncio 任务各自独立）
+    _log_buffer: contextvars.ContextVar = contextvars.ContextVar('ivas_log_buffer', default=None)
+
     def __init__(
         self,
         device_code: int,
@@ -43,7 +71,24 @@ class IVASClient:
         base_url: str,
         display_queue=None,
         report_hz: float = 1.0,
-        task_hz: float = 0.2
+        task_hz: float = 0.2,
+        pool_size: int = 4,
+        share_pool: bool = False,
+        concurrent_tick: bool = False,
+        tick_deadline: Optional[float] = None,
+        tick_executor: Optional[ThreadPoolExecutor] = None,
+        tick_policy: str = SKIP,
+        token_ttl: Optional[float] = None,
+        refresh_margin: float = 30.0,
+        token_cache=None,
+        quiet: bool = False,
+        traffic_recorder=None,
+        telemetry_store=None,
+        adaptive_rate: Optional[Dict[str, Any]] = None,
+        rate_budget=None,
+        spool=None,
+        request_budgets: Optional[Dict[str, float]] = None,
+        breakers=None
     ):
         """
         初始化 IVAS 客户端
@@ -57,9 +102,30 @@ class IVASClient:
             base_alt: 基准海拔高度
             coord_range: 坐标随机范围，字典包含 lat_offset, lon_offset, alt_offset
             base_url: IVAS 服务器地址 (例如: http://localhost:5001)
-            display_queue: 可视化队列 (可选)
+            display_queue: 可视化队列 (可选)，推荐 ivas.mailbox.Mailbox；写入不阻塞，有界 queue.Queue 已满时丢弃
             report_hz: 位置和目标上报频率 (Hz)
             task_hz: 任务轮询频率 (Hz)
+            pool_size: HTTP 连接池大小 (每个主机保持的 keep-alive 连接数)
+            share_pool: 是否与相同 base_url 的其他客户端共享连接池
+            concurrent_tick: 一个周期内的位置、目标、任务请求是否并发发送
+            tick_deadline: 并发模式下每个周期的截止时间 (秒)，默认等于上报周期
+            tick_executor: 并发模式使用的线程池 (可选，不传则自行创建 3 个线程)
+            tick_policy: 错过截止时间时的策略，'skip' 跳过积压周期，'catchup' 连续补发
+            token_ttl: token 有效期 (秒)，仅在 token 不含 exp 字段时使用；都没有时只在 401 后重新登录
+            refresh_margin: 过期前多少秒开始后台刷新（不超过有效期的 20%）
+            token_cache: ivas.auth.TokenCache (可选)，启动时复用仍然有效的 token，登录后写入
+            quiet: 无头模式，不输出逐条日志（结果只计入请求指标，见 ivas.summary）
+            traffic_recorder: ivas.traffic.TrafficRecorder (可选)，把发出的请求写入流量日志
+            telemetry_store: ivas.store.TelemetryWriter (可选)，把上报成功的位置和目标数据写入列式存储
+            adaptive_rate: 自适应频率参数 (可选)，ivas.rate.AdaptiveRate 的关键字参数
+                           (min_hz / max_hz / latency_ms / increase / decrease / period)，
+                           按延迟和错误调整上报频率，任务轮询频率按同样比例调整
+            rate_budget: ivas.rate.RateBudget (可选)，机队共享的每秒请求数预算
+            spool: ivas.spool.ReportSpool (可选)，位置和目标上报失败 (请求异常、超出请求数预算、
+                   401/429/5xx) 时暂存到磁盘，服务器恢复后补发
+            request_budgets: 按接口名覆盖请求时间预算 (秒)，例如 {'postTarPos': 0.5}，
+                             未配置的接口由周期截止时间推导 (见 request_budget)
+            breakers: ivas.breaker.BreakerBoard (可选)，按 (base_url, 接口) 熔断，服务器故障时请求立即失败
         """
         self.device_code = device_code
         self.account = account
@@ -70,48 +136,259 @@ class IVASClient:
         self.coord_range = coord_range
 
         self.base_url = base_url
+        self.encoder = PayloadEncoder(base_url, device_code)  # 预编码的 URL 和请求模板
         self.token = None  # 登录后的 token
         self.queue = display_queue
+        self.quiet = quiet
+        self.traffic_recorder = traffic_recorder
+        self.telemetry_store = telemetry_store
+
+        # token 过期管理
+        self.token_ttl = token_ttl
+        self.refresh_margin = refresh_margin
+        self.token_expires_at = None   # token 过期时间 (Unix 时间戳)，未知时为 None
+        self._refresh_at = None        # 计划刷新时间 (time.monotonic())
+        self._login_lock = threading.Lock()
+        self._refresh_thread = None
+        self.token_cache = token_cache
+
+        # 启动耗时：请求启动的时间 → 第一次位置上报成功的时间 (time.monotonic())
+        self.start_requested_at = None
+        self.first_report_at = None
+
+        # 持久化连接池，避免每次请求新建 TCP 连接（首次请求时创建）
+        self.pool_size = pool_size
+        self.share_pool = share_pool
+        self._pool = None
 
         self.report_interval = 1.0 / report_hz
         self.task_interval = 1.0 / task_hz
 
+        # 自适应频率：report_hz 为初始频率，实际频率由控制器在 [min_hz, max_hz] 内调整
+        self.base_hz = report_hz
+        self._base_task_interval = self.task_interval
+        self.rate_control = AdaptiveRate(report_hz, **adaptive_rate) if adaptive_rate else None
+        self.rate_budget = rate_budget
+        self.request_budgets = dict(request_budgets or {})
+        self.breakers = breakers
+
+        # 失败上报暂存：登记后由暂存队列按 device_code 找到本客户端补发
+        self.spool = spool
+        if spool is not None:
+            spool.register(self)
+
         self.running = True
-        self.last_task_time = 0
+        self.last_task_time = None
+        # 机队统一轮询任务并按 id 分发时为 False (见 ivas.tasks)，客户端不再自行轮询
+        self.poll_tasks = True
+
+        # 批量遥测句柄 (见 ivas.batch.FleetTelemetryGenerator.attach)，None 时逐条随机生成
+        self.telemetry = None
+
+        # 单调时钟截止时间调度 + 频率/抖动统计
+        self.tick_stats = TickStats(self.report_interval)
+        self.ticker = Ticker(self.report_interval, policy=tick_policy, stats=self.tick_stats)
+
+        # 周期内并发发送
+        self.concurrent_tick = concurrent_tick
+        self.tick_deadline = tick_deadline if tick_deadline is not None else self.report_interval
+        self._tick_deadline_auto = tick_deadline is None
+        self.tick_executor = tick_executor
+        self.tick_overruns = 0   # 截止时间到达时仍未完成的请求数
+        self.tick_skips = 0      # 因上一周期同类请求未完成而跳过的请求数
+        self._inflight = set()
+        self._inflight_lock = threading.Lock()
+
+        # 按接口的请求计数、延迟直方图和字节数
+        self.metrics = ClientMetrics()
 
     def run(self):
         """主运行循环 - 一个线程处理所有频率的任务"""
-        # 启动前先登录获取 token
-        if not self.login():
+        if self.start_requested_at is None:
+            self.start_requested_at = time.monotonic()
+
+        # 启动前先登录获取 token（优先使用缓存）
+        if not self.login_cached():
             self._log('error', "初始登录失败，无法启动")
             return
 
+        self.ticker.reset()
+
         while self.running:
-            loop_start = time.time()
+            self.ticker.begin()
+            self._adapt_rate()
 
-            try:
-                # 每次循环都发送位置和目标数据
-                self._report_position()
-                self._report_targets()
+            # token 即将过期时在后台刷新
+            self._maybe_refresh()
 
+            try:
                 # 检查是否需要轮询任务
-                now = time.time()
-                if now - self.last_task_time >= self.task_interval:
-                    self._poll_task()
-                    self.last_task_time = now
+                poll_task = self._task_due()
+
+                # 每次循环都发送位置和目标数据
+                self.tick(poll_task=poll_task)
 
             except Exception as e:
                 self._log('error', f"循环异常: {e}")
 
-            # 精确睡眠，保持频率
-            elapsed = time.time() - loop_start
-            sleep_time = max(0, self.report_interval - elapsed)
-            time.sleep(sleep_time)
+            # 睡眠到下一个截止时间，保持频率
+            self.ticker.sleep()
+
+    def _task_due(self) -> bool:
+        """判断是否到了任务轮询时间（单调时钟）"""
+        if not self.poll_tasks:
+            return False
+        now = time.monotonic()
+        if self.last_task_time is None or now - self.last_task_time >= self.task_interval:
+            self.last_task_time = now
+            return True
+        return False
+
+    def _adapt_rate(self):
+        """自适应模式下在周期开始时调用：按控制器的结果调整上报和任务轮询周期"""
+        if self.rate_control is None:
+            return
+        hz = self.rate_control.update()
+        if hz is None:
+            return
+        self.report_interval = 1.0 / hz
+        self.task_interval = self._base_task_interval * self.base_hz / hz
+        if self._tick_deadline_auto:
+            self.tick_deadline = self.report_interval
+        self.ticker.set_interval(self.report_interval)
+
+    def effective_hz(self) -> float:
+        """当前上报频率 (Hz)，自适应模式下随服务器延迟和错误变化"""
+        return 1.0 / self.report_interval
+
+    def time_to_first_report(self) -> Optional[float]:
+        """从请求启动到第一次位置上报成功的秒数，尚未上报时为 None"""
+        if self.start_requested_at is None or self.first_report_at is None:
+            return None
+        return self.first_report_at - self.start_requested_at
+
+    def timing_stats(self) -> Dict[str, Any]:
+        """
+        周期调度统计
+
+        Returns:
+            dict: target_hz (当前有效频率), achieved_hz, ticks, missed (错过截止时间次数), skipped,
+                  jitter_ms (p50/p95/p99/max), tick_overruns, tick_skips,
+                  base_hz (配置的频率), rate (自适应模式下的控制器状态，见 AdaptiveRate.stats)
+        """
+        stats = self.tick_stats.snapshot()
+        stats['tick_overruns'] = self.tick_overruns
+        stats['tick_skips'] = self.tick_skips
+        stats['base_hz'] = self.base_hz
+        if self.rate_control is not None:
+            stats['rate'] = self.rate_control.stats()
+        return stats
+
+    def request_stats(self) -> Dict[str, Any]:
+        """
+        请求指标快照
+
+        Returns:
+            dict: 见 ivas.metrics.ClientMetrics.snapshot
+        """
+        return self.metrics.snapshot()
+
+    def tick(self, poll_task: bool = False):
+        """
+        执行一次上报周期：位置 + 目标 (+ 任务轮询)
+
+        Args:
+            poll_task: 本周期是否同时轮询任务
+        """
+        ops = [self._report_position, self._report_targets]
+        if poll_task:
+            ops.append(self._poll_task)
+
+        if self.concurrent_tick:
+            self._tick_concurrent(ops)
+        else:
+            for op in ops:
+                op()
+
+    def _tick_concurrent(self, ops: List[Callable]):
+        """
+        并发执行一个周期内的请求
+
+        - 截止时间到达时仍未完成的请求计入 tick_overruns，不再等待
+        - 上一周期同类请求仍未完成时跳过本次，计入 tick_skips
+        - 已完成请求的日志按 位置 → 目标 → 任务 的固定顺序输出
+        """
+        if self.tick_executor is None:
+            self.tick_executor = ThreadPoolExecutor(
+                max_workers=3, thread_name_prefix=f"IVAS-{self.device_code}"
+            )
+
+        deadline = time.monotonic() + self.tick_deadline
+        futures = []
+        for op in ops:
+            name = op.__name__
+            with self._inflight_lock:
+                if name in self._inflight:
+                    self.tick_skips += 1
+                    continue
+                self._inflight.add(name)
+            future = self.tick_executor.submit(self._run_buffered, op)
+            future.add_done_callback(lambda _, name=name: self._finish_inflight(name))
+            futures.append(future)
+
+        wait(futures, timeout=max(0, deadline - time.monotonic()))
+
+        for future in futures:
+            if not future.done():
+                self.tick_overruns += 1
+                continue
+            for log_type, data in future.result():
+                self._emit(log_type, data)
+
+    def _run_buffered(self, op: Callable) -> list:
+        """执行单个请求，日志写入缓冲区而不是直接输出"""
+        buffer = []
+        token = self._log_buffer.set(buffer)
+        try:
+            op()
+        except Exception as e:
+            self._log('error', f"循环异常: {e}")
+        finally:
+            self._log_buffer.reset(token)
+        return buffer
+
+    def _finish_inflight(self, name: str):
+        with self._inflight_lock:
+            self._inflight.discard(name)
 
     def stop(self):
         """停止运行"""
         self.running = False
 
+    @property
+    def pool(self) -> HTTPPool:
+        """HTTP 连接池，首次访问时创建"""
+        if self._pool is None:
+            if self.share_pool:
+                self._pool = HTTPPool.shared(self.base_url, self.pool_size)
+            else:
+                self._pool = HTTPPool(pool_size=self.pool_size)
+        return self._pool
+
+    @property
+    def session(self):
+        """连接池对应的 requests.Session"""
+        return self.pool.session
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        连接池复用统计
+
+        Returns:
+            dict: hits (复用连接次数), misses (新建连接次数), hit_rate
+        """
+        return self.pool.stats()
+
     def login(self) -> bool:
         """
         登录 IVAS 服务器获取 token
@@ -119,18 +396,18 @@ class IVASClient:
         Returns:
             bool: 登录成功返回 True，失败返回 False
         """
-        url = f"{self.base_url}/jk-ivas/third/controller/zsLogin"
+        url = self.encoder.login_url
         payload = {
             'account': self.account,
             'password': self.password
         }
 
         try:
-            resp = requests.post(url, json=payload, timeout=5)
+            resp = self._send('POST', url, data=dumps(payload), headers={'Content-Type': 'application/json'}, timeout=5)
             if resp.status_code == 200:
                 result = resp.json()
                 if result.get('resCode') == 1:
-                    self.token = result['resData']['token']
+                    self._set_token(result['resData']['token'])
                     self._log('info', f"[{self.account}] 登录成功")
                     return True
                 else:
@@ -144,10 +421,103 @@ class IVASClient:
             self._log('error', f"[{self.account}] 登录异常: {e}")
             return False
 
+    def login_cached(self) -> bool:
+        """
+        启动时登录：token_cache 中有仍然有效的 token 时直接使用，否则调用 login()
+
+        Returns:
+            bool: 获得 token 返回 True
+        """
+        if self.token_cache is not None:
+            token = self.token_cache.get(self.account, self.base_url)
+            if token is not None:
+                self._set_token(token)
+                self._log('info', f"[{self.account}] 使用缓存的 token")
+                return True
+        return self.login()
+
+    # ==================== token 刷新 ====================
+
+    def _set_token(self, token: str):
+        """保存新 token，并根据过期时间安排提前刷新"""
+        self.token = token
+        lifetime = token_lifetime(token, self.token_ttl)
+        if lifetime is None:
+            self.token_expires_at = None
+            self._refresh_at = None
+            return
+
+        issued_at, expires_at = lifetime
+        self.token_expires_at = expires_at
+        if self.token_cache is not None:
+            self.token_cache.put(self.account, self.base_url, token, expires_at)
+        # 有效期很短时按比例缩小提前量，避免刚登录就进入刷新
+        margin = min(self.refresh_margin, max(0.0, expires_at - issued_at) * 0.2)
+        self._refresh_at = time.monotonic() + (expires_at - time.time()) - margin
+
+    def refresh_deadline(self) -> Optional[float]:
+        """计划的后台刷新时间 (time.monotonic())，token 过期时间未知时为 None"""
+        return self._refresh_at
+
+    def refresh_due(self) -> bool:
+        """是否到了后台刷新时间"""
+        return self._refresh_at is not None and time.monotonic() >= self._refresh_at
+
+    def refresh_token(self) -> bool:
+        """
+        后台提前刷新 token（与 401 重新登录共用同一把锁，不会重复登录）
+
+        Returns:
+            bool: 刷新成功返回 True；失败时 REFRESH_RETRY 秒后重试，旧 token 继续使用
+        """
+        ok = self._relogin(self.token, background=True)
+        if not ok:
+            self._refresh_at = time.monotonic() + self.REFRESH_RETRY
+        return ok
+
+    def _maybe_refresh(self):
+        """到期时在后台线程刷新 token，上报循环不等待"""
+        if not self.refresh_due():
+            return
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(
+            target=self.refresh_token, name=f"IVAS-{self.device_code}-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def _relogin(self, stale_token: Optional[str], background: bool = False) -> bool:
+        """
+        单飞重新登录：同一时刻只有一个登录请求，其余调用等待并复用结果
+
+        Args:
+            stale_token: 调用方发现失效（或即将过期）的 token
+            background: 是否为过期前的后台刷新
+
+        Returns:
+            bool: 当前持有可用 token 返回 True
+        """
+        with self._login_lock:
+            if self.token != stale_token:
+                # 等锁期间已经换成新 token，直接复用
+                if not background:
+                    self.metrics.record_coalesced()
+                return self.token is not None
+
+            if background:
+                self._log('info', f"[{self.account}] Token 即将过期，后台刷新")
+            else:
+                self._log('warning', f"[{self.account}] Token 过期，重新登录")
+            self.metrics.record_relogin(background=background)
+            return self.login()
+
     # ==================== 数据生成方法 ====================
 
     def _generate_position_data(self) -> Dict[str, Any]:
         """生成随机位置数据"""
+        if self.telemetry is not None:
+            return self.telemetry.position()
+
         lat_offset = self.coord_range['lat_offset']
         lon_offset = self.coord_range['lon_offset']
         alt_offset = self.coord_range['alt_offset']
@@ -167,6 +537,9 @@ class IVASClient:
 
     def _generate_target_data(self) -> Dict[str, Any]:
         """生成随机目标检测数据"""
+        if self.telemetry is not None:
+            return self.telemetry.targets()
+
         obj_cnt = random.randint(0, 3)
         objs = []
 
@@ -199,6 +572,49 @@ class IVASClient:
 
     # ==================== HTTP 请求方法 ====================
 
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送一次请求并记录指标（异常原样抛出）"""
+        endpoint = endpoint_name(url)
+        sent = len(url) + len(kwargs.get('data') or b'')
+        start = time.perf_counter()
+        try:
+            resp = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            finished = time.perf_counter()
+            self.metrics.record(endpoint, 'error', finished - start, sent)
+            if self.rate_control is not None:
+                self.rate_control.observe('error', finished - start)
+            if self.spool is not None:
+                self.spool.record_result(False)
+            if self.traffic_recorder is not None:
+                self.traffic_recorder.record(endpoint, self.device_code, start, finished, 'error', url, kwargs.get('data'))
+            raise
+        finished = time.perf_counter()
+        self.metrics.record(endpoint, resp.status_code, finished - start, sent, len(resp.content))
+        if self.rate_control is not None:
+            self.rate_control.observe(resp.status_code, finished - start)
+        if self.spool is not None:
+            self.spool.record_result(not is_failure(resp.status_code))
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.record(
+                endpoint, self.device_code, start, finished, resp.status_code, url, kwargs.get('data'), resp.content
+            )
+        return resp
+
+    def request_budget(self, endpoint: str) -> float:
+        """
+        接口的请求时间预算 (秒)，用作超时时间
+
+        - request_budgets 中配置的接口直接使用配置值
+        - 并发模式下同一周期的请求各自等待，预算等于 tick_deadline；串行模式下依次发送，每个请求占一半
+        - 限制在 [MIN_REQUEST_TIMEOUT, MAX_REQUEST_TIMEOUT] 内；自适应频率调整周期后预算随之变化
+        """
+        budget = self.request_budgets.get(endpoint)
+        if budget is not None:
+            return budget
+        budget = self.tick_deadline if self.concurrent_tick else self.tick_deadline / 2
+        return min(max(budget, self.MIN_REQUEST_TIMEOUT), self.MAX_REQUEST_TIMEOUT)
+
     def _request(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
         """
         统一的 HTTP 请求入口，自动处理 token 过期
@@ -206,89 +622,160 @@ class IVASClient:
         Args:
             method: 'GET' 或 'POST'
             url: 请求 URL
-            **kwargs: 传递给 requests 的参数
+            **kwargs: 传递给 requests 的参数，不传 timeout 时使用接口的请求时间预算
 
         Returns:
-            Response 对象，失败返回 None
+            Response 对象，失败、熔断中或超出请求数预算时返回 None
         """
-        headers = kwargs.get('headers', {})
-        headers['token'] = self.token
-        kwargs['headers'] = headers
-        kwargs['timeout'] = kwargs.get('timeout', 3)
+        endpoint = endpoint_name(url)
+        breaker = self.breakers.get(self.base_url, endpoint) if self.breakers is not None else None
+        if breaker is not None and not breaker.allow():
+            return None
+        if self.rate_budget is not None and not self.rate_budget.acquire():
+            if breaker is not None:
+                breaker.cancel()
+            return None
+
+        # 每次请求复制一份请求头：模板 (如 encoder.json_headers) 被多个线程共用，不能写入 token
+        token = self.token
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), 'token': token}
+        budget = kwargs.get('timeout') or self.request_budget(endpoint)
+        kwargs['timeout'] = budget
+        started = time.monotonic()
 
         try:
-            if method == 'POST':
-                resp = requests.post(url, **kwargs)
-            else:
-                resp = requests.get(url, **kwargs)
+            resp = self._send(method, url, **kwargs)
 
-            # 处理 401 token 过期
+            # 处理 401 token 过期（并发的 401 只触发一次登录）
             if resp.status_code == 401:
-                self._log('warning', f"[{self.account}] Token 过期，重新登录")
-                if self.login():
-                    # 重试一次
-                    headers['token'] = self.token
-                    if method == 'POST':
-                        resp = requests.post(url, **kwargs)
-                    else:
-                        resp = requests.get(url, **kwargs)
-
+                if self._relogin(token):
+                    # 在剩余的时间预算内重试一次，预算已用完则放弃
+                    remaining = budget - (time.monotonic() - started)
+                    if remaining > 0:
+                        kwargs['headers'] = {**kwargs['headers'], 'token': self.token}
+                        kwargs['timeout'] = max(remaining, self.MIN_REQUEST_TIMEOUT)
+                        resp = self._send(method, url, **kwargs)
+
+            if breaker is not None:
+                breaker.record(resp.status_code)
             return resp
 
         except requests.RequestException as e:
+            if breaker is not None:
+                breaker.record('error')
             self._log('error', f"请求异常: {e}")
             return None
 
     def _report_position(self):
         """上报位置数据到 IVAS 服务器 (POST with URL params)"""
-        url = f"{self.base_url}/jk-ivas/third/controller/reportUserData"
         data = self._generate_position_data()
+        url = self.encoder.position_query_url(data)
 
-        # 使用 params 传递 URL 参数
-        resp = self._request('POST', url, params=data)
+        # 参数已预编码进 URL 查询串
+        resp = self._request('POST', url)
 
         if resp and resp.status_code == 200:
+            if self.first_report_at is None:
+                self.first_report_at = time.monotonic()
+            if self.telemetry_store is not None:
+                self.telemetry_store.add_position(self.device_code, data)
             # 添加 token 和 account 信息用于显示
             data['_token'] = self.token
             data['_account'] = self.account
             self._log('position', data)
-        elif resp:
-            self._log('error', f"位置上报失败: HTTP {resp.status_code}")
+        else:
+            if resp:
+                self._log('error', f"位置上报失败: HTTP {resp.status_code}")
+            if self.spool is not None and should_spool(resp):
+                self.spool.append(self.device_code, 'reportUserData', url)
 
     def _report_targets(self):
         """上报目标数据到 IVAS 服务器 (POST with JSON body)"""
-        url = f"{self.base_url}/jk-ivas/non/controller/postTarPos"
+        url = self.encoder.targets_url
         data = self._generate_target_data()
+        body = self.encoder.targets_body(data)
 
-        # 使用 json 传递 body
-        resp = self._request('POST', url, json=data)
+        # 预编码的 JSON body
+        resp = self._request('POST', url, data=body, headers=self.encoder.json_headers)
 
         if resp and resp.status_code == 200:
+            if self.telemetry_store is not None:
+                self.telemetry_store.add_targets(self.device_code, data)
             self._log('targets', data)
-        elif resp:
-            self._log('error', f"目标上报失败: HTTP {resp.status_code}")
+        else:
+            if resp:
+                self._log('error', f"目标上报失败: HTTP {resp.status_code}")
+            if self.spool is not None and should_spool(resp):
+                self.spool.append(self.device_code, 'postTarPos', url, body)
+
+    def resend(self, record) -> bool:
+        """
+        补发一条暂存的上报（由 ivas.spool.ReportSpool 的补发线程调用）
+
+        Args:
+            record: ivas.spool.SpoolRecord
+
+        Returns:
+            bool: 是否补发成功，失败时记录重新追加到暂存队尾
+        """
+        if record.body is not None:
+            resp = self._request('POST', record.url, data=record.body, headers=self.encoder.json_headers)
+        else:
+            resp = self._request('POST', record.url)
+        if resp and resp.status_code == 200:
+            self.spool.ack()
+            return True
+        if should_spool(resp):
+            self.spool.requeue(record)
+        else:
+            self.spool.reject()
+        return False
 
     def _poll_task(self):
         """从 IVAS 服务器轮询任务 (GET)"""
-        url = f"{self.base_url}/jk-ivas/third/controller/outdoorTask"
+        result = self.fetch_task()
+        if result is not None:
+            self._log('task', result)
+
+    def fetch_task(self) -> Optional[Dict[str, Any]]:
+        """
+        请求一次任务接口
+
+        Returns:
+            dict: 解析后的响应 ({'code', 'msg', 'data'})，请求或解析失败时为 None（已记录错误日志）
+        """
+        url = self.encoder.task_url
 
         resp = self._request('GET', url)
 
         if resp and resp.status_code == 200:
             try:
-                result = resp.json()
-                self._log('task', result)
+                return resp.json()
             except Exception as e:
                 self._log('error', f"任务解析失败: {e}")
         elif resp:
             self._log('error', f"任务轮询失败: HTTP {resp.status_code}")
+        return None
 
     # ==================== 日志辅助方法 ====================
 
     def _log(self, log_type: str, data: Any):
         """统一的日志输出方法"""
-        if self.queue:
-            self.queue.put((log_type, self.device_code, data))
+        if self.quiet:
+            return
+        buffer = self._log_buffer.get()
+        if buffer is not None:
+            buffer.append((log_type, data))
+            return
+        self._emit(log_type, data)
+
+    def _emit(self, log_type: str, data: Any):
+        """输出一条日志到可视化队列或标准输出（不阻塞，有界队列已满时丢弃）"""
+        if self.queue is not None:
+            try:
+                self.queue.put_nowait((log_type, self.device_code, data))
+            except queue.Full:
+                pass
         else:
             # 如果没有队列，直接打印
             print(f"[{log_type.upper()}] Device {self.device_code}: {data}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+IVAS 请求编码模块
+
+把每次上报中不变的部分预先编码，只格式化变化的数值字段：
+1. 位置上报: 接口 URL、deviceCode、roomId=22、refPositionType=0 预先拼好，
+   一次 % 格式化生成完整的查询串，不再经过 dict → urlencode
+2. 目标上报: 安装了 orjson 时使用 orjson 直接生成 bytes，否则使用紧凑格式的 json
+3. 预先构造请求头，调用方直接复用
+"""
+
+import json
+from typing import Dict, Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+
+REPORT_POSITION_PATH = '/jk-ivas/third/controller/reportUserData'
+POST_TARGETS_PATH = '/jk-ivas/non/controller/postTarPos'
+OUTDOOR_TASK_PATH = '/jk-ivas/third/controller/outdoorTask'
+LOGIN_PATH = '/jk-ivas/third/controller/zsLogin'
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """JSON 编码为 bytes (orjson)"""
+        return orjson.dumps(obj)
+
+    JSON_BACKEND = 'orjson'
+else:
+    _encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+    def dumps(obj: Any) -> bytes:
+        """JSON 编码为 bytes (标准库 json，紧凑格式)"""
+        return _encoder.encode(obj).encode('utf-8')
+
+    JSON_BACKEND = 'json'
+
+
+class PayloadEncoder:
+    """单个设备的请求编码器
+
+    位置上报的查询串顺序、数值格式与 requests 对 params 字典的编码结果一致
+    (浮点数使用 repr，即 str(float) 的最短表示)。
+    """
+
+    def __init__(self, base_url: str, device_code: int):
+        """
+        Args:
+            base_url: 服务器地址
+            device_code: 设备编号
+        """
+        self.position_url = f"{base_url}{REPORT_POSITION_PATH}"
+        self.targets_url = f"{base_url}{POST_TARGETS_PATH}"
+        self.task_url = f"{base_url}{OUTDOOR_TASK_PATH}"
+        self.login_url = f"{base_url}{LOGIN_PATH}"
+
+        # 只有 userX..validCount 需要每次格式化，其余部分是常量
+        self._position_template = (
+            self.position_url.replace('%', '%%')
+            + f"?deviceCode={device_code}"
+            + "&userX=%r&userY=%r&userZ=%r&azimuth=%d&localTime=%d&motion=%d&validCount=%d"
+            + "&roomId=22&refPositionType=0"
+        )
+
+        # 只读模板，_request 每次复制后再加入 token
+        self.json_headers = {'Content-Type': 'application/json'}
+
+    def position_query_url(self, data: Dict[str, Any]) -> str:
+        """
+        位置数据编码为完整的请求 URL
+
+        Args:
+            data: _generate_position_data 生成的字典
+
+        Returns:
+            str: 带查询串的 URL
+        """
+        return self._position_template % (
+            data['userX'],
+            data['userY'],
+            data['userZ'],
+            data['azimuth'],
+            data['localTime'],
+            data['motion'],
+            data['validCount']
+        )
+
+    @staticmethod
+    def targets_body(data: Dict[str, Any]) -> bytes:
+        """目标数据编码为 JSON bytes"""
+        return dumps(data)
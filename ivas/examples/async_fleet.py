@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+IVAS SDK 异步机队示例
+
+在单个事件循环中运行大量无人机，结束后输出每架无人机的
+实际上报频率与目标频率对比。
+
+用法:
+    python3 async_fleet.py --count 5000 --report-hz 1 --duration 60
+    python3 async_fleet.py --count 500 --duration 3600 --metrics-port 9100   # 同时发布 Prometheus 指标
+    python3 async_fleet.py --count 5000 --duration 600 --headless --report report.json  # 只输出汇总行和最终报告
+    python3 async_fleet.py --count 100 --duration 60 --record traffic.bin   # 录制流量，之后用 ivas.traffic 回放
+    python3 async_fleet.py --count 1000 --duration 600 --headless --store telemetry/   # 保存遥测数据，之后用 ivas.store 分析
+    python3 async_fleet.py --count 5000 --duration 60 --task-poll fleet   # 整个机队每周期只轮询一次任务，按 id 分发
+    python3 async_fleet.py --count 2000 --report-hz 20 --adaptive 1:50 --headless   # 自适应频率，观察服务器拐点
+    python3 async_fleet.py --count 2000 --report-hz 10 --max-rps 5000              # 机队每秒请求数上限
+    python3 async_fleet.py --count 500 --duration 300 --headless --spool spool/   # 服务器故障期间暂存上报，恢复后补发
+    python3 async_fleet.py --count 500 --duration 300 --headless --breaker --spool spool/   # 故障期间熔断，请求立即失败
+"""
+
+import argparse
+import asyncio
+
+from ivas import AsyncFleetRunner
+from ivas.exporter import MetricsExporter
+from ivas.summary import FleetSummary
+from ivas.traffic import TrafficRecorder
+from ivas.store import TelemetryWriter
+
+
+def build_configs(args, recorder=None, store=None):
+    """按编号生成设备配置"""
+    adaptive = None
+    if args.adaptive:
+        min_hz, max_hz = (float(v) for v in args.adaptive.split(':'))
+        adaptive = {'min_hz': min_hz, 'max_hz': max_hz, 'latency_ms': args.latency_target}
+    configs = []
+    for i in range(args.count):
+        device_code = args.start + i
+        configs.append({
+            'device_code': device_code,
+            'account': f"ZSDX{device_code:03d}",
+            'password': args.password,
+            'base_lat': 23.0 + (i % 100) * 0.001,
+            'base_lon': 113.0 + (i // 100) * 0.001,
+            'base_alt': 100.0,
+            'coord_range': {
+                'lat_offset': 0.001,
+                'lon_offset': 0.001,
+                'alt_offset': 10.0
+            },
+            'base_url': args.base_url,
+            'display_queue': None,
+            'report_hz': args.report_hz,
+            'task_hz': args.task_hz,
+            'quiet': args.headless,
+            'traffic_recorder': recorder,
+            'telemetry_store': store,
+            'adaptive_rate': adaptive
+        })
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVAS 异步机队示例")
+    parser.add_argument('--base-url', default='http://localhost:5001', help='IVAS 服务器地址')
+    parser.add_argument('--password', default='000000', help='登录密码')
+    parser.add_argument('--count', type=int, default=100, help='无人机数量')
+    parser.add_argument('--start', type=int, default=1, help='起始设备编号')
+    parser.add_argument('--report-hz', type=float, default=1.0, help='上报频率 (Hz)')
+    parser.add_argument('--task-hz', type=float, default=0.2, help='任务轮询频率 (Hz)')
+    parser.add_argument('--duration', type=float, default=30.0, help='运行时长 (秒)')
+    parser.add_argument('--connections', type=int, default=256, help='最大并发连接数')
+    parser.add_argument('--metrics-port', type=int, default=None, help='指标 HTTP 端口 (可选)')
+    parser.add_argument('--no-device-metrics', action='store_true', help='指标只输出机队汇总')
+    parser.add_argument('--headless', action='store_true', help='不逐条打印日志，按间隔输出机队汇总')
+    parser.add_argument('--summary-interval', type=float, default=5.0, help='汇总行输出间隔 (秒)')
+    parser.add_argument('--report', default=None, help='结束时写入的 JSON 报告路径 (无头模式)')
+    parser.add_argument('--record', default=None, help='流量日志路径 (可选)')
+    parser.add_argument('--store', default=None, help='遥测列式存储目录 (可选，需要 numpy)')
+    parser.add_argument('--task-poll', choices=('device', 'fleet', 'account'), default='device',
+                        help='任务轮询方式：逐架 / 整个机队一次 / 每个账号一次')
+    parser.add_argument('--adaptive', default=None, metavar='MIN:MAX', help='自适应上报频率范围 (Hz)，例如 1:50')
+    parser.add_argument('--latency-target', type=float, default=250.0, help='自适应模式下视为拥塞的平均延迟 (ms)')
+    parser.add_argument('--max-rps', type=float, default=None, help='机队每秒请求数上限 (可选)')
+    parser.add_argument('--spool', default=None, help='失败上报暂存目录 (可选)，服务器恢复后补发')
+    parser.add_argument('--spool-rps', type=float, default=50.0, help='补发速率 (条/秒)')
+    parser.add_argument('--breaker', action='store_true', help='按接口熔断：服务器故障时请求立即失败，半开后涓流探测')
+    args = parser.parse_args()
+
+    recorder = TrafficRecorder(args.record) if args.record else None
+    store = TelemetryWriter(args.store) if args.store else None
+    runner = AsyncFleetRunner(
+        build_configs(args, recorder, store), connection_limit=args.connections,
+        task_poll=args.task_poll, max_rps=args.max_rps, spool=args.spool, spool_rps=args.spool_rps,
+        circuit_breaker={} if args.breaker else None
+    )
+
+    exporter = None
+    if args.metrics_port is not None:
+        exporter = MetricsExporter(runner, port=args.metrics_port, per_device=not args.no_device_metrics).start()
+        print(f"指标地址: http://localhost:{exporter.port}/metrics")
+
+    summary = None
+    if args.headless:
+        summary = FleetSummary(runner, interval=args.summary_interval, report_path=args.report).start()
+
+    print(f"启动 {args.count} 架无人机，目标频率 {args.report_hz} Hz，运行 {args.duration} 秒...")
+    try:
+        asyncio.run(runner.run(duration=args.duration))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if summary is not None:
+            summary.stop()
+        if recorder is not None:
+            recorder.close()
+            print(f"流量日志: {args.record} {recorder.stats()}")
+        if store is not None:
+            store.close()
+            print(f"遥测存储: {args.store} {store.stats()['rows']}")
+
+    rates = runner.rates()
+    if not rates:
+        return
+
+    achieved = sorted(r['achieved_hz'] for r in rates)
+    print()
+    print(f"{'设备':>8} {'目标Hz':>8} {'实际Hz':>8}")
+    for row in rates[:20]:
+        print(f"{row['device_code']:>8} {row['target_hz']:>8.2f} {row['achieved_hz']:>8.2f}")
+    if len(rates) > 20:
+        print(f"... 共 {len(rates)} 架")
+    print()
+    print(f"实际频率 最小 {achieved[0]:.2f} / 中位 {achieved[len(achieved) // 2]:.2f} / 最大 {achieved[-1]:.2f} Hz")
+    for base_url, stats in runner.pool_stats.items():
+        print(f"连接复用 {base_url}: {stats.snapshot()}")
+    if runner.task_stats() is not None:
+        print(f"任务分发: {runner.task_stats()}")
+    if runner.budget_stats() is not None:
+        print(f"请求预算: {runner.budget_stats()}")
+    if runner.spool_stats() is not None:
+        print(f"上报暂存: {runner.spool_stats()}")
+    for row in runner.breaker_stats() or ():
+        print(f"熔断器: {row}")
+
+
+if __name__ == '__main__':
+    main()
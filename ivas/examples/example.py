@@ -13,7 +13,7 @@ import threading
 # import os
 # sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ivas import IVASClient
+from ivas import IVASClient, IVASFleet
 
 
 def single_device_example():
@@ -104,10 +104,9 @@ def multi_device_example():
         }
     ]
 
-    clients = []
-    threads = []
+    # 所有设备由一个机队调度，线程数由 max_workers 决定而不是设备数量
+    fleet = IVASFleet(max_workers=4)
 
-    # 创建并启动所有客户端
     for device_config in devices:
         # 补充通用配置
         device_config.update({
@@ -122,16 +121,11 @@ def multi_device_example():
             'task_hz': 0.2
         })
 
-        client = IVASClient(**device_config)
-        clients.append(client)
+        fleet.add(device_config)
+        print(f"设备 {device_config['device_code']} ({device_config['account']}) 已加入")
 
-        thread = threading.Thread(target=client.run, daemon=True)
-        thread.start()
-        threads.append(thread)
-
-        print(f"设备 {device_config['device_code']} ({device_config['account']}) 已启动")
-
-    print(f"\n所有 {len(clients)} 个设备已启动！按 Ctrl+C 停止运行。\n")
+    fleet.start()
+    print(f"\n所有 {len(fleet.clients)} 个设备已启动！按 Ctrl+C 停止运行。\n")
 
     try:
         while True:
@@ -139,12 +133,7 @@ def multi_device_example():
 
     except KeyboardInterrupt:
         print("\n\n正在停止所有设备...")
-        for client in clients:
-            client.stop()
-
-        for thread in threads:
-            thread.join(timeout=2)
-
+        fleet.shutdown()
         print("所有设备已停止。")
 
 
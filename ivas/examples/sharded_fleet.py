@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+IVAS SDK 多进程机队示例
+
+把机队分配到多个工作进程 (默认每个 CPU 核心一个)，每个进程运行一个异步机队或线程池机队，
+父进程按间隔输出合并后的机队汇总，结束时输出各分片状态。
+
+用法:
+    python3 sharded_fleet.py --count 20000 --processes 8 --duration 60
+    python3 sharded_fleet.py --count 2000 --engine threads --duration 60       # 每个进程运行 IVASFleet
+    python3 sharded_fleet.py --count 20000 --duration 600 --report report.json --metrics-port 9100
+"""
+
+import argparse
+import os
+
+from ivas.exporter import MetricsExporter
+from ivas.sharded import ShardedFleet
+from ivas.summary import FleetSummary
+
+
+def build_configs(args):
+    """按编号生成设备配置（工作进程中不打印逐条日志）"""
+    configs = []
+    for i in range(args.count):
+        device_code = args.start + i
+        configs.append({
+            'device_code': device_code,
+            'account': f"ZSDX{device_code:03d}",
+            'password': args.password,
+            'base_lat': 23.0 + (i % 100) * 0.001,
+            'base_lon': 113.0 + (i // 100) * 0.001,
+            'base_alt': 100.0,
+            'coord_range': {
+                'lat_offset': 0.001,
+                'lon_offset': 0.001,
+                'alt_offset': 10.0
+            },
+            'base_url': args.base_url,
+            'display_queue': None,
+            'report_hz': args.report_hz,
+            'task_hz': args.task_hz,
+            'quiet': True
+        })
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVAS 多进程机队示例")
+    parser.add_argument('--base-url', default='http://localhost:5001', help='IVAS 服务器地址')
+    parser.add_argument('--password', default='000000', help='登录密码')
+    parser.add_argument('--count', type=int, default=1000, help='无人机数量')
+    parser.add_argument('--start', type=int, default=1, help='起始设备编号')
+    parser.add_argument('--report-hz', type=float, default=1.0, help='上报频率 (Hz)')
+    parser.add_argument('--task-hz', type=float, default=0.2, help='任务轮询频率 (Hz)')
+    parser.add_argument('--duration', type=float, default=30.0, help='运行时长 (秒)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='工作进程数')
+    parser.add_argument('--engine', choices=('async', 'threads'), default='async', help='每个进程的机队实现')
+    parser.add_argument('--connections', type=int, default=256, help='每个进程的最大并发连接数 (async)')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='启动时间窗口 (秒)')
+    parser.add_argument('--summary-interval', type=float, default=5.0, help='汇总行输出间隔 (秒)')
+    parser.add_argument('--report', default=None, help='结束时写入的 JSON 报告路径')
+    parser.add_argument('--metrics-port', type=int, default=None, help='指标 HTTP 端口 (可选)')
+    args = parser.parse_args()
+
+    options = {'ramp_up': args.ramp_up}
+    if args.engine == 'async':
+        options['connection_limit'] = args.connections
+
+    fleet = ShardedFleet(build_configs(args), processes=args.processes, engine=args.engine, runner_options=options)
+    print(f"启动 {args.count} 架无人机，{fleet.processes} 个工作进程 ({args.engine})，运行 {args.duration} 秒...")
+    fleet.start()
+
+    exporter = None
+    if args.metrics_port is not None:
+        exporter = MetricsExporter(fleet, port=args.metrics_port).start()
+        print(f"指标地址: http://localhost:{exporter.port}/metrics")
+    summary = FleetSummary(fleet, interval=args.summary_interval, report_path=args.report).start()
+
+    try:
+        fleet.wait(duration=args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.stop()
+        if exporter is not None:
+            exporter.stop()
+        summary.stop()
+
+    print()
+    print(f"{'分片':>4} {'PID':>8} {'无人机':>6} {'请求':>10} {'错误':>6} {'退出码':>6}")
+    for s in fleet.shard_stats():
+        print(f"{s['shard']:>4} {s['pid']:>8} {s['drones']:>6} {s['requests']:>10} {s['errors']:>6} {str(s['exitcode']):>6}")
+        if s['error']:
+            print(s['error'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+IVAS 指标导出模块
+
+以 Prometheus 文本格式 (text/plain; version=0.0.4) 通过 HTTP 发布机队运行状态：
+1. 每架无人机和机队汇总的请求计数 (按接口、状态码)、收发字节数、重新登录/后台刷新次数
+2. 按接口的延迟直方图（请求速率由 Prometheus 对计数器做 rate() 得到，导出器本身不保存抓取间状态）
+3. 每架无人机的周期统计：实际/目标频率、错过截止时间次数、抖动分位数
+4. 调度器延迟、调度堆和线程池积压，以及可视化队列深度（信箱另有合并/丢弃计数）
+5. 启动进度：已完成第一次上报的无人机数量和启动到第一次上报的耗时分位数
+6. 多进程机队 (ShardedFleet) 各工作进程的存活状态和请求数
+7. 统一任务轮询的轮询次数、分发数、节省的请求数和 fan-in 延迟
+8. 自适应频率下机队的当前有效频率，以及机队请求数预算的放行/放弃计数
+
+使用示例:
+    exporter = MetricsExporter(fleet, port=9100, queues={'display': display_queue})
+    exporter.start()
+    # curl http://localhost:9100/metrics
+    exporter.stop()
+
+支持 IVASFleet、AsyncFleetRunner 以及任何具有 clients 属性（列表或 {device_code: client}）的对象；
+数据源提供 fleet_stats() 时 (如 ShardedFleet) 只输出机队汇总，不输出每架无人机的序列。
+分位数以 summary 输出 (quantile="0.5" / "0.95" / "0.99")，最大值另有 *_max gauge。
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, List
+
+from .metrics import LATENCY_BUCKETS_MS, merge_snapshots
+from .breaker import STATE_CODES
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class _Writer:
+    """按指标名分组输出 HELP / TYPE 和样本行"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def header(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, **labels):
+        # 计数保持整数，避免大数值被格式化成科学计数法后丢失精度
+        text = str(value) if isinstance(value, int) else repr(float(value))
+        self.lines.append(f"{name}{_labels(**labels)} {text}")
+
+    def summary(self, name: str, values: Dict[str, Optional[float]], scale: float = 1.0, **labels):
+        """{'p50': ..., 'p95': ...} 形式的分位数转换为 quantile="0.5" 等样本 (max 和尚无数据的分位数跳过)"""
+        for key, value in values.items():
+            if key.startswith('p') and value is not None:
+                self.sample(name, value * scale, **labels, quantile=f"{int(key[1:]) / 100:g}")
+
+    def histogram(self, name: str, latency: Dict[str, Any], **labels):
+        """ivas.metrics 的毫秒直方图转换为以秒为单位的累积桶"""
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, latency['counts']):
+            cumulative += count
+            self.sample(f"{name}_bucket", cumulative, **labels, le=f"{bound / 1000:g}")
+        self.sample(f"{name}_bucket", latency['count'], **labels, le='+Inf')
+        self.sample(f"{name}_sum", latency['sum'] / 1000, **labels)
+        self.sample(f"{name}_count", latency['count'], **labels)
+
+    def text(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+class MetricsExporter:
+    """Prometheus 文本格式指标导出器（后台线程运行 HTTP 服务）"""
+
+    def __init__(
+        self,
+        source,
+        port: int = 9100,
+        host: str = '0.0.0.0',
+        queues: Optional[Dict[str, Any]] = None,
+        per_device: bool = True
+    ):
+        """
+        Args:
+            source: IVASFleet / AsyncFleetRunner 或具有 clients 属性的对象
+            port: 监听端口
+            host: 监听地址
+            queues: 需要导出深度的队列 {名称: 具有 qsize() 的对象}
+            per_device: 是否输出每架无人机的序列（机队很大时可关闭，只保留汇总）
+        """
+        self.source = source
+        self.host = host
+        self.port = port
+        self.queues = queues or {}
+        self.per_device = per_device
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== HTTP 服务 ====================
+
+    def start(self) -> 'MetricsExporter':
+        """在后台线程中启动 HTTP 服务"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='IVAS-metrics', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止 HTTP 服务"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # ==================== 指标生成 ====================
+
+    def _clients(self) -> list:
+        clients = self.source.clients
+        return list(clients.values()) if isinstance(clients, dict) else list(clients)
+
+    def render(self) -> str:
+        """生成一次完整的指标文本"""
+        fleet_stats = getattr(self.source, 'fleet_stats', None)
+        if fleet_stats is not None:
+            # 客户端在其他进程中，只有汇总可用
+            clients = []
+            snapshots = {}
+            stats = fleet_stats(ticks=False)
+            total = stats['requests']
+            drones, running = stats['drones'], stats['running']
+            effective_hz = stats.get('effective_hz')
+        else:
+            clients = self._clients()
+            snapshots = {client.device_code: client.request_stats() for client in clients}
+            total = merge_snapshots(snapshots.values())
+            drones, running = len(clients), sum(1 for c in clients if c.running)
+            effective_hz = sum(c.effective_hz() for c in clients)
+        w = _Writer()
+
+        # ---- 机队汇总 ----
+        w.header('ivas_fleet_drones', 'gauge', "机队中的无人机数量")
+        w.sample('ivas_fleet_drones', drones)
+        w.header('ivas_fleet_drones_running', 'gauge', "运行中的无人机数量")
+        w.sample('ivas_fleet_drones_running', running)
+
+        if effective_hz is not None:
+            w.header('ivas_fleet_effective_hz', 'gauge', "全部无人机当前上报频率之和 (自适应模式下随服务器状态变化)")
+            w.sample('ivas_fleet_effective_hz', effective_hz)
+
+        w.header('ivas_fleet_requests_total', 'counter', "机队请求总数")
+        for name, ep in total['endpoints'].items():
+            for status, count in ep['status'].items():
+                w.sample('ivas_fleet_requests_total', count, endpoint=name, status=status)
+
+        w.header('ivas_fleet_request_duration_seconds', 'histogram', "机队请求延迟")
+        for name, ep in total['endpoints'].items():
+            w.histogram('ivas_fleet_request_duration_seconds', ep['latency_ms'], endpoint=name)
+
+        w.header('ivas_fleet_bytes_sent_total', 'counter', "机队发送字节数 (URL + body)")
+        for name, ep in total['endpoints'].items():
+            w.sample('ivas_fleet_bytes_sent_total', ep['bytes_sent'], endpoint=name)
+        w.header('ivas_fleet_bytes_received_total', 'counter', "机队接收的响应 body 字节数")
+        for name, ep in total['endpoints'].items():
+            w.sample('ivas_fleet_bytes_received_total', ep['bytes_received'], endpoint=name)
+
+        w.header('ivas_fleet_relogins_total', 'counter', "请求返回 401 后的重新登录次数")
+        w.sample('ivas_fleet_relogins_total', total['relogins'])
+        w.header('ivas_fleet_token_refreshes_total', 'counter', "token 过期前的后台刷新次数")
+        w.sample('ivas_fleet_token_refreshes_total', total['refreshes'])
+        w.header('ivas_fleet_relogins_coalesced_total', 'counter', "合并到同一次登录、未重复登录的 401 次数")
+        w.sample('ivas_fleet_relogins_coalesced_total', total['relogins_coalesced'])
+
+        # ---- 启动进度 ----
+        startup_stats = getattr(self.source, 'startup_stats', None)
+        if startup_stats is not None:
+            startup = startup_stats()
+            w.header('ivas_fleet_drones_reported', 'gauge', "已完成第一次位置上报的无人机数量")
+            w.sample('ivas_fleet_drones_reported', startup['reported'])
+            ttfr = startup['time_to_first_report']
+            w.header('ivas_fleet_time_to_first_report_seconds', 'summary', "从启动到第一次位置上报成功的耗时")
+            w.summary('ivas_fleet_time_to_first_report_seconds', ttfr)
+            if ttfr['max'] is not None:
+                w.header('ivas_fleet_time_to_first_report_seconds_max', 'gauge', "最慢一架无人机的启动耗时")
+                w.sample('ivas_fleet_time_to_first_report_seconds_max', ttfr['max'])
+
+        # ---- 调度器与队列 ----
+        scheduler_stats = getattr(self.source, 'scheduler_stats', None)
+        if scheduler_stats is not None:
+            sched = scheduler_stats()
+            w.header('ivas_scheduler_lag_seconds', 'gauge', "调度堆顶截止时间已过去的秒数")
+            w.sample('ivas_scheduler_lag_seconds', sched['lag'])
+            w.header('ivas_scheduler_dispatch_lag_seconds', 'gauge', "最近一次任务从截止时间到开始执行的延迟")
+            w.sample('ivas_scheduler_dispatch_lag_seconds', sched['dispatch_lag'])
+            w.header('ivas_scheduler_pending', 'gauge', "调度堆中等待的任务数")
+            w.sample('ivas_scheduler_pending', sched['pending'])
+            w.header('ivas_scheduler_executor_queue', 'gauge', "已提交线程池但尚未开始执行的任务数")
+            w.sample('ivas_scheduler_executor_queue', sched['executor_queue'])
+
+        task_stats = getattr(self.source, 'task_stats', None)
+        tasks = task_stats() if task_stats is not None else None
+        if tasks is not None:
+            w.header('ivas_task_polls_total', 'counter', "统一任务轮询次数")
+            w.sample('ivas_task_polls_total', tasks['polls'], mode=tasks['mode'])
+            w.header('ivas_task_results_total', 'counter', "统一轮询的结果数")
+            for result in ('no_task', 'tasks', 'broadcast', 'unrouted', 'failed'):
+                w.sample('ivas_task_results_total', tasks[result], result=result)
+            w.header('ivas_task_delivered_total', 'counter', "送达无人机的任务轮询响应数")
+            w.sample('ivas_task_delivered_total', tasks['delivered'])
+            w.header('ivas_task_polls_saved_total', 'counter', "相比逐架轮询少发的请求数")
+            w.sample('ivas_task_polls_saved_total', tasks['polls_saved'])
+            w.header('ivas_task_fanin_seconds', 'summary', "从发出轮询到任务送达无人机的耗时")
+            w.summary('ivas_task_fanin_seconds', tasks['fanin_ms'], scale=1 / 1000)
+            w.header('ivas_task_fanin_seconds_max', 'gauge', "从发出轮询到任务送达无人机的最大耗时")
+            w.sample('ivas_task_fanin_seconds_max', tasks['fanin_ms']['max'] / 1000)
+
+        budget_stats = getattr(self.source, 'budget_stats', None)
+        budget = budget_stats() if budget_stats is not None else None
+        if budget is not None:
+            w.header('ivas_budget_rps', 'gauge', "机队每秒请求数预算")
+            w.sample('ivas_budget_rps', budget['rps'])
+            w.header('ivas_budget_granted_total', 'counter', "获得预算放行的请求数")
+            w.sample('ivas_budget_granted_total', budget['granted'])
+            w.header('ivas_budget_throttled_total', 'counter', "超出预算被放弃的请求数")
+            w.sample('ivas_budget_throttled_total', budget['throttled'])
+            w.header('ivas_budget_wait_seconds_total', 'counter', "请求等待预算的累计时间")
+            w.sample('ivas_budget_wait_seconds_total', budget['waited_s'])
+
+        spool_stats = getattr(self.source, 'spool_stats', None)
+        spool = spool_stats() if spool_stats is not None else None
+        if spool is not None:
+            w.header('ivas_spool_depth', 'gauge', "暂存待补发的上报数")
+            w.sample('ivas_spool_depth', spool['depth'])
+            w.header('ivas_spool_bytes', 'gauge', "暂存待补发的上报占用的磁盘字节数")
+            w.sample('ivas_spool_bytes', spool['bytes'])
+            w.header('ivas_spool_records_total', 'counter', "暂存队列的记录数")
+            for result in ('spooled', 'drained', 'requeued', 'dropped', 'orphaned', 'rejected'):
+                w.sample('ivas_spool_records_total', spool[result], result=result)
+            w.header('ivas_spool_drain_rate', 'gauge', "最近 10 秒的实际补发速率 (条/秒)")
+            w.sample('ivas_spool_drain_rate', spool['drain_rate'])
+            w.header('ivas_spool_healthy', 'gauge', "服务器是否已恢复 (开始补发)")
+            w.sample('ivas_spool_healthy', int(spool['healthy']))
+
+        breaker_stats = getattr(self.source, 'breaker_stats', None)
+        breakers = breaker_stats() if breaker_stats is not None else None
+        if breakers:
+            w.header('ivas_breaker_state', 'gauge', "熔断器状态 (0 正常, 1 半开, 2 熔断)")
+            for b in breakers:
+                w.sample('ivas_breaker_state', STATE_CODES[b['state']], base_url=b['base_url'], endpoint=b['endpoint'])
+            w.header('ivas_breaker_trips_total', 'counter', "熔断器打开次数")
+            for b in breakers:
+                w.sample('ivas_breaker_trips_total', b['trips'], base_url=b['base_url'], endpoint=b['endpoint'])
+            w.header('ivas_breaker_short_circuited_total', 'counter', "熔断期间被拦截、立即失败的请求数")
+            for b in breakers:
+                w.sample('ivas_breaker_short_circuited_total', b['short_circuited'],
+                         base_url=b['base_url'], endpoint=b['endpoint'])
+            w.header('ivas_breaker_probes_total', 'counter', "半开状态下放行的探测请求数")
+            for b in breakers:
+                w.sample('ivas_breaker_probes_total', b['probes'], base_url=b['base_url'], endpoint=b['endpoint'])
+
+        shard_stats = getattr(self.source, 'shard_stats', None)
+        if shard_stats is not None:
+            shards = shard_stats()
+            w.header('ivas_shard_up', 'gauge', "工作进程是否存活")
+            for s in shards:
+                w.sample('ivas_shard_up', int(s['alive']), shard=s['shard'])
+            w.header('ivas_shard_drones_running', 'gauge', "工作进程中运行中的无人机数量")
+            for s in shards:
+                w.sample('ivas_shard_drones_running', s['running'], shard=s['shard'])
+            w.header('ivas_shard_requests_total', 'counter', "工作进程的请求总数")
+            for s in shards:
+                w.sample('ivas_shard_requests_total', s['requests'], shard=s['shard'])
+
+        if self.queues:
+            w.header('ivas_queue_depth', 'gauge', "队列中等待的消息数")
+            for name, q in self.queues.items():
+                w.sample('ivas_queue_depth', q.qsize(), queue=name)
+
+            mailboxes = {name: q.stats() for name, q in self.queues.items() if hasattr(q, 'stats')}
+            if mailboxes:
+                w.header('ivas_mailbox_puts_total', 'counter', "写入信箱的消息数")
+                for name, s in mailboxes.items():
+                    w.sample('ivas_mailbox_puts_total', s['puts'], queue=name)
+                w.header('ivas_mailbox_coalesced_total', 'counter', "被同一无人机同类新消息覆盖的消息数")
+                for name, s in mailboxes.items():
+                    for msg_type, counts in s['by_type'].items():
+                        w.sample('ivas_mailbox_coalesced_total', counts['coalesced'], queue=name, type=msg_type)
+                w.header('ivas_mailbox_dropped_total', 'counter', "信箱已满被丢弃的消息数")
+                for name, s in mailboxes.items():
+                    w.sample('ivas_mailbox_dropped_total', s['dropped'], queue=name)
+
+        if not self.per_device or fleet_stats is not None:
+            return w.text()
+
+        # ---- 每架无人机 ----
+        w.header('ivas_requests_total', 'counter', "每架无人机的请求数")
+        for code, snap in snapshots.items():
+            for name, ep in snap['endpoints'].items():
+                for status, count in ep['status'].items():
+                    w.sample('ivas_requests_total', count, device=code, endpoint=name, status=status)
+
+        w.header('ivas_request_duration_seconds', 'histogram', "每架无人机的请求延迟")
+        for code, snap in snapshots.items():
+            for name, ep in snap['endpoints'].items():
+                if ep['requests']:
+                    w.histogram('ivas_request_duration_seconds', ep['latency_ms'], device=code, endpoint=name)
+
+        w.header('ivas_relogins_total', 'counter', "每架无人机请求返回 401 后的重新登录次数")
+        for code, snap in snapshots.items():
+            w.sample('ivas_relogins_total', snap['relogins'], device=code)
+        w.header('ivas_token_refreshes_total', 'counter', "每架无人机 token 过期前的后台刷新次数")
+        for code, snap in snapshots.items():
+            w.sample('ivas_token_refreshes_total', snap['refreshes'], device=code)
+
+        timing = {client.device_code: client.timing_stats() for client in clients}
+        w.header('ivas_tick_target_hz', 'gauge', "目标上报频率")
+        for code, t in timing.items():
+            w.sample('ivas_tick_target_hz', t['target_hz'], device=code)
+        w.header('ivas_tick_achieved_hz', 'gauge', "实际上报频率")
+        for code, t in timing.items():
+            w.sample('ivas_tick_achieved_hz', t['achieved_hz'], device=code)
+        w.header('ivas_ticks_total', 'counter', "已执行的上报周期数")
+        for code, t in timing.items():
+            w.sample('ivas_ticks_total', t['ticks'], device=code)
+        w.header('ivas_tick_missed_total', 'counter', "结束时已超过下一截止时间的周期数")
+        for code, t in timing.items():
+            w.sample('ivas_tick_missed_total', t['missed'], device=code)
+        w.header('ivas_tick_jitter_seconds', 'summary', "周期开始时间相对截止时间的延迟")
+        for code, t in timing.items():
+            w.summary('ivas_tick_jitter_seconds', t['jitter_ms'], scale=1 / 1000, device=code)
+        w.header('ivas_tick_jitter_seconds_max', 'gauge', "周期开始时间相对截止时间的最大延迟")
+        for code, t in timing.items():
+            w.sample('ivas_tick_jitter_seconds_max', t['jitter_ms']['max'] / 1000, device=code)
+
+        return w.text()
@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+IVAS 机队调度模块
+
+用一个定时堆 + 有限线程池驱动大量无人机：
+1. 所有无人机的上报、轮询截止时间保存在同一个优先队列中
+2. 到期任务提交给固定大小的线程池执行，线程数与并发度相关而非机队规模
+3. 支持单机/全机队的启动、停止，以及运行时增删无人机、调整线程池
+4. token 过期前的后台刷新也作为定时任务调度，不占用上报周期
+5. 启动时把登录分散到 ramp_up 时间窗口内，登录失败按指数退避重试，可选 token 磁盘缓存
+6. 可选机队统一任务轮询 (task_poll='fleet' / 'account')：每组只轮询一次，按任务 id 分发 (见 ivas.tasks)
+7. 可选的机队每秒请求数预算 (max_rps，见 ivas.rate)
+8. 可选的失败上报暂存，服务器恢复后由后台线程限速补发 (spool，见 ivas.spool)
+9. 可选的按 (base_url, 接口) 熔断，整个机队共用 (circuit_breaker，见 ivas.breaker)
+10. spawn()：按启动窗口逐步生成配置并创建无人机，启动耗时和初始内存与机队规模无关 (见 ivas.fleetspec)
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Iterable, List
+
+from .client import IVASClient
+from .metrics import merge_snapshots, startup_stats
+from .auth import TokenCache
+from .tasks import DEVICE, TaskFanout
+from .rate import RateBudget
+from .spool import ReportSpool, spool_stats
+from .breaker import BreakerBoard, breaker_stats
+
+
+# 调度任务类型
+LOGIN = 'login'
+REPORT = 'report'
+TASK = 'task'
+REFRESH = 'refresh'
+POLL = 'poll'  # 机队统一任务轮询，调度堆中以分组代替设备编号
+SPAWN = 'spawn'  # 逐步创建无人机，调度堆中以 (SPAWN, 编号) 代替设备编号
+
+SPAWN_AHEAD = 0.1   # 每次创建之后多少秒内轮到启动的无人机 (秒)
+SPAWN_BATCH = 500   # 每次最多创建的无人机数，避免长时间占用工作线程
+
+
+class _Spawner:
+    """一次 spawn() 的进度"""
+    __slots__ = ('configs', 'total', 'spacing', 'started', 'index', 'failed')
+
+    def __init__(self, configs, total: int, spacing: float, started: float):
+        self.configs = configs
+        self.total = total
+        self.spacing = spacing
+        self.started = started
+        self.index = 0    # 已取出的配置数
+        self.failed = 0   # 创建失败的配置数 (例如设备编号重复)
+
+
+class IVASFleet:
+    """IVAS 机队
+
+    使用示例:
+        fleet = IVASFleet(device_configs, max_workers=16)
+        fleet.start()              # 启动全部无人机
+        fleet.stop(device_code=2)  # 停止单架
+        fleet.add(new_config)      # 运行时加入新无人机
+        fleet.start(device_code=4)
+        fleet.resize(32)           # 调整线程池大小
+        fleet.shutdown()
+    """
+
+    def __init__(
+        self,
+        device_configs: Iterable[Dict[str, Any]] = (),
+        max_workers: int = 16,
+        client_class=IVASClient,
+        io_workers: Optional[int] = None,
+        batch_telemetry: bool = False,
+        telemetry_block: int = 32,
+        ramp_up: float = 0.0,
+        login_retries: int = 3,
+        login_backoff: float = 2.0,
+        token_cache: Optional[str] = None,
+        task_poll: str = DEVICE,
+        max_rps: Optional[float] = None,
+        spool: Optional[str] = None,
+        spool_rps: float = 50.0,
+        circuit_breaker: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            device_configs: 设备配置列表，每项为 client_class 的关键字参数
+            max_workers: 工作线程数上限
+            client_class: 客户端类，默认 IVASClient
+            io_workers: concurrent_tick 客户端共享的请求线程数，默认 max_workers * 2
+            batch_telemetry: 是否用 NumPy 按块批量生成整支机队的遥测数据 (需要 numpy)
+            telemetry_block: 批量生成时每块包含的周期数
+            ramp_up: 启动时间窗口 (秒)，一次启动的多架无人机在窗口内均匀错开登录
+            login_retries: 初始登录失败后的重试次数
+            login_backoff: 重试的基础间隔 (秒)，第 n 次重试等待 login_backoff × 2^(n-1)，带 ±50% 随机抖动
+            token_cache: token 缓存文件路径 (可选)，未单独配置 token_cache 的客户端共用
+            task_poll: 任务轮询方式，'device' 每架无人机各自轮询，'fleet' 每个 base_url 轮询一次，
+                       'account' 每个 (base_url, account) 轮询一次，结果按任务 id 分发
+            max_rps: 整个机队的每秒请求数上限 (可选，登录请求不计入)，超出时请求排队，排队超过 1 秒则放弃
+            spool: 失败上报暂存目录 (可选)，未单独配置 spool 的客户端共用，见 ivas.spool
+            spool_rps: 服务器恢复后的补发速率 (条/秒)
+            circuit_breaker: 熔断器参数 (可选)，ivas.breaker.CircuitBreaker 的关键字参数
+                             (failure_threshold / reset_timeout / probe_interval / probe_successes)，
+                             传入空字典使用默认值；未单独配置 breakers 的客户端共用
+        """
+        self.client_class = client_class
+        self.max_workers = max_workers
+        self.clients: Dict[int, IVASClient] = {}
+
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._generation: Dict[int, int] = {}
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='IVASFleet')
+        self._io_workers = io_workers or max_workers * 2
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        self._scheduler: Optional[threading.Thread] = None
+        self._alive = False
+        self._dispatch_lag = 0.0  # 最近一次任务从截止时间到开始执行的延迟
+        self._queued = 0          # 已提交到线程池但尚未开始执行的任务数
+        self._queued_lock = threading.Lock()
+
+        self.ramp_up = ramp_up
+        self.login_retries = login_retries
+        self.login_backoff = login_backoff
+        self._login_attempts: Dict[int, int] = {}
+        self.token_cache = TokenCache(token_cache) if token_cache else None
+
+        self.task_fanout = TaskFanout(task_poll) if task_poll != DEVICE else None
+        self._polling = set()  # 已安排统一轮询的分组
+        self.rate_budget = RateBudget(max_rps) if max_rps else None
+        self._spawners: Dict[Any, _Spawner] = {}
+        self._spawn_ids = itertools.count()
+        self.spool = ReportSpool(spool, drain_rps=spool_rps) if spool else None
+        self.breakers = BreakerBoard(**circuit_breaker) if circuit_breaker is not None else None
+
+        self.telemetry = None
+        if batch_telemetry:
+            from .batch import FleetTelemetryGenerator
+            self.telemetry = FleetTelemetryGenerator(block=telemetry_block)
+
+        for cfg in device_configs:
+            self.add(cfg)
+
+    # ==================== 机队管理 ====================
+
+    def add(self, config: Dict[str, Any]) -> IVASClient:
+        """
+        加入一架无人机（不自动启动）
+
+        Args:
+            config: client_class 的关键字参数
+
+        Returns:
+            创建的客户端实例
+        """
+        return self.add_client(self.client_class(**config))
+
+    def add_client(self, client: IVASClient) -> IVASClient:
+        """加入已创建的客户端实例（不自动启动）"""
+        with self._cond:
+            if client.device_code in self.clients:
+                raise ValueError(f"设备编号重复: {client.device_code}")
+            client.running = False
+            if client.concurrent_tick and client.tick_executor is None:
+                # 并发 tick 的请求共用一个线程池，避免每架无人机各建 3 个线程
+                if self._io_executor is None:
+                    self._io_executor = ThreadPoolExecutor(
+                        max_workers=self._io_workers, thread_name_prefix='IVASFleet-io'
+                    )
+                client.tick_executor = self._io_executor
+            if self.telemetry is not None and client.telemetry is None:
+                self.telemetry.attach(client)
+            self._size_pool(client)
+            if self.token_cache is not None and client.token_cache is None:
+                client.token_cache = self.token_cache
+            if self.task_fanout is not None:
+                self.task_fanout.add(client)
+            if self.rate_budget is not None and client.rate_budget is None:
+                client.rate_budget = self.rate_budget
+            if self.breakers is not None and client.breakers is None:
+                client.breakers = self.breakers
+            if self.spool is not None and client.spool is None:
+                client.spool = self.spool
+                self.spool.register(client)
+            self.clients[client.device_code] = client
+            self._generation[client.device_code] = 0
+        return client
+
+    def remove(self, device_code: int) -> Optional[IVASClient]:
+        """停止并移除一架无人机"""
+        self.stop(device_code)
+        with self._cond:
+            self._generation.pop(device_code, None)
+            client = self.clients.pop(device_code, None)
+        if client is not None and self.task_fanout is not None:
+            self.task_fanout.remove(client)
+        if client is not None and self.telemetry is not None:
+            self.telemetry.detach(client)
+        if client is not None and client.spool is not None:
+            client.spool.unregister(client)  # 之后读到的记录计入 orphaned
+        return client
+
+    def start(self, device_code: Optional[int] = None, ramp_up: Optional[float] = None):
+        """
+        启动无人机
+
+        Args:
+            device_code: 设备编号，None 表示启动全部
+            ramp_up: 本次启动的时间窗口 (秒)，默认使用构造时的 ramp_up
+        """
+        self._ensure_scheduler()
+        window = self.ramp_up if ramp_up is None else ramp_up
+        with self._cond:
+            codes = self.clients.keys() if device_code is None else [device_code]
+            pending = [code for code in codes if not self.clients[code].running]
+            spacing = window / len(pending) if pending else 0.0
+            now = time.monotonic()
+            for i, code in enumerate(pending):
+                self._start_locked(code, now, now + i * spacing)
+            self._cond.notify()
+
+    def _start_locked(self, code: int, requested_at: float, login_at: float):
+        """标记启动并安排登录（调用方需持有 self._cond）"""
+        client = self.clients[code]
+        client.running = True
+        client.start_requested_at = requested_at
+        client.first_report_at = None
+        self._generation[code] += 1
+        self._login_attempts[code] = 0
+        self._push(login_at, code, LOGIN)
+
+    def spawn(self, configs, ramp_up: Optional[float] = None):
+        """
+        按启动窗口逐步创建并启动无人机（大规模机队）
+
+        与 add() + start() 不同，配置在轮到启动前约 SPAWN_AHEAD 秒才从 configs 中取出、客户端才被创建，
+        调用立即返回，启动耗时和启动前的内存占用与机队规模无关。
+
+        Args:
+            configs: client_class 关键字参数的序列，需要支持 len()，例如 ivas.fleetspec.FleetSpec
+            ramp_up: 启动时间窗口 (秒)，默认使用构造时的 ramp_up
+
+        Returns:
+            本次 spawn 的编号 (见 spawn_stats)
+        """
+        self._ensure_scheduler()
+        window = self.ramp_up if ramp_up is None else ramp_up
+        total = len(configs)
+        key = (SPAWN, next(self._spawn_ids))
+        now = time.monotonic()
+        with self._cond:
+            self._spawners[key] = _Spawner(iter(configs), total, window / total if total else 0.0, now)
+            self._generation[key] = 0
+            self._push(now, key, SPAWN)
+            self._cond.notify()
+        return key
+
+    def _dispatch_spawn(self, key, deadline: float, generation: int):
+        """在工作线程中创建即将轮到启动的无人机，完成后安排下一批"""
+        self._dispatch_lag = time.monotonic() - deadline
+        spawner = self._spawners.get(key)
+        if spawner is None:
+            return
+        horizon = time.monotonic() + SPAWN_AHEAD
+        created = []
+        while spawner.index < spawner.total and len(created) < SPAWN_BATCH:
+            login_at = spawner.started + spawner.index * spawner.spacing
+            if login_at > horizon:
+                break
+            config = next(spawner.configs, None)
+            if config is None:
+                spawner.total = spawner.index  # 序列比 len() 短
+                break
+            spawner.index += 1
+            try:
+                client = self.add(config)
+            except (ValueError, TypeError):
+                spawner.failed += 1  # 设备编号重复或参数错误，计入 spawn_stats
+                continue
+            created.append((client.device_code, login_at))
+
+        with self._cond:
+            if not self._alive or self._generation.get(key) != generation:
+                return  # 已停止：已创建的无人机保持停止状态
+            for code, login_at in created:
+                if code in self.clients:
+                    self._start_locked(code, spawner.started, login_at)
+            if spawner.index < spawner.total:
+                next_at = spawner.started + spawner.index * spawner.spacing - SPAWN_AHEAD
+                self._push(max(next_at, time.monotonic()), key, SPAWN)
+            self._cond.notify()
+
+    def spawn_stats(self) -> List[Dict[str, Any]]:
+        """
+        各次 spawn() 的进度
+
+        Returns:
+            list: 每项包含 id, total, created (已创建), failed, pending (尚未创建)
+        """
+        with self._cond:
+            return [{
+                'id': key[1],
+                'total': s.total,
+                'created': s.index - s.failed,
+                'failed': s.failed,
+                'pending': s.total - s.index
+            } for key, s in self._spawners.items()]
+
+    def stop(self, device_code: Optional[int] = None):
+        """
+        停止无人机（已在执行的请求会正常完成）
+
+        Args:
+            device_code: 设备编号，None 表示停止全部
+        """
+        with self._cond:
+            if device_code is None:
+                # 尚未创建的无人机不再创建
+                for key in self._spawners:
+                    self._generation[key] += 1
+            codes = self.clients.keys() if device_code is None else [device_code]
+            for code in list(codes):
+                client = self.clients.get(code)
+                if client is None:
+                    continue
+                client.stop()
+                self._generation[code] += 1
+
+    def resize(self, max_workers: int):
+        """
+        调整工作线程池大小，无需重启机队
+
+        正在执行的任务在旧线程池中完成，之后的任务提交到新线程池。
+        """
+        with self._cond:
+            old = self._executor
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='IVASFleet')
+            self.max_workers = max_workers
+            for client in self.clients.values():
+                self._size_pool(client)
+        old.shutdown(wait=False)
+
+    def _size_pool(self, client: IVASClient):
+        """
+        共享连接池至少与机队并发数一样大 (max_workers，并发 tick 时为 io_workers)，
+        否则超出连接池的并发请求每次都新建连接、用完即关闭
+        """
+        if not client.share_pool:
+            return
+        concurrency = self._io_workers if client.concurrent_tick else self.max_workers
+        if client.pool_size < concurrency:
+            client.pool_size = concurrency
+            if client._pool is not None:
+                client._pool.grow(concurrency)
+
+    def shutdown(self, wait: bool = True):
+        """停止全部无人机并释放调度线程和线程池"""
+        self.stop()
+        with self._cond:
+            self._alive = False
+            self._heap.clear()
+            self._polling.clear()
+            self._cond.notify()
+        if self._scheduler is not None and wait:
+            self._scheduler.join()
+        self._scheduler = None
+        self._executor.shutdown(wait=wait)
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=wait)
+        if self.token_cache is not None:
+            self.token_cache.flush()
+        for spool in {id(c.spool): c.spool for c in self.clients.values() if c.spool is not None}.values():
+            spool.close()
+
+    def running_count(self) -> int:
+        """运行中的无人机数量"""
+        return sum(1 for c in self.clients.values() if c.running)
+
+    # ==================== 调度 ====================
+
+    def _push(self, deadline: float, device_code: int, kind: str):
+        """加入调度堆（调用方需持有 self._cond）"""
+        heapq.heappush(
+            self._heap,
+            (deadline, next(self._seq), device_code, kind, self._generation[device_code])
+        )
+
+    def _ensure_scheduler(self):
+        with self._cond:
+            if self._alive:
+                return
+            self._alive = True
+        self._scheduler = threading.Thread(target=self._schedule_loop, name='IVASFleet-scheduler', daemon=True)
+        self._scheduler.start()
+
+    def _schedule_loop(self):
+        """调度线程：等待最早的截止时间，到期后提交给线程池"""
+        with self._cond:
+            while self._alive:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                deadline = self._heap[0][0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                deadline, _, code, kind, generation = heapq.heappop(self._heap)
+                if self._generation.get(code) != generation:
+                    continue  # 已停止或重新启动，丢弃旧任务
+
+                if kind == POLL:
+                    self._submit(self._dispatch_poll, code, deadline)
+                elif kind == SPAWN:
+                    self._submit(self._dispatch_spawn, code, deadline, generation)
+                else:
+                    self._submit(self._dispatch, self.clients[code], kind, deadline, generation)
+
+    def _submit(self, fn: Callable, *args):
+        """提交任务到线程池，并统计已提交但尚未开始执行的任务数"""
+        with self._queued_lock:
+            self._queued += 1
+        try:
+            self._executor.submit(self._run_job, fn, *args)
+        except RuntimeError:  # 线程池已关闭
+            with self._queued_lock:
+                self._queued -= 1
+            raise
+
+    def _run_job(self, fn: Callable, *args):
+        with self._queued_lock:
+            self._queued -= 1
+        fn(*args)
+
+    def _dispatch(self, client: IVASClient, kind: str, deadline: float, generation: int):
+        """在工作线程中执行一次任务，完成后安排下一次截止时间"""
+        code = client.device_code
+        self._dispatch_lag = time.monotonic() - deadline
+
+        if kind == LOGIN:
+            if not client.login_cached():
+                with self._cond:
+                    if self._generation.get(code) != generation:
+                        return
+                    attempt = self._login_attempts.get(code, 0) + 1
+                    self._login_attempts[code] = attempt
+                    if attempt <= self.login_retries:
+                        # 指数退避 + 随机抖动，避免被限流的登录同时重试
+                        delay = self.login_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                        self._push(time.monotonic() + delay, code, LOGIN)
+                        self._cond.notify()
+                    else:
+                        client.running = False
+                if attempt <= self.login_retries:
+                    client._log('warning', f"登录失败，{delay:.1f} 秒后第 {attempt} 次重试")
+                else:
+                    client._log('error', "初始登录失败，无法启动")
+                return
+            now = client.ticker.reset()
+            refresh_at = client.refresh_deadline()
+            with self._cond:
+                if self._generation.get(code) == generation:
+                    self._push(now, code, REPORT)
+                    if self.task_fanout is None:
+                        self._push(now, code, TASK)
+                    else:
+                        self._schedule_poll(self.task_fanout.key(client), now)
+                    if refresh_at is not None:
+                        self._push(refresh_at, code, REFRESH)
+                    self._cond.notify()
+            return
+
+        if kind == REFRESH:
+            # 401 重新登录可能已经换过 token，此时只需按新的过期时间重新安排
+            if client.refresh_due():
+                client.refresh_token()
+            refresh_at = client.refresh_deadline()
+            if refresh_at is None:
+                return
+            with self._cond:
+                if self._generation.get(code) == generation:
+                    self._push(max(refresh_at, time.monotonic() + 1.0), code, REFRESH)
+                    self._cond.notify()
+            return
+
+        if kind == REPORT:
+            client.ticker.begin()
+            client._adapt_rate()
+        try:
+            if kind == REPORT:
+                client.tick()
+            else:
+                client._poll_task()
+        except Exception as e:
+            client._log('error', f"循环异常: {e}")
+
+        if kind == REPORT:
+            # 截止时间由客户端的 Ticker 推进，统计抖动和错过次数
+            next_deadline = client.ticker.advance()
+        else:
+            next_deadline = max(deadline + client.task_interval, time.monotonic())
+
+        with self._cond:
+            if self._generation.get(code) == generation:
+                self._push(next_deadline, code, kind)
+                self._cond.notify()
+
+    def _schedule_poll(self, key, deadline: float):
+        """分组尚未安排统一轮询时加入调度堆（调用方需持有 self._cond）"""
+        if key in self._polling:
+            return
+        self._polling.add(key)
+        self._generation.setdefault(key, 0)
+        self._push(deadline, key, POLL)
+
+    def _dispatch_poll(self, key, deadline: float):
+        """在工作线程中为一个分组轮询任务并分发，完成后安排下一次轮询"""
+        self._dispatch_lag = time.monotonic() - deadline
+        members = self.task_fanout.members(key)
+        leader = self.task_fanout.leader(members)
+
+        if leader is not None:
+            started = time.monotonic()
+            try:
+                result = leader.fetch_task()
+            except Exception as e:
+                leader._log('error', f"任务轮询异常: {e}")
+                result = None
+            self.task_fanout.deliver(result, members, started)
+
+        with self._cond:
+            if not self._alive:
+                return
+            if not members:
+                # 组内已没有运行中的无人机，下一架登录成功时重新安排
+                self._polling.discard(key)
+                return
+            self._push(max(deadline + leader.task_interval, time.monotonic()), key, POLL)
+            self._cond.notify()
+
+    def task_stats(self) -> Optional[Dict[str, Any]]:
+        """统一任务轮询的分发统计 (见 ivas.tasks.TaskFanout.stats)，逐架轮询时为 None"""
+        return self.task_fanout.stats() if self.task_fanout is not None else None
+
+    def budget_stats(self) -> Optional[Dict[str, Any]]:
+        """请求数预算使用情况 (见 ivas.rate.RateBudget.stats)，未设置 max_rps 时为 None"""
+        return self.rate_budget.stats() if self.rate_budget is not None else None
+
+    def spool_stats(self) -> Optional[Dict[str, Any]]:
+        """失败上报暂存统计 (见 ivas.spool.spool_stats)，未使用暂存时为 None"""
+        return spool_stats(list(self.clients.values()))
+
+    def breaker_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """熔断器状态 (见 ivas.breaker.BreakerBoard.stats)，未启用熔断时为 None"""
+        return breaker_stats(list(self.clients.values()))
+
+    def scheduler_stats(self) -> Dict[str, Any]:
+        """
+        调度器状态
+
+        Returns:
+            dict: pending (调度堆中的任务数), lag (堆顶截止时间已过去的秒数，未到期为 0),
+                  dispatch_lag (最近一次任务从截止时间到开始执行的延迟),
+                  executor_queue (已提交但尚未开始执行的任务数), running (运行中的无人机数),
+                  spawn_pending (spawn() 中尚未创建的无人机数)
+        """
+        with self._cond:
+            pending = len(self._heap)
+            lag = max(0.0, time.monotonic() - self._heap[0][0]) if self._heap else 0.0
+            backlog = self._queued
+            spawn_pending = sum(s.total - s.index for s in self._spawners.values())
+        return {
+            'pending': pending,
+            'lag': lag,
+            'dispatch_lag': self._dispatch_lag,
+            'executor_queue': backlog,
+            'running': self.running_count(),
+            'spawn_pending': spawn_pending
+        }
+
+    def startup_stats(self) -> Dict[str, Any]:
+        """启动耗时汇总：从 start() 到每架无人机第一次位置上报成功 (见 ivas.metrics.startup_stats)"""
+        return startup_stats(list(self.clients.values()))
+
+    def timing_stats(self) -> Dict[int, Dict[str, Any]]:
+        """每架无人机的周期调度统计 (见 IVASClient.timing_stats)"""
+        return {code: client.timing_stats() for code, client in list(self.clients.items())}
+
+    def request_stats(self, per_device: bool = False) -> Dict[str, Any]:
+        """
+        机队请求指标
+
+        Args:
+            per_device: 为 True 时返回 {device_code: 快照}，否则返回合并后的汇总
+
+        Returns:
+            dict: 见 ivas.metrics.ClientMetrics.snapshot / merge_snapshots
+        """
+        clients = list(self.clients.items())
+        if per_device:
+            return {code: client.request_stats() for code, client in clients}
+        return merge_snapshots(client.request_stats() for _, client in clients)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+IVAS 机队规格模块
+
+逐架列出设备配置在上万架无人机时既难以维护，又要在启动前全部解析和创建。FleetSpec 用几行分组描述
+整个机队，按需生成每架无人机的配置：
+1. 每组定义数量或设备编号范围、账号格式、基准坐标 (网格 / 多边形 / 固定点)、高度 (固定值或范围)
+   和本组的上报/任务频率，其余键原样作为客户端参数
+2. 配置按下标计算，不预先展开：len() / 迭代 / spec[i] 的内存占用与机队规模无关
+3. 多边形内的基准坐标以设备编号为随机种子，同一设备每次运行位置相同
+4. 与 IVASFleet.spawn() 配合：无人机在启动窗口轮到时才生成配置、创建客户端
+
+分组格式 (JSON):
+    {
+      "count": 10000,                       // 或 "device_codes": [1, 10000] (含两端)
+      "device_code_start": 1,               // 与 count 搭配，默认接上一组
+      "account": "ZSDX{device_code:05d}",   // 可用字段 device_code, index (组内序号)
+      "grid": {"origin": [39.04, 117.71], "columns": 100, "spacing_m": 50},
+      // 或 "polygon": [[lat, lon], ...]，或 "base_lat": 39.04, "base_lon": 117.71
+      "base_alt": [80, 150],                // 固定值或 [最小, 最大]
+      "report_hz": 10, "task_hz": 0.2,
+      "adaptive_rate": {...}                // 其余键作为客户端参数
+    }
+
+使用示例:
+    spec = FleetSpec(config['drone_groups'], defaults={'password': '000000', 'base_url': url, ...})
+    len(spec)      # 10000
+    spec[0]        # {'device_code': 1, 'account': 'ZSDX00001', 'base_lat': ..., ...}
+    fleet.spawn(spec, ramp_up=60)
+"""
+
+import math
+import random
+from bisect import bisect_right
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+
+# 分组中由 FleetSpec 解释的键，其余键原样作为客户端参数
+SPEC_KEYS = frozenset({
+    'count', 'device_codes', 'device_code_start', 'account',
+    'grid', 'polygon', 'base_lat', 'base_lon', 'base_alt'
+})
+
+DEFAULT_ACCOUNT = 'ZSDX{device_code:03d}'
+
+# 每度纬度对应的米数（网格间距按米配置时换算）
+METERS_PER_DEGREE = 111320.0
+
+
+def _point_in_polygon(lat: float, lon: float, polygon: Sequence[Tuple[float, float]]) -> bool:
+    """射线法判断点是否在多边形内"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lon_i > lon) != (lon_j > lon):
+            cross = lat_i + (lon - lon_i) * (lat_j - lat_i) / (lon_j - lon_i)
+            if lat < cross:
+                inside = not inside
+        j = i
+    return inside
+
+
+class _Group:
+    """一个分组的解析结果（生成配置时只做算术运算）"""
+
+    def __init__(self, spec: Dict[str, Any], first_code: int):
+        codes = spec.get('device_codes')
+        if codes is not None:
+            start, end = codes
+            count = end - start + 1
+            if 'count' in spec and spec['count'] != count:
+                raise ValueError(f"count ({spec['count']}) 与 device_codes {codes} 不一致")
+        else:
+            if 'count' not in spec:
+                raise ValueError(f"分组需要 count 或 device_codes: {spec}")
+            start, count = spec.get('device_code_start', first_code), spec['count']
+        if count <= 0:
+            raise ValueError(f"分组数量必须大于 0: {spec}")
+        self.start = start
+        self.count = count
+        self.account = spec.get('account', DEFAULT_ACCOUNT)
+        self.account.format(device_code=start, index=0)  # 提前检查格式
+
+        self.grid = spec.get('grid')
+        self.polygon = [tuple(p) for p in spec['polygon']] if 'polygon' in spec else None
+        if self.grid is not None:
+            lat, lon = self.grid['origin']
+            self.columns = self.grid.get('columns') or math.ceil(math.sqrt(count))
+            if 'spacing_m' in self.grid:
+                self.d_lat = self.grid['spacing_m'] / METERS_PER_DEGREE
+                self.d_lon = self.d_lat / math.cos(math.radians(lat))
+            else:
+                self.d_lat = self.d_lon = self.grid.get('spacing', 0.001)
+            self.origin = (lat, lon)
+        elif self.polygon is not None:
+            if len(self.polygon) < 3:
+                raise ValueError(f"多边形至少需要 3 个顶点: {self.polygon}")
+            lats = [p[0] for p in self.polygon]
+            lons = [p[1] for p in self.polygon]
+            self.bbox = (min(lats), min(lons), max(lats), max(lons))
+        elif 'base_lat' not in spec or 'base_lon' not in spec:
+            raise ValueError(f"分组需要 grid、polygon 或 base_lat/base_lon: {spec}")
+        else:
+            self.origin = (spec['base_lat'], spec['base_lon'])
+
+        self.alt = spec.get('base_alt', 100.0)
+        self.extra = {key: value for key, value in spec.items() if key not in SPEC_KEYS}
+
+    def position(self, index: int, rng: random.Random) -> Tuple[float, float]:
+        """组内第 index 架的基准坐标"""
+        if self.grid is not None:
+            row, col = divmod(index, self.columns)
+            return self.origin[0] + row * self.d_lat, self.origin[1] + col * self.d_lon
+        if self.polygon is not None:
+            min_lat, min_lon, max_lat, max_lon = self.bbox
+            for _ in range(1000):
+                lat, lon = rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)
+                if _point_in_polygon(lat, lon, self.polygon):
+                    return lat, lon
+            raise ValueError(f"无法在多边形内取点 (多边形面积过小?): {self.polygon}")
+        return self.origin
+
+    def config(self, index: int) -> Dict[str, Any]:
+        """组内第 index 架的配置"""
+        device_code = self.start + index
+        rng = random.Random(device_code)
+        lat, lon = self.position(index, rng)
+        alt = rng.uniform(*self.alt) if isinstance(self.alt, (list, tuple)) else self.alt
+        return {
+            **self.extra,
+            'device_code': device_code,
+            'account': self.account.format(device_code=device_code, index=index),
+            'base_lat': lat,
+            'base_lon': lon,
+            'base_alt': alt
+        }
+
+
+class FleetSpec:
+    """按分组描述的机队，配置按下标生成（只读序列）"""
+
+    def __init__(self, groups: List[Dict[str, Any]], defaults: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            groups: 分组列表 (格式见模块说明)
+            defaults: 所有无人机共用的客户端参数 (password, base_url, coord_range, display_queue 等)，
+                      分组中的同名键优先
+        """
+        if not groups:
+            raise ValueError("机队规格至少需要一个分组")
+        self.defaults = dict(defaults or {})
+        self._groups: List[_Group] = []
+        self._offsets: List[int] = []  # 各分组第一架在整个机队中的下标
+        total = 0
+        next_code = 1
+        for spec in groups:
+            group = _Group(spec, next_code)
+            self._groups.append(group)
+            self._offsets.append(total)
+            total += group.count
+            next_code = group.start + group.count
+        self._total = total
+
+        ranges = sorted((g.start, g.start + g.count - 1) for g in self._groups)
+        for (_, prev_end), (start, end) in zip(ranges, ranges[1:]):
+            if start <= prev_end:
+                raise ValueError(f"设备编号范围重叠: {start}-{end} 与 ...-{prev_end}")
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # 切片直接展开 (ShardedFleet 按 spec[i::n] 分片)
+            return [self[i] for i in range(*index.indices(self._total))]
+        if index < 0:
+            index += self._total
+        if not 0 <= index < self._total:
+            raise IndexError(f"机队下标超出范围: {index}")
+        g = bisect_right(self._offsets, index) - 1
+        config = dict(self.defaults)
+        config.update(self._groups[g].config(index - self._offsets[g]))
+        return config
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self._total):
+            yield self[index]
+
+    def device_codes(self) -> Iterator[int]:
+        """按顺序生成全部设备编号（不创建配置）"""
+        for group in self._groups:
+            yield from range(group.start, group.start + group.count)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        各分组概要
+
+        Returns:
+            list: 每项包含 first, last (设备编号范围), count, report_hz, task_hz
+        """
+        return [{
+            'first': g.start,
+            'last': g.start + g.count - 1,
+            'count': g.count,
+            'report_hz': g.extra.get('report_hz', self.defaults.get('report_hz')),
+            'task_hz': g.extra.get('task_hz', self.defaults.get('task_hz'))
+        } for g in self._groups]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+IVAS 可视化信箱模块
+
+无人机与可视化之间的消息通道，替代 queue.Queue：
+1. 每个 (无人机, 消息类型) 只保留最新一条，消费者落后时新消息覆盖旧消息 (合并)
+2. 生产者永不阻塞：put / put_nowait 立即返回，上报线程不会被渲染拖慢
+3. 统计写入、合并、丢弃和已取出的消息数
+
+与 queue.Queue 接口兼容 (put / put_nowait / get / get_nowait / qsize / empty)，
+消息格式同为 (msg_type, device_code, data)。
+
+使用示例:
+    mailbox = Mailbox()
+    client = IVASClient(..., display_queue=mailbox)
+    msg_type, device_code, data = mailbox.get(timeout=0.1)
+    mailbox.stats()
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class Mailbox:
+    """按 (无人机, 消息类型) 合并的最新值信箱
+
+    未取出的消息按首次写入的顺序出队；同一个键的新消息替换旧消息但保留原来的位置，
+    因此每架无人机的每类消息最多占一个槽位，内存占用与写入速率无关。
+    """
+
+    def __init__(self, maxsize: int = 0):
+        """
+        Args:
+            maxsize: 最多同时保留的键数量，0 表示不限制（键数量本身不超过 无人机数 × 消息类型数）。
+                     已满时新键的消息被丢弃，已有键的消息仍然合并
+        """
+        self.maxsize = maxsize
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._pending: 'OrderedDict[Tuple[Any, str], Any]' = OrderedDict()
+
+        self.puts = 0        # 写入的消息数
+        self.coalesced = 0   # 被同一个键的新消息覆盖、未被取出的消息数
+        self.dropped = 0     # 因 maxsize 已满被丢弃的消息数
+        self.delivered = 0   # 已取出的消息数
+        self._by_type: Dict[str, Dict[str, int]] = {}
+
+    # ==================== 生产者 ====================
+
+    def put(self, item: Tuple[str, Any, Any], block: bool = True, timeout: Optional[float] = None) -> bool:
+        """写入消息（与 queue.Queue.put 签名兼容，但从不阻塞）"""
+        return self.put_nowait(item)
+
+    def put_nowait(self, item: Tuple[str, Any, Any]) -> bool:
+        """
+        写入消息
+
+        Args:
+            item: (msg_type, device_code, data)
+
+        Returns:
+            bool: False 表示消息因 maxsize 已满被丢弃
+        """
+        msg_type, device_code, data = item
+        key = (device_code, msg_type)
+        with self._lock:
+            self.puts += 1
+            counts = self._by_type.get(msg_type)
+            if counts is None:
+                counts = self._by_type[msg_type] = {'puts': 0, 'coalesced': 0, 'dropped': 0}
+            counts['puts'] += 1
+
+            if key in self._pending:
+                self._pending[key] = data
+                self.coalesced += 1
+                counts['coalesced'] += 1
+                return True
+            if self.maxsize and len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                counts['dropped'] += 1
+                return False
+
+            self._pending[key] = data
+            self._not_empty.notify()
+            return True
+
+    # ==================== 消费者 ====================
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Tuple[str, Any, Any]:
+        """
+        取出最早的一条消息
+
+        Returns:
+            (msg_type, device_code, data)
+
+        Raises:
+            queue.Empty: 非阻塞或等待超时后仍没有消息
+        """
+        with self._not_empty:
+            if block:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while not self._pending:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+            elif not self._pending:
+                raise queue.Empty
+
+            (device_code, msg_type), data = self._pending.popitem(last=False)
+            self.delivered += 1
+            return msg_type, device_code, data
+
+    def get_nowait(self) -> Tuple[str, Any, Any]:
+        """非阻塞取出（没有消息时抛出 queue.Empty）"""
+        return self.get(block=False)
+
+    def drain(self) -> list:
+        """一次取出全部消息"""
+        with self._lock:
+            items = [(msg_type, device_code, data) for (device_code, msg_type), data in self._pending.items()]
+            self._pending.clear()
+            self.delivered += len(items)
+        return items
+
+    def qsize(self) -> int:
+        """当前等待取出的消息数"""
+        with self._lock:
+            return len(self._pending)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        信箱统计
+
+        Returns:
+            dict: pending, puts, coalesced, dropped, delivered, by_type ({类型: {puts, coalesced, dropped}})
+        """
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'puts': self.puts,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'delivered': self.delivered,
+                'by_type': {name: dict(counts) for name, counts in self._by_type.items()}
+            }
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+IVAS 请求指标模块
+
+客户端内置的低开销请求统计，按接口 (zsLogin / reportUserData / postTarPos / outdoorTask) 记录：
+1. 按状态码分类的请求数 (HTTP 状态码，异常记为 'error')
+2. 固定桶的延迟直方图，内存占用与请求数无关
+3. 发送字节数 (URL + body) 和接收字节数 (响应 body)
+4. 重新登录次数：401 触发的 (relogins)、过期前后台刷新的 (refreshes)、
+   并发 401 合并到同一次登录的 (relogins_coalesced)
+
+snapshot() 返回可 JSON 序列化的字典，merge_snapshots() 把多架无人机的快照合并为机队汇总，
+quantiles() 从直方图计数 (例如两次快照之差) 估算分位数，
+startup_stats() 汇总机队从启动到每架无人机第一次上报的耗时。
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Any, Iterable, List, Optional
+
+
+ENDPOINTS = ('zsLogin', 'reportUserData', 'postTarPos', 'outdoorTask')
+
+# 延迟直方图桶上界 (ms)，最后还有一个 +Inf 桶
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def endpoint_name(url: str) -> str:
+    """从请求 URL 中取出接口名 (路径最后一段)"""
+    return url.split('?', 1)[0].rsplit('/', 1)[-1]
+
+
+def _quantile(counts: List[int], total: int, max_ms: float, q: float) -> float:
+    """按直方图估算分位数（桶内线性插值，落在 +Inf 桶时返回最大值）"""
+    if total == 0:
+        return 0.0
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if i == len(LATENCY_BUCKETS_MS):
+                return max_ms
+            lower = LATENCY_BUCKETS_MS[i - 1] if i > 0 else 0.0
+            upper = LATENCY_BUCKETS_MS[i]
+            return min(max_ms, lower + (upper - lower) * (rank - seen) / count)
+        seen += count
+    return max_ms
+
+
+def quantiles(counts: List[int], max_ms: float, qs=(0.50, 0.95, 0.99)) -> Dict[str, float]:
+    """
+    按直方图计数估算分位数
+
+    Args:
+        counts: 与 LATENCY_BUCKETS_MS 对应的桶计数 (含 +Inf 桶)
+        max_ms: 落在 +Inf 桶时返回的上限
+        qs: 分位点
+
+    Returns:
+        dict: {'p50': ..., 'p95': ..., 'p99': ...} (毫秒)
+    """
+    total = sum(counts)
+    return {f"p{round(q * 100):g}": _quantile(counts, total, max_ms, q) for q in qs}
+
+
+class _EndpointMetrics:
+    """单个接口的计数和直方图（由 ClientMetrics 加锁访问）"""
+
+    __slots__ = ('requests', 'status', 'bytes_sent', 'bytes_received', 'buckets', 'latency_sum', 'latency_max')
+
+    def __init__(self):
+        self.requests = 0
+        self.status: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return _endpoint_snapshot(
+            self.requests, dict(self.status), self.bytes_sent, self.bytes_received,
+            list(self.buckets), self.latency_sum, self.latency_max
+        )
+
+
+def _endpoint_snapshot(requests, status, bytes_sent, bytes_received, buckets, latency_sum, latency_max):
+    count = sum(buckets)
+    return {
+        'requests': requests,
+        'status': status,
+        'errors': requests - status.get('200', 0),
+        'bytes_sent': bytes_sent,
+        'bytes_received': bytes_received,
+        'latency_ms': {
+            'buckets': list(LATENCY_BUCKETS_MS),
+            'counts': buckets,
+            'count': count,
+            'sum': latency_sum,
+            'max': latency_max,
+            'mean': latency_sum / count if count else 0.0,
+            'p50': _quantile(buckets, count, latency_max, 0.50),
+            'p95': _quantile(buckets, count, latency_max, 0.95),
+            'p99': _quantile(buckets, count, latency_max, 0.99)
+        }
+    }
+
+
+class ClientMetrics:
+    """单个客户端的请求指标
+
+    使用示例:
+        metrics = ClientMetrics()
+        metrics.record('postTarPos', 200, 0.012, sent=512, received=64)
+        metrics.snapshot()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, _EndpointMetrics] = {name: _EndpointMetrics() for name in ENDPOINTS}
+        self.relogins = 0
+        self.refreshes = 0
+        self.relogins_coalesced = 0
+
+    def record(self, endpoint: str, status, elapsed: float, sent: int = 0, received: int = 0):
+        """
+        记录一次请求
+
+        Args:
+            endpoint: 接口名
+            status: HTTP 状态码，请求异常时传 'error'
+            elapsed: 耗时 (秒)
+            sent: 发送字节数
+            received: 接收字节数
+        """
+        ms = elapsed * 1000
+        index = bisect_left(LATENCY_BUCKETS_MS, ms)
+        key = str(status)
+        with self._lock:
+            m = self._endpoints.get(endpoint)
+            if m is None:
+                m = self._endpoints[endpoint] = _EndpointMetrics()
+            m.requests += 1
+            m.status[key] = m.status.get(key, 0) + 1
+            m.bytes_sent += sent
+            m.bytes_received += received
+            m.buckets[index] += 1
+            m.latency_sum += ms
+            if ms > m.latency_max:
+                m.latency_max = ms
+
+    def record_relogin(self, background: bool = False):
+        """
+        记录一次重新登录
+
+        Args:
+            background: True 表示过期前的后台刷新，False 表示请求返回 401 后的重新登录
+        """
+        with self._lock:
+            if background:
+                self.refreshes += 1
+            else:
+                self.relogins += 1
+
+    def record_coalesced(self):
+        """记录一次 401 合并到其他请求已完成的登录（未重复登录）"""
+        with self._lock:
+            self.relogins_coalesced += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        指标快照
+
+        Returns:
+            dict: endpoints (每个接口的 requests / status / errors / bytes_sent / bytes_received / latency_ms),
+                  relogins, refreshes, relogins_coalesced
+        """
+        with self._lock:
+            return {
+                'endpoints': {name: m.snapshot() for name, m in self._endpoints.items()},
+                'relogins': self.relogins,
+                'refreshes': self.refreshes,
+                'relogins_coalesced': self.relogins_coalesced
+            }
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合并多个 ClientMetrics.snapshot() 的结果（用于机队汇总）
+
+    Returns:
+        dict: 与 snapshot() 结构相同，另有 clients 表示合并的快照数
+    """
+    merged: Dict[str, list] = {}
+    counters = {'relogins': 0, 'refreshes': 0, 'relogins_coalesced': 0}
+    clients = 0
+
+    for snap in snapshots:
+        clients += 1
+        for key in counters:
+            counters[key] += snap.get(key, 0)
+        for name, ep in snap['endpoints'].items():
+            acc = merged.get(name)
+            if acc is None:
+                acc = merged[name] = [0, {}, 0, 0, [0] * (len(LATENCY_BUCKETS_MS) + 1), 0.0, 0.0]
+            acc[0] += ep['requests']
+            for status, count in ep['status'].items():
+                acc[1][status] = acc[1].get(status, 0) + count
+            acc[2] += ep['bytes_sent']
+            acc[3] += ep['bytes_received']
+            for i, count in enumerate(ep['latency_ms']['counts']):
+                acc[4][i] += count
+            acc[5] += ep['latency_ms']['sum']
+            acc[6] = max(acc[6], ep['latency_ms']['max'])
+
+    result = {'endpoints': {name: _endpoint_snapshot(*acc) for name, acc in merged.items()}}
+    result.update(counters)
+    result['clients'] = clients
+    return result
+
+
+def startup_stats(clients: Iterable[Any]) -> Dict[str, Any]:
+    """
+    机队启动耗时汇总（基于 IVASClient.time_to_first_report）
+
+    Returns:
+        dict: drones, reported (已完成第一次上报的数量),
+              time_to_first_report (p50 / p95 / max 秒),
+              all_reported_in (全部完成第一次上报的耗时，尚未全部完成时为 None)
+    """
+    clients = list(clients)
+    return startup_summary((c.time_to_first_report() for c in clients), len(clients))
+
+
+def startup_summary(samples: Iterable[Optional[float]], drones: int) -> Dict[str, Any]:
+    """
+    由启动耗时样本生成启动汇总（多进程机队在父进程中合并各分片的样本时使用）
+
+    Args:
+        samples: 各无人机启动到第一次上报的耗时 (秒)，None 表示尚未完成
+        drones: 无人机总数
+
+    Returns:
+        dict: 同 startup_stats
+    """
+    samples = sorted(t for t in samples if t is not None)
+    count = len(samples)
+
+    def pick(q):
+        return samples[min(count - 1, int(q * count))] if count else None
+
+    return {
+        'drones': drones,
+        'reported': count,
+        'time_to_first_report': {
+            'p50': pick(0.50),
+            'p95': pick(0.95),
+            'max': samples[-1] if count else None
+        },
+        'all_reported_in': samples[-1] if drones and count == drones else None
+    }
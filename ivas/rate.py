@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+IVAS 速率控制模块
+
+report_hz / task_hz 默认在客户端整个生命周期内固定，服务器变慢时所有无人机仍按满速发送，
+只会让服务器更慢。本模块提供两种可选的控制：
+1. AdaptiveRate：每架无人机按 AIMD (加性增、乘性减) 在 [min_hz, max_hz] 内调整上报频率
+   - 每个控制周期统计本无人机的请求：出现超时/连接错误、5xx、429，或平均延迟超过 latency_ms 时
+     频率乘以 decrease，否则加上 increase
+   - 当前有效频率通过 effective_hz() / timing_stats() 暴露，机队汇总后可以找到服务器的拐点
+2. RateBudget：整个机队共享的每秒请求数预算 (令牌桶)
+   - 请求前预约令牌，需要等待时在预约时间发送；需要等待超过 max_wait 时放弃本次请求，计入 throttled
+
+使用示例:
+    client = IVASClient(..., report_hz=50, adaptive_rate={'min_hz': 1, 'max_hz': 100, 'latency_ms': 200})
+    client.effective_hz()
+
+    fleet = IVASFleet(device_configs, max_rps=5000)
+    fleet.budget_stats()   # {'rps': 5000, 'granted': ..., 'throttled': ..., 'waited_s': ...}
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from .breaker import is_failure
+
+
+class AdaptiveRate:
+    """AIMD 频率控制器（线程安全）
+
+    observe() 在每次请求完成时调用，update() 在每个周期开始时调用，
+    距上次调整满 period 秒后才根据这段时间的请求做一次决定。
+    """
+
+    def __init__(
+        self,
+        hz: float,
+        min_hz: Optional[float] = None,
+        max_hz: Optional[float] = None,
+        latency_ms: float = 250.0,
+        increase: Optional[float] = None,
+        decrease: float = 0.5,
+        period: float = 1.0
+    ):
+        """
+        Args:
+            hz: 初始频率 (Hz)，即客户端的 report_hz
+            min_hz: 频率下限，默认 hz / 10
+            max_hz: 频率上限，默认 hz
+            latency_ms: 平均延迟超过该值视为拥塞 (毫秒)
+            increase: 每个控制周期没有拥塞时增加的频率，默认 max_hz / 20
+            decrease: 拥塞时频率乘以的系数 (0 ~ 1)
+            period: 控制周期 (秒)
+        """
+        self.max_hz = max_hz if max_hz is not None else hz
+        self.min_hz = min_hz if min_hz is not None else hz / 10
+        if not 0 < self.min_hz <= self.max_hz:
+            raise ValueError(f"频率范围无效: [{self.min_hz}, {self.max_hz}]")
+        if not 0 < decrease < 1:
+            raise ValueError(f"decrease 必须在 0 和 1 之间: {decrease}")
+        self.hz = min(max(hz, self.min_hz), self.max_hz)
+        self.latency_ms = latency_ms
+        self.increase = increase if increase is not None else self.max_hz / 20
+        self.decrease = decrease
+        self.period = period
+
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._requests = 0
+        self._errors = 0
+        self._latency_sum = 0.0
+
+        self.increases = 0   # 加性增次数
+        self.decreases = 0   # 乘性减次数
+        self.last_reason = None  # 最近一次减速的原因: 'error' / 'latency'
+
+    def observe(self, status, elapsed: float):
+        """
+        记录一次请求结果
+
+        Args:
+            status: HTTP 状态码，请求异常 (超时、连接错误) 时为 'error'
+            elapsed: 耗时 (秒)
+        """
+        congested = is_failure(status)
+        with self._lock:
+            self._requests += 1
+            self._latency_sum += elapsed
+            if congested:
+                self._errors += 1
+
+    def update(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        控制周期结束时调整频率
+
+        Returns:
+            float: 调整后的频率，本次没有调整时为 None
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now - self._window_start < self.period or not self._requests:
+                return None
+            requests, errors, latency_sum = self._requests, self._errors, self._latency_sum
+            self._window_start = now
+            self._requests = self._errors = 0
+            self._latency_sum = 0.0
+
+            old = self.hz
+            if errors or latency_sum / requests * 1000 > self.latency_ms:
+                self.last_reason = 'error' if errors else 'latency'
+                self.hz = max(self.min_hz, self.hz * self.decrease)
+                self.decreases += self.hz != old
+            else:
+                self.hz = min(self.max_hz, self.hz + self.increase)
+                self.increases += self.hz != old
+            return self.hz if self.hz != old else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        控制器状态
+
+        Returns:
+            dict: effective_hz, min_hz, max_hz, increases, decreases, last_reason
+        """
+        with self._lock:
+            return {
+                'effective_hz': self.hz,
+                'min_hz': self.min_hz,
+                'max_hz': self.max_hz,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'last_reason': self.last_reason
+            }
+
+
+class RateBudget:
+    """全局每秒请求数预算（令牌桶，线程安全，同步和异步客户端共用）
+
+    reserve() 只计算需要等待的时间，由调用方 time.sleep 或 await asyncio.sleep，
+    因此同一个预算可以同时被线程池机队和事件循环使用。令牌不足时按调用顺序排队 (允许欠账)，
+    排队时间超过 max_wait 的请求被拒绝并归还令牌。
+    """
+
+    def __init__(self, rps: float, burst: Optional[float] = None, max_wait: float = 1.0):
+        """
+        Args:
+            rps: 每秒请求数上限
+            burst: 令牌桶容量，默认 rps 的 10% (至少 1)
+            max_wait: 单个请求最多等待的时间 (秒)，超过则放弃本次请求
+        """
+        if rps <= 0:
+            raise ValueError(f"rps 必须大于 0: {rps}")
+        self.rps = rps
+        self.burst = burst if burst is not None else max(1.0, rps / 10)
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+        self.granted = 0      # 获得令牌的请求数
+        self.throttled = 0    # 因等待过久被放弃的请求数
+        self.waited = 0.0     # 累计等待时间 (秒)
+
+    def reserve(self, n: float = 1) -> Optional[float]:
+        """
+        预约 n 个令牌
+
+        Returns:
+            float: 需要等待的秒数 (0 表示立即发送)，None 表示超过 max_wait，请求应被放弃
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rps)
+            self._updated = now
+            self._tokens -= n
+            delay = -self._tokens / self.rps if self._tokens < 0 else 0.0
+            if delay > self.max_wait:
+                self._tokens += n
+                self.throttled += 1
+                return None
+            self.granted += 1
+            self.waited += delay
+            return delay
+
+    def acquire(self, n: float = 1) -> bool:
+        """同步获取令牌（阻塞到预约时间），返回 False 表示请求应被放弃"""
+        delay = self.reserve(n)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        预算使用情况
+
+        Returns:
+            dict: rps, burst, granted, throttled, waited_s (累计等待秒数)
+        """
+        with self._lock:
+            return {
+                'rps': self.rps,
+                'burst': self.burst,
+                'granted': self.granted,
+                'throttled': self.throttled,
+                'waited_s': self.waited
+            }
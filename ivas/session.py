@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+IVAS HTTP 连接池模块
+
+为客户端提供持久化 keep-alive 连接：
+1. 每个客户端持有独立的 requests.Session 连接池
+2. 可选：相同 base_url 的客户端共享同一个连接池
+3. 统计连接复用命中/未命中次数，确认连接确实被复用
+"""
+
+import threading
+from typing import Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager
+
+
+class PoolStats:
+    """连接池命中统计
+
+    - hits: 从池中取到仍然存活的连接（复用成功）
+    - misses: 需要新建 TCP 连接（池为空或连接已断开）
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, reused: bool):
+        """记录一次取连接的结果"""
+        with self._lock:
+            if reused:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前统计快照"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0
+        }
+
+
+class _CountingPoolMixin:
+    """在取连接时判断连接是否复用（已有 socket 即为复用）"""
+
+    stats = None
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        if self.stats is not None:
+            self.stats.record(getattr(conn, 'sock', None) is not None)
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _CountingPoolManager(PoolManager):
+    """为新建的连接池挂载统计对象"""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.stats = self.stats
+        return pool
+
+
+class _CountingAdapter(HTTPAdapter):
+    """带命中统计的 HTTPAdapter"""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+        self.poolmanager = _CountingPoolManager(
+            self.stats,
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            **pool_kwargs
+        )
+
+
+class HTTPPool:
+    """持久化 HTTP 连接池
+
+    封装一个 requests.Session，所有请求复用 keep-alive 连接。
+
+    使用方式：
+        pool = HTTPPool(pool_size=4)                      # 独立连接池
+        pool = HTTPPool.shared('http://host:5001', 64)    # 按 base_url 共享
+        resp = pool.session.post(url, json=payload)
+        pool.stats()                                      # {'hits': .., 'misses': .., 'hit_rate': ..}
+    """
+
+    _shared: Dict[str, 'HTTPPool'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_size: int = 4, pool_block: bool = False):
+        """
+        Args:
+            pool_size: 每个主机保持的最大空闲连接数
+            pool_block: 连接数达到上限时是否阻塞等待（False 则临时新建连接）
+        """
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self._stats = PoolStats()
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self._adapter = None
+        self._mount(pool_size)
+
+    def _mount(self, pool_size: int):
+        old = self._adapter
+        self._adapter = _CountingAdapter(
+            self._stats,
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            pool_block=self.pool_block
+        )
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        if old is not None:
+            old.close()
+
+    def grow(self, pool_size: int) -> bool:
+        """
+        扩大连接池（只增不减）
+
+        换用新的 adapter，旧 adapter 中的空闲连接被关闭；通常在机队启动前调用，代价可以忽略。
+
+        Returns:
+            bool: 是否扩大了
+        """
+        with self._lock:
+            if pool_size <= self.pool_size:
+                return False
+            self.pool_size = pool_size
+            self._mount(pool_size)
+            return True
+
+    @classmethod
+    def shared(cls, base_url: str, pool_size: int = 4) -> 'HTTPPool':
+        """
+        获取 base_url 对应的共享连接池，不存在时创建
+
+        Args:
+            base_url: 服务器地址
+            pool_size: 连接池大小；已存在的共享连接池小于该值时扩大 (取各客户端请求的最大值)
+
+        Returns:
+            HTTPPool: 同一 base_url 始终返回同一个实例
+        """
+        key = base_url.rstrip('/')
+        with cls._shared_lock:
+            pool = cls._shared.get(key)
+            if pool is None:
+                pool = cls(pool_size=pool_size)
+                cls._shared[key] = pool
+        pool.grow(pool_size)
+        return pool
+
+    @classmethod
+    def close_shared(cls):
+        """关闭并清空所有共享连接池"""
+        with cls._shared_lock:
+            pools = list(cls._shared.values())
+            cls._shared.clear()
+        for pool in pools:
+            pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """连接复用统计"""
+        return self._stats.snapshot()
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
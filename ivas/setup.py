@@ -43,6 +43,18 @@ setup(
         'requests>=2.25.0',
     ],
     extras_require={
+        'async': [
+            'aiohttp>=3.8',
+        ],
+        'batch': [
+            'numpy>=1.17',
+        ],
+        'store': [
+            'numpy>=1.17',
+        ],
+        'fast': [
+            'orjson>=3.6',
+        ],
         'dev': [
             'pytest>=6.0',
             'pytest-cov>=2.0',
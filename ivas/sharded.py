@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+IVAS 多进程机队模块
+
+单个事件循环 (或单进程的线程池) 只能用满一个 CPU 核心，机队规模受限于一个核心能生成的请求数。
+ShardedFleet 把设备配置按编号交错分配到多个工作进程，每个进程运行一个完整的
+AsyncFleetRunner (或 IVASFleet)：
+1. 分片：第 i 个进程负责 device_configs[i::processes]，各进程之间没有共享状态，吞吐随核心数近似线性增长
+2. 汇总：工作进程按 report_interval 通过管道发送本分片的请求指标、周期统计和启动耗时，
+   父进程合并为机队汇总 (fleet_stats / request_stats / startup_stats / shard_stats)
+3. 停止：父进程通过控制管道通知各进程，各进程停止全部客户端、关闭会话并发送最终统计后退出；
+   超时未退出的进程被强制终止。父进程意外退出时控制管道关闭，工作进程同样停止
+4. 工作进程忽略 SIGINT，Ctrl+C 只由父进程处理，保证按上述顺序退出
+
+FleetSummary 与 MetricsExporter 通过 fleet_stats() 读取汇总，可直接用于 ShardedFleet。
+
+注意：设备配置会被序列化后传给工作进程，必须可以 pickle —— display_queue、traffic_recorder、
+telemetry_store 等进程内对象不能跨进程使用。token_cache 按分片使用各自的文件
+(token_cache.json → token_cache.0.json, token_cache.1.json, ...)，避免多个进程同时改写同一个文件；
+失败上报暂存目录 (runner_options 的 spool) 同样按分片区分 (spool → spool.0, spool.1, ...)。
+
+使用示例:
+    fleet = ShardedFleet(device_configs, processes=8, runner_options={'connection_limit': 512})
+    fleet.start()
+    fleet.wait(duration=60)
+    fleet.stop()
+    print(fleet.fleet_stats()['requests'])
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import traceback
+from multiprocessing.connection import wait as wait_connections
+from typing import Dict, Any, List, Optional
+
+from .metrics import merge_snapshots, startup_summary
+from .summary import aggregate_timing, merge_timing
+from .spool import spool_stats, merge_spool_stats
+from .breaker import breaker_stats, merge_breaker_stats
+
+
+ASYNC = 'async'
+THREADS = 'threads'
+
+# 周期统计需要对每架无人机的抖动样本排序，开销较大，每隔约 TICKS_PERIOD 秒才随消息发送一次
+TICKS_PERIOD = 10.0
+
+
+# ==================== 工作进程 ====================
+
+def _shard_path(path: Optional[str], index: int) -> Optional[str]:
+    """token_cache.json → token_cache.<index>.json，目录 spool/ → spool.<index>"""
+    if not path:
+        return path
+    root, ext = os.path.splitext(path.rstrip('/\\'))
+    return f"{root}.{index}{ext}"
+
+
+def _shard_snapshot(index: int, clients: list, ticks: bool) -> Dict[str, Any]:
+    """本分片的统计消息"""
+    snapshot = {
+        'shard': index,
+        'pid': os.getpid(),
+        'time': time.time(),
+        'drones': len(clients),
+        'running': sum(1 for client in clients if client.running),
+        'requests': merge_snapshots(client.request_stats() for client in clients),
+        'startup_samples': [client.time_to_first_report() for client in clients]
+    }
+    adaptive = [client for client in clients if client.rate_control is not None]
+    if adaptive:
+        snapshot['effective_hz'] = sum(client.effective_hz() for client in adaptive)
+    spool = spool_stats(clients)
+    if spool is not None:
+        snapshot['spool'] = spool
+    breakers = breaker_stats(clients)
+    if breakers is not None:
+        snapshot['breakers'] = breakers
+    if ticks:
+        snapshot['ticks'] = aggregate_timing(client.timing_stats() for client in clients)
+    return snapshot
+
+
+def _shard_main(
+    index: int,
+    configs: List[Dict[str, Any]],
+    engine: str,
+    options: Dict[str, Any],
+    conn,
+    control,
+    interval: float
+):
+    """工作进程入口：运行一个分片直到控制管道收到停止通知或被关闭"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    options = dict(options)
+    options['token_cache'] = _shard_path(options.get('token_cache'), index)
+    if options.get('spool'):
+        options['spool'] = _shard_path(options['spool'], index)
+    ticks_every = max(1, round(TICKS_PERIOD / interval))
+    clients = lambda: []
+
+    def send(kind: str, payload) -> bool:
+        try:
+            conn.send((kind, payload))
+            return True
+        except OSError:
+            return False  # 父进程已退出
+
+    def stopped(timeout: float) -> bool:
+        # 收到任何消息或管道关闭 (父进程已退出) 都视为停止
+        return control.poll(timeout)
+
+    def report_until_stopped():
+        count = 0
+        while not stopped(interval):
+            if not send('stats', _shard_snapshot(index, clients(), ticks=count % ticks_every == 0)):
+                return
+            count += 1
+
+    try:
+        if engine == THREADS:
+            from .fleet import IVASFleet
+
+            fleet = IVASFleet(configs, **options)
+            clients = lambda: list(fleet.clients.values())
+            fleet.start()
+            try:
+                report_until_stopped()
+            finally:
+                fleet.shutdown()
+        else:
+            import asyncio
+            from .aio import AsyncFleetRunner
+
+            runner = AsyncFleetRunner(configs, **options)
+            clients = lambda: list(runner.clients)
+
+            async def run():
+                loop = asyncio.get_running_loop()
+                task = asyncio.create_task(runner.run())
+                await asyncio.sleep(0)  # run() 先创建停止事件，之后 stop() 才有效
+
+                def reporter():
+                    try:
+                        report_until_stopped()
+                    finally:
+                        loop.call_soon_threadsafe(runner.stop)
+
+                thread = threading.Thread(target=reporter, name='IVAS-shard-report', daemon=True)
+                thread.start()
+                await task
+                thread.join()
+
+            asyncio.run(run())
+
+        send('done', _shard_snapshot(index, clients(), ticks=True))
+    except Exception:
+        send('error', traceback.format_exc())
+    finally:
+        conn.close()
+        control.close()
+
+
+# ==================== 父进程 ====================
+
+class ShardedFleet:
+    """多进程机队
+
+    使用示例:
+        fleet = ShardedFleet(device_configs, processes=4, engine='async')
+        fleet.start()
+        try:
+            fleet.wait()          # 直到 Ctrl+C 或全部工作进程退出
+        except KeyboardInterrupt:
+            pass
+        fleet.stop()
+    """
+
+    def __init__(
+        self,
+        device_configs: List[Dict[str, Any]],
+        processes: Optional[int] = None,
+        engine: str = ASYNC,
+        runner_options: Optional[Dict[str, Any]] = None,
+        report_interval: float = 1.0,
+        start_method: str = 'spawn'
+    ):
+        """
+        Args:
+            device_configs: 设备配置列表（必须可以 pickle）
+            processes: 工作进程数，默认 CPU 核心数，不超过设备数
+            engine: 'async' 每个进程运行 AsyncFleetRunner，'threads' 每个进程运行 IVASFleet
+            runner_options: 传给 AsyncFleetRunner / IVASFleet 的关键字参数 (connection_limit、ramp_up 等)
+            report_interval: 工作进程发送统计的间隔 (秒)
+            start_method: multiprocessing 启动方式，默认 spawn（父进程中已有线程时 fork 不安全）
+        """
+        if engine not in (ASYNC, THREADS):
+            raise ValueError(f"未知的 engine: {engine}")
+        self.device_configs = list(device_configs)
+        self.processes = max(1, min(processes or os.cpu_count() or 1, len(self.device_configs) or 1))
+        self.engine = engine
+        self.runner_options = dict(runner_options or {})
+        self.report_interval = report_interval
+
+        # 停止通知使用每个进程单独的控制管道而不是共享的 Event：
+        # 工作进程在等待 Event 时被强制杀死会使其内部锁失效，之后 set() 会一直阻塞
+        self._ctx = multiprocessing.get_context(start_method)
+        self._workers: List[multiprocessing.Process] = []
+        self._conns: Dict[Any, int] = {}  # 统计管道接收端 → 分片编号
+        self._controls: List[Any] = []    # 控制管道发送端
+
+        self._lock = threading.Lock()
+        self._latest: Dict[int, Dict[str, Any]] = {}  # 各分片最近一次统计
+        self._ticks: Dict[int, Dict[str, Any]] = {}   # 各分片最近一次周期统计
+        self._done: Dict[int, bool] = {}
+        self._errors: Dict[int, str] = {}
+        self._collector: Optional[threading.Thread] = None
+
+    # ==================== 进程管理 ====================
+
+    def start(self) -> 'ShardedFleet':
+        """启动全部工作进程"""
+        for index in range(self.processes):
+            configs = self.device_configs[index::self.processes]
+            options = dict(self.runner_options)
+            if options.get('max_rps'):
+                # 机队请求数预算按各分片的无人机数分配
+                options['max_rps'] = options['max_rps'] * len(configs) / len(self.device_configs)
+            if options.get('spool'):
+                # 补发速率同样按无人机数分配
+                options['spool_rps'] = options.get('spool_rps', 50.0) * len(configs) / len(self.device_configs)
+            recv_conn, send_conn = self._ctx.Pipe(duplex=False)
+            control_recv, control_send = self._ctx.Pipe(duplex=False)
+            worker = self._ctx.Process(
+                target=_shard_main,
+                args=(index, configs, self.engine, options, send_conn,
+                      control_recv, self.report_interval),
+                name=f"IVAS-shard-{index}",
+                daemon=True
+            )
+            worker.start()
+            send_conn.close()  # 父进程不持有发送端，工作进程退出后接收端才能读到 EOF
+            control_recv.close()
+            self._workers.append(worker)
+            self._controls.append(control_send)
+            self._conns[recv_conn] = index
+            self._done[index] = False
+
+        self._collector = threading.Thread(target=self._collect_loop, name='IVAS-shard-collect', daemon=True)
+        self._collector.start()
+        return self
+
+    def _collect_loop(self):
+        """接收各工作进程的统计，直到全部管道关闭"""
+        pending = list(self._conns)
+        while pending:
+            for conn in wait_connections(pending, timeout=0.5):
+                index = self._conns[conn]
+                try:
+                    kind, payload = conn.recv()
+                except (EOFError, OSError):
+                    pending.remove(conn)
+                    conn.close()
+                    continue
+                with self._lock:
+                    if kind == 'error':
+                        self._errors[index] = payload
+                        continue
+                    self._latest[index] = payload
+                    if 'ticks' in payload:
+                        self._ticks[index] = payload['ticks']
+                    if kind == 'done':
+                        self._done[index] = True
+
+    def wait(self, duration: Optional[float] = None) -> bool:
+        """
+        阻塞等待
+
+        Args:
+            duration: 最长等待时间 (秒)，None 表示直到全部工作进程退出
+
+        Returns:
+            bool: 全部工作进程均已退出
+        """
+        deadline = None if duration is None else time.monotonic() + duration
+        while any(worker.is_alive() for worker in self._workers):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(0.2 if remaining is None else min(0.2, remaining))
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """
+        停止全部工作进程：通知停止、等待最终统计，超时后强制终止
+
+        Args:
+            timeout: 等待工作进程正常退出的时间 (秒)
+        """
+        for control in self._controls:
+            try:
+                control.send('stop')
+            except OSError:
+                pass  # 工作进程已退出
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+                worker.join(1.0)
+        for control in self._controls:
+            control.close()
+        self._controls = []
+        if self._collector is not None:
+            self._collector.join(1.0)
+
+    @property
+    def running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    # ==================== 统计 ====================
+
+    def fleet_stats(self, ticks: bool = True) -> Dict[str, Any]:
+        """
+        机队汇总（各分片最近一次统计的合并结果）
+
+        Args:
+            ticks: 是否包含周期统计
+
+        Returns:
+            dict: drones, running, requests (合并的请求指标), ticks (见 ivas.summary.aggregate_timing)
+        """
+        with self._lock:
+            latest = list(self._latest.values())
+            shard_ticks = list(self._ticks.values())
+        stats = {
+            'drones': len(self.device_configs),
+            'running': sum(s['running'] for s in latest),
+            'requests': merge_snapshots(s['requests'] for s in latest)
+        }
+        if any('effective_hz' in s for s in latest):
+            stats['effective_hz'] = sum(s.get('effective_hz', 0.0) for s in latest)
+        if ticks:
+            stats['ticks'] = merge_timing(shard_ticks)
+        return stats
+
+    def request_stats(self, per_shard: bool = False) -> Dict[str, Any]:
+        """
+        机队请求指标
+
+        Args:
+            per_shard: 为 True 时返回 {分片编号: 快照}，否则返回合并后的汇总
+
+        Returns:
+            dict: 见 ivas.metrics.ClientMetrics.snapshot / merge_snapshots
+        """
+        with self._lock:
+            latest = dict(self._latest)
+        if per_shard:
+            return {index: s['requests'] for index, s in sorted(latest.items())}
+        return merge_snapshots(s['requests'] for s in latest.values())
+
+    def startup_stats(self) -> Dict[str, Any]:
+        """启动耗时汇总 (见 ivas.metrics.startup_stats)"""
+        with self._lock:
+            latest = list(self._latest.values())
+        samples = [t for s in latest for t in s['startup_samples']]
+        return startup_summary(samples, len(self.device_configs))
+
+    def spool_stats(self) -> Optional[Dict[str, Any]]:
+        """各分片失败上报暂存的合并统计 (见 ivas.spool.merge_spool_stats)，未使用暂存时为 None"""
+        with self._lock:
+            latest = list(self._latest.values())
+        return merge_spool_stats(s.get('spool') for s in latest)
+
+    def breaker_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """各分片熔断器的合并状态 (见 ivas.breaker.merge_breaker_stats)，未启用熔断时为 None"""
+        with self._lock:
+            latest = list(self._latest.values())
+        return merge_breaker_stats(s.get('breakers') for s in latest)
+
+    def shard_stats(self) -> List[Dict[str, Any]]:
+        """
+        各分片状态
+
+        Returns:
+            list: 每项包含 shard, pid, alive, exitcode, drones, running, requests, errors,
+                  age_s (距最近一次统计的秒数), done (已发送最终统计), error (异常信息)
+        """
+        now = time.time()
+        rows = []
+        with self._lock:
+            for index, worker in enumerate(self._workers):
+                latest = self._latest.get(index)
+                endpoints = latest['requests']['endpoints'].values() if latest else ()
+                rows.append({
+                    'shard': index,
+                    'pid': worker.pid,
+                    'alive': worker.is_alive(),
+                    'exitcode': worker.exitcode,
+                    'drones': len(self.device_configs[index::self.processes]),
+                    'running': latest['running'] if latest else 0,
+                    'requests': sum(ep['requests'] for ep in endpoints),
+                    'errors': sum(ep['errors'] for ep in endpoints),
+                    'age_s': now - latest['time'] if latest else None,
+                    'done': self._done.get(index, False),
+                    'error': self._errors.get(index)
+                })
+        return rows
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+IVAS 上报暂存 (store-and-forward) 模块
+
+服务器故障期间，请求异常或返回 5xx / 429 / 401 的位置和目标上报原本直接丢弃，整段航迹随之丢失。
+ReportSpool 把这些上报追加到磁盘上的分段队列，服务器恢复后按限定速率补发：
+1. 分段文件 <path>/<序号>.seg 只追加写入，读到末尾的旧分段直接删除；总大小超过 max_bytes 时
+   丢弃最旧的分段（保留最近的数据），计入 dropped
+2. 读取位置保存在 <path>/cursor，进程重启后从上次的位置继续补发（至少一次，崩溃时可能重复少量记录）
+3. 健康判断：最近一次请求成功、且距最近一次失败超过 recovery_delay 秒后才开始补发
+4. 补发以 drain_rps 的速率单路串行进行，实时上报不排队等待补发；补发失败的记录重新追加到队尾
+5. 统计积压记录数和字节数、暂存/补发/丢弃计数和最近 10 秒的实际补发速率
+
+记录格式（小端序）：
+    记录长度 (u32) | device_code (u32) | 暂存时间 (f64, Unix 秒) | 接口编号 (u8)
+    | URL 长度 (u32) | body 长度 (u32) | URL | body
+
+同步客户端 (IVASClient / IVASFleet) 由本模块的后台线程补发，AsyncFleetRunner 在事件循环中补发。
+
+使用示例:
+    spool = ReportSpool('spool/', max_bytes=256 << 20, drain_rps=50)
+    client = IVASClient(..., spool=spool)
+    ...
+    spool.stats()   # {'depth': 1200, 'bytes': 315000, 'drained': 5400, 'drain_rate': 49.8, ...}
+    spool.close()
+"""
+
+import inspect
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional
+
+
+HEADER = struct.Struct('<IIdBII')
+CURSOR = struct.Struct('<QQ')  # 分段序号, 偏移
+
+# 接口编号（写入文件，只能追加不能修改）
+ENDPOINT_IDS = {'reportUserData': 1, 'postTarPos': 2}
+ENDPOINT_NAMES = {value: key for key, value in ENDPOINT_IDS.items()}
+
+# 需要暂存的响应状态码：网络异常 (None) 之外，服务器错误、限流和重新登录后仍未授权
+RETRY_STATUS = frozenset({401, 429, 500, 502, 503, 504})
+
+# 计算实际补发速率的时间窗口 (秒)
+RATE_WINDOW = 10.0
+
+
+def should_spool(resp) -> bool:
+    """上报失败后是否需要暂存（其他 4xx 重发也不会成功，不暂存）"""
+    return resp is None or resp.status_code in RETRY_STATUS
+
+
+class SpoolRecord(NamedTuple):
+    """暂存的一条上报"""
+    device_code: int
+    spooled_at: float
+    endpoint: str
+    url: str
+    body: Optional[bytes]
+
+
+class _Segment:
+    __slots__ = ('seq', 'path', 'size', 'records')
+
+    def __init__(self, seq: int, path: str, size: int = 0, records: int = 0):
+        self.seq = seq
+        self.path = path
+        self.size = size
+        self.records = records
+
+
+class ReportSpool:
+    """有界磁盘分段队列 + 限速补发（线程安全，整个机队共用一个实例）"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 256 << 20,
+        segment_bytes: int = 4 << 20,
+        drain_rps: float = 50.0,
+        recovery_delay: float = 2.0
+    ):
+        """
+        Args:
+            path: 暂存目录
+            max_bytes: 磁盘占用上限 (字节)，超过时丢弃最旧的分段
+            segment_bytes: 单个分段文件的大小 (字节)
+            drain_rps: 恢复后补发的速率 (条/秒)
+            recovery_delay: 最近一次失败之后等待多少秒才开始补发
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.drain_rps = drain_rps
+        self.recovery_delay = recovery_delay
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._segments: deque = deque()
+        self._writer = None
+        self._reader = None
+        self._read_seq = None
+        self._read_offset = 0
+        self._read_records = 0   # 第一个分段中已读取的记录数
+        self._cursor_dirty = False
+
+        self.spooled = 0     # 暂存的记录数
+        self.drained = 0     # 补发成功的记录数
+        self.requeued = 0    # 补发失败、重新追加到队尾的记录数
+        self.dropped = 0     # 超出 max_bytes 被丢弃的记录数
+        self.orphaned = 0    # 找不到对应无人机、无法补发的记录数
+        self.rejected = 0    # 补发时服务器返回其他 4xx、不再重试的记录数
+        self._drain_times: deque = deque()
+
+        self._last_success = 0.0
+        self._last_failure = 0.0
+
+        self._clients: Dict[int, Any] = {}
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._recover()
+
+    # ==================== 文件 ====================
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.path, f"{seq:012d}.seg")
+
+    def _recover(self):
+        """打开已有的分段，统计记录数并截断末尾不完整的记录"""
+        seqs = sorted(int(name[:-4]) for name in os.listdir(self.path) if name.endswith('.seg'))
+        cursor_seq, cursor_offset = None, 0
+        cursor_path = os.path.join(self.path, 'cursor')
+        if os.path.exists(cursor_path):
+            with open(cursor_path, 'rb') as f:
+                raw = f.read()
+            if len(raw) == CURSOR.size:
+                cursor_seq, cursor_offset = CURSOR.unpack(raw)
+
+        for seq in seqs:
+            path = self._segment_path(seq)
+            if cursor_seq is not None and seq < cursor_seq:
+                os.remove(path)  # 已补发完的分段
+                continue
+            segment = _Segment(seq, path)
+            with open(path, 'r+b') as f:
+                offset = 0
+                while True:
+                    head = f.read(4)
+                    if len(head) < 4:
+                        break
+                    (length,) = struct.unpack('<I', head)
+                    f.seek(offset + length)
+                    if f.tell() > os.path.getsize(path) or length < HEADER.size:
+                        break
+                    if seq == cursor_seq and offset < cursor_offset:
+                        self._read_records += 1
+                    offset += length
+                    segment.records += 1
+                f.truncate(offset)
+            segment.size = offset
+            self._segments.append(segment)
+
+        if self._segments:
+            first = self._segments[0]
+            self._read_seq = first.seq
+            self._read_offset = cursor_offset if first.seq == cursor_seq else 0
+            if first.seq != cursor_seq:
+                self._read_records = 0
+
+    def _open_writer(self):
+        """在最后一个分段后追加，已满时新建分段（调用方需持有锁）"""
+        last = self._segments[-1] if self._segments else None
+        if last is not None and last.size < self.segment_bytes:
+            if self._writer is None:
+                self._writer = open(last.path, 'ab')
+            return last
+        if self._writer is not None:
+            self._writer.close()
+        seq = last.seq + 1 if last is not None else 1
+        segment = _Segment(seq, self._segment_path(seq))
+        self._segments.append(segment)
+        self._writer = open(segment.path, 'ab')
+        if self._read_seq is None:
+            self._read_seq, self._read_offset, self._read_records = seq, 0, 0
+        return segment
+
+    def _drop_oldest(self):
+        """丢弃最旧的分段（调用方需持有锁）"""
+        segment = self._segments.popleft()
+        self.dropped += segment.records - (self._read_records if segment.seq == self._read_seq else 0)
+        if self._reader is not None and segment.seq == self._read_seq:
+            self._reader.close()
+            self._reader = None
+        if self._writer is not None and not self._segments:
+            self._writer.close()
+            self._writer = None
+        os.remove(segment.path)
+        nxt = self._segments[0] if self._segments else None
+        self._read_seq = nxt.seq if nxt else None
+        self._read_offset = 0
+        self._read_records = 0
+        self._cursor_dirty = True
+
+    # ==================== 写入 ====================
+
+    def append(self, device_code: int, endpoint: str, url: str, body: Optional[bytes] = None) -> bool:
+        """
+        暂存一条上报
+
+        Args:
+            device_code: 设备编号
+            endpoint: 'reportUserData' 或 'postTarPos'
+            url: 完整的请求 URL（位置上报的数据在查询串中）
+            body: 请求 body (可选)
+
+        Returns:
+            bool: False 表示已关闭
+        """
+        url_bytes = url.encode('utf-8')
+        body = body or b''
+        length = HEADER.size + len(url_bytes) + len(body)
+        record = HEADER.pack(length, device_code, time.time(), ENDPOINT_IDS[endpoint], len(url_bytes), len(body))
+
+        with self._lock:
+            if self._closed.is_set():
+                return False
+            while self._segments and self.bytes_pending() + length > self.max_bytes:
+                self._drop_oldest()
+            segment = self._open_writer()
+            self._writer.write(record)
+            self._writer.write(url_bytes)
+            self._writer.write(body)
+            segment.size += length
+            segment.records += 1
+            self.spooled += 1
+        return True
+
+    # ==================== 读取 ====================
+
+    def pop(self) -> Optional[SpoolRecord]:
+        """取出最早的一条记录（读取位置前移，补发失败时由调用方 requeue）"""
+        with self._lock:
+            while self._segments:
+                first = self._segments[0]
+                if first.seq != self._read_seq:
+                    self._read_seq, self._read_offset, self._read_records = first.seq, 0, 0
+                if self._read_offset < first.size:
+                    break
+                if len(self._segments) == 1:
+                    return None  # 只剩正在写入的分段且已读完
+                # 旧分段已读完，删除
+                if self._reader is not None:
+                    self._reader.close()
+                    self._reader = None
+                self._segments.popleft()
+                os.remove(first.path)
+                self._cursor_dirty = True
+            else:
+                return None
+
+            if self._writer is not None and first is self._segments[-1]:
+                self._writer.flush()
+            if self._reader is None:
+                self._reader = open(first.path, 'rb')
+            self._reader.seek(self._read_offset)
+            length, device_code, spooled_at, endpoint_id, url_len, body_len = HEADER.unpack(
+                self._reader.read(HEADER.size)
+            )
+            url = self._reader.read(url_len).decode('utf-8')
+            body = self._reader.read(body_len) if body_len else None
+            self._read_offset += length
+            self._read_records += 1
+            self._cursor_dirty = True
+            return SpoolRecord(device_code, spooled_at, ENDPOINT_NAMES.get(endpoint_id, ''), url, body)
+
+    def requeue(self, record: SpoolRecord):
+        """补发失败的记录重新追加到队尾"""
+        with self._lock:
+            self.requeued += 1
+        self.append(record.device_code, record.endpoint, record.url, record.body)
+
+    def ack(self):
+        """记录一次补发成功"""
+        now = time.monotonic()
+        with self._lock:
+            self.drained += 1
+            self._drain_times.append(now)
+            while self._drain_times and now - self._drain_times[0] > RATE_WINDOW:
+                self._drain_times.popleft()
+
+    def reject(self):
+        """记录一次补发被拒绝（不再重试）"""
+        with self._lock:
+            self.rejected += 1
+
+    def flush(self):
+        """写入缓冲数据并保存读取位置"""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            self._save_cursor()
+
+    def _save_cursor(self):
+        """保存读取位置（调用方需持有锁）"""
+        if not self._cursor_dirty:
+            return
+        tmp = os.path.join(self.path, 'cursor.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(CURSOR.pack(self._read_seq or 0, self._read_offset))
+        os.replace(tmp, os.path.join(self.path, 'cursor'))
+        self._cursor_dirty = False
+
+    # ==================== 健康判断与补发 ====================
+
+    def record_result(self, ok: bool):
+        """由客户端在每次请求完成后调用：网络异常、5xx、429 记为失败"""
+        if ok:
+            self._last_success = time.monotonic()
+        else:
+            self._last_failure = time.monotonic()
+
+    def healthy(self) -> bool:
+        """最近一次请求成功，且距最近一次失败已超过 recovery_delay"""
+        return (self._last_success > self._last_failure
+                and time.monotonic() - self._last_failure >= self.recovery_delay)
+
+    def depth(self) -> int:
+        """积压的记录数"""
+        with self._lock:
+            return sum(s.records for s in self._segments) - self._read_records
+
+    def bytes_pending(self) -> int:
+        """积压占用的磁盘字节数（调用方可不持有锁，结果为近似值）"""
+        return sum(s.size for s in self._segments) - (self._read_offset if self._segments else 0)
+
+    def register(self, client):
+        """登记无人机；同步客户端登记后启动后台补发线程（异步客户端由 AsyncFleetRunner 补发）"""
+        self._clients[client.device_code] = client
+        if not inspect.iscoroutinefunction(client.resend) and self._thread is None:
+            self._thread = threading.Thread(target=self._drain_loop, name='IVAS-spool', daemon=True)
+            self._thread.start()
+
+    def unregister(self, client):
+        """移除无人机（之后读到它的记录计入 orphaned）"""
+        if self._clients.get(client.device_code) is client:
+            del self._clients[client.device_code]
+
+    def next_record(self):
+        """
+        取出下一条可补发的记录及对应客户端（补发循环使用）
+
+        Returns:
+            (SpoolRecord, client)，没有积压、服务器未恢复或无人机暂不可用时为 (None, None)
+        """
+        if not self.healthy():
+            return None, None
+        record = self.pop()
+        if record is None:
+            return None, None
+        client = self._clients.get(record.device_code)
+        if client is None:
+            with self._lock:
+                self.orphaned += 1
+            return None, None
+        if not client.running or not client.token:
+            self.requeue(record)
+            return None, None
+        return record, client
+
+    def _drain_loop(self):
+        """同步补发线程：单路串行，每条间隔 1 / drain_rps 秒"""
+        interval = 1.0 / self.drain_rps
+        deadline = last_flush = time.monotonic()
+        while not self._closed.is_set():
+            record, client = self.next_record()
+            if record is not None:
+                client.resend(record)
+            now = time.monotonic()
+            if now - last_flush >= 1.0:
+                self.flush()
+                last_flush = now
+            # 按截止时间调度，补发请求本身的耗时不降低补发速率
+            deadline = max(deadline + (interval if record is not None else max(interval, 0.2)), now)
+            self._closed.wait(deadline - now)
+
+    def close(self):
+        """停止补发线程，写入缓冲数据和读取位置（积压记录保留到下次启动）"""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+            self._save_cursor()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        暂存统计
+
+        Returns:
+            dict: depth (积压记录数), bytes (积压字节数), segments, spooled, drained, requeued,
+                  dropped, orphaned, rejected, drain_rps (配置的补发速率), drain_rate (最近 10 秒实际补发速率),
+                  healthy
+        """
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(1 for t in self._drain_times if now - t <= RATE_WINDOW)
+            return {
+                'depth': sum(s.records for s in self._segments) - self._read_records,
+                'bytes': self.bytes_pending(),
+                'segments': len(self._segments),
+                'spooled': self.spooled,
+                'drained': self.drained,
+                'requeued': self.requeued,
+                'dropped': self.dropped,
+                'orphaned': self.orphaned,
+                'rejected': self.rejected,
+                'drain_rps': self.drain_rps,
+                'drain_rate': recent / RATE_WINDOW,
+                'healthy': self.healthy()
+            }
+
+
+def merge_spool_stats(stats: Iterable[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    合并多个暂存队列的统计（计数和速率相加，全部恢复时 healthy 才为 True）
+
+    Returns:
+        dict: 与 ReportSpool.stats() 相同的键，另含 spools (队列数)；没有统计时为 None
+    """
+    stats = [s for s in stats if s is not None]
+    if not stats:
+        return None
+    merged = {key: sum(s[key] for s in stats) for key in stats[0] if key != 'healthy'}
+    merged['healthy'] = all(s['healthy'] for s in stats)
+    merged['spools'] = sum(s.get('spools', 1) for s in stats)
+    return merged
+
+
+def spool_stats(clients: List[Any]) -> Optional[Dict[str, Any]]:
+    """机队使用的暂存队列的合并统计（通常整个机队共用一个），没有时为 None"""
+    spools = {id(c.spool): c.spool for c in clients if getattr(c, 'spool', None) is not None}
+    return merge_spool_stats(spool.stats() for spool in spools.values())
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+IVAS 遥测列式存储模块
+
+把生成并上报的位置数据和每帧目标列表按列写入定长二进制文件，运行结束后用
+内存映射 (numpy.memmap) 分析，数 GB 的数据也不需要整体读入内存：
+1. TelemetryWriter: 客户端上报时追加一行（热路径只做 deque.append），后台线程按批转成 NumPy 数组按列写盘
+2. TelemetryReader: 以只读内存映射打开，按块扫描回答常见问题
+   - track: 单架无人机的航迹
+   - rate: 按时间桶统计的上报速率
+   - gaps: 上报间隔异常的时间段
+   - targets / class_counts: 目标明细和按类别计数
+
+目录结构（每列一个文件，小端定长）：
+    store/
+      meta.json             列名与类型
+      positions/<列>.bin    device, time, lat, lon, alt, azimuth, motion, valid_count
+      frames/<列>.bin       device, time, obj_cnt, first (该帧第一个目标在 targets 中的行号)
+      targets/<列>.bin      device, time, id, cls, lon, lat, alt, bbox_x, bbox_y, bbox_w, bbox_h
+
+依赖 numpy (pip install numpy)。
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+
+SCHEMA_VERSION = 1
+
+TABLES = {
+    'positions': (
+        ('device', '<u4'), ('time', '<f8'), ('lat', '<f8'), ('lon', '<f8'), ('alt', '<f4'),
+        ('azimuth', '<u2'), ('motion', '<u1'), ('valid_count', '<u1')
+    ),
+    'frames': (
+        ('device', '<u4'), ('time', '<f8'), ('obj_cnt', '<u2'), ('first', '<u8')
+    ),
+    'targets': (
+        ('device', '<u4'), ('time', '<f8'), ('id', '<u4'), ('cls', '<u1'),
+        ('lon', '<f8'), ('lat', '<f8'), ('alt', '<f4'),
+        ('bbox_x', '<f4'), ('bbox_y', '<f4'), ('bbox_w', '<f4'), ('bbox_h', '<f4')
+    )
+}
+
+CHUNK_ROWS = 1 << 22  # 扫描时每块的行数
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("遥测存储需要 numpy，请执行: pip install numpy")
+
+
+def _column_path(root: str, table: str, column: str) -> str:
+    return os.path.join(root, table, f"{column}.bin")
+
+
+# ==================== 写入 ====================
+
+class TelemetryWriter:
+    """遥测列式存储的写入端
+
+    add_position / add_targets 可以从任意线程或事件循环调用，不加锁；
+    后台线程每 flush_interval 秒把积压的行转换成 NumPy 数组并逐列追加到文件。
+
+    使用示例:
+        writer = TelemetryWriter('store')
+        client = IVASClient(..., telemetry_store=writer)
+        ...
+        writer.close()
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        """
+        Args:
+            path: 存储目录（已存在时追加，列定义必须一致）
+            flush_interval: 后台写盘间隔 (秒)
+        """
+        _require_numpy()
+        self.path = path
+        self.flush_interval = flush_interval
+        self._dtypes = {table: np.dtype(list(columns)) for table, columns in TABLES.items()}
+
+        self._init_dirs()
+        self._files = {
+            table: {name: open(_column_path(path, table, name), 'ab') for name, _ in columns}
+            for table, columns in TABLES.items()
+        }
+        # 已有目标行数，用于新帧的 first
+        self._target_rows = os.path.getsize(_column_path(path, 'targets', 'device')) // 4
+
+        self._positions: deque = deque()
+        self._frames: deque = deque()
+        self.rows = {table: 0 for table in TABLES}
+
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._writer, name='IVAS-store', daemon=True)
+        self._thread.start()
+
+    def _init_dirs(self):
+        meta_path = os.path.join(self.path, 'meta.json')
+        meta = {
+            'version': SCHEMA_VERSION,
+            'tables': {table: [list(column) for column in columns] for table, columns in TABLES.items()}
+        }
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            if existing != meta:
+                raise ValueError(f"存储目录 {self.path} 的列定义与当前版本不一致")
+        for table in TABLES:
+            os.makedirs(os.path.join(self.path, table), exist_ok=True)
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # ---- 热路径 ----
+
+    def add_position(self, device_code: int, data: Dict[str, Any]):
+        """记录一条位置数据（IVASClient 生成的位置字典）"""
+        self._positions.append((
+            device_code, data['localTime'] / 1000.0, data['userX'], data['userY'], data['userZ'],
+            data['azimuth'], data['motion'], data['validCount']
+        ))
+
+    def add_targets(self, device_code: int, data: Dict[str, Any]):
+        """记录一帧目标列表（IVASClient 生成的目标字典，时间取记录时刻）"""
+        self._frames.append((device_code, time.time(), data['objs']))
+
+    # ---- 后台写盘 ----
+
+    def _writer(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def _append(self, table: str, rows: list):
+        array = np.array(rows, dtype=self._dtypes[table])
+        for name, _ in TABLES[table]:
+            f = self._files[table][name]
+            f.write(np.ascontiguousarray(array[name]).tobytes())
+            f.flush()
+        self.rows[table] += len(rows)
+
+    def flush(self):
+        """把积压的行写入文件"""
+        with self._write_lock:
+            positions = []
+            while self._positions:
+                positions.append(self._positions.popleft())
+            if positions:
+                self._append('positions', positions)
+
+            frames = []
+            targets = []
+            while self._frames:
+                device_code, t, objs = self._frames.popleft()
+                frames.append((device_code, t, len(objs), self._target_rows + len(targets)))
+                for obj in objs:
+                    lon, lat, alt = obj['gis']
+                    x, y, w, h = obj['bbox']
+                    targets.append((device_code, t, obj['id'], obj['cls'], lon, lat, alt, x, y, w, h))
+            # 先写目标再写帧，帧的 first 始终指向已落盘的目标
+            if targets:
+                self._append('targets', targets)
+                self._target_rows += len(targets)
+            if frames:
+                self._append('frames', frames)
+
+    def close(self):
+        """写入剩余数据并关闭文件"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join()
+        for files in self._files.values():
+            for f in files.values():
+                f.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        写入统计
+
+        Returns:
+            dict: rows ({表: 已写入行数}), pending ({表: 尚未写盘的行数})
+        """
+        return {
+            'rows': dict(self.rows),
+            'pending': {'positions': len(self._positions), 'frames': len(self._frames)}
+        }
+
+
+# ==================== 读取与查询 ====================
+
+class TelemetryReader:
+    """遥测列式存储的只读查询端（内存映射，按块扫描）
+
+    使用示例:
+        store = TelemetryReader('store')
+        store.track(3)                 # {'time': ..., 'lat': ..., 'lon': ..., 'alt': ..., 'azimuth': ...}
+        store.rate(bucket=1.0)         # 每秒的位置上报数
+        store.gaps(3)                  # 上报中断的时间段
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 存储目录
+        """
+        _require_numpy()
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != SCHEMA_VERSION:
+            raise ValueError(f"不支持的存储版本: {meta.get('version')}")
+
+        self.columns: Dict[str, Dict[str, Any]] = {}
+        for table, columns in meta['tables'].items():
+            # 写入中途退出时各列长度可能不同，按最短的列截断
+            sizes = {
+                name: os.path.getsize(_column_path(path, table, name)) // np.dtype(dtype).itemsize
+                for name, dtype in columns
+            }
+            rows = min(sizes.values()) if sizes else 0
+            self.columns[table] = {
+                name: self._open(_column_path(path, table, name), dtype, rows) for name, dtype in columns
+            }
+
+    @staticmethod
+    def _open(column_path: str, dtype: str, rows: int):
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(column_path, dtype=dtype, mode='r', shape=(rows,))
+
+    def rows(self, table: str = 'positions') -> int:
+        """表的行数"""
+        return len(self.columns[table]['device'])
+
+    def _select(self, table: str, device_code: Optional[int] = None,
+                start: Optional[float] = None, end: Optional[float] = None) -> 'np.ndarray':
+        """按块扫描，返回满足条件的行号"""
+        cols = self.columns[table]
+        n = len(cols['device'])
+        if device_code is None and start is None and end is None:
+            return np.arange(n)
+
+        found = []
+        for lo in range(0, n, CHUNK_ROWS):
+            hi = min(n, lo + CHUNK_ROWS)
+            mask = np.ones(hi - lo, dtype=bool)
+            if device_code is not None:
+                mask &= cols['device'][lo:hi] == device_code
+            if start is not None or end is not None:
+                t = cols['time'][lo:hi]
+                if start is not None:
+                    mask &= t >= start
+                if end is not None:
+                    mask &= t < end
+            found.append(np.flatnonzero(mask) + lo)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _gather(self, table: str, index: 'np.ndarray', names) -> Dict[str, 'np.ndarray']:
+        cols = self.columns[table]
+        return {name: np.asarray(cols[name][index]) for name in names}
+
+    def devices(self) -> List[int]:
+        """出现过的设备编号"""
+        device = self.columns['positions']['device']
+        seen = set()
+        for lo in range(0, len(device), CHUNK_ROWS):
+            seen.update(np.unique(device[lo:lo + CHUNK_ROWS]).tolist())
+        return sorted(seen)
+
+    def track(self, device_code: int, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, 'np.ndarray']:
+        """
+        单架无人机的航迹（按时间排序）
+
+        Returns:
+            dict: time, lat, lon, alt, azimuth, motion, valid_count 的数组
+        """
+        index = self._select('positions', device_code, start, end)
+        track = self._gather('positions', index, ('time', 'lat', 'lon', 'alt', 'azimuth', 'motion', 'valid_count'))
+        order = np.argsort(track['time'], kind='stable')
+        return {name: values[order] for name, values in track.items()}
+
+    def rate(self, bucket: float = 1.0, device_code: Optional[int] = None, table: str = 'positions') -> Dict[str, Any]:
+        """
+        按时间桶统计行数（即上报速率）
+
+        Args:
+            bucket: 时间桶宽度 (秒)
+            device_code: 只统计该设备，None 表示全部
+            table: 'positions' / 'frames' / 'targets'
+
+        Returns:
+            dict: start (第一个桶的起始时间), bucket, counts (每桶行数), rate (每桶 行/秒)
+        """
+        cols = self.columns[table]
+        n = len(cols['time'])
+        if n == 0:
+            return {'start': None, 'bucket': bucket, 'counts': np.zeros(0, dtype=np.int64), 'rate': np.zeros(0)}
+
+        t0 = min(float(cols['time'][lo:lo + CHUNK_ROWS].min()) for lo in range(0, n, CHUNK_ROWS))
+        counts = np.zeros(0, dtype=np.int64)
+        for lo in range(0, n, CHUNK_ROWS):
+            hi = min(n, lo + CHUNK_ROWS)
+            t = cols['time'][lo:hi]
+            if device_code is not None:
+                t = t[cols['device'][lo:hi] == device_code]
+            if len(t) == 0:
+                continue
+            chunk = np.bincount(((t - t0) // bucket).astype(np.int64))
+            if len(chunk) > len(counts):
+                chunk[:len(counts)] += counts
+                counts = chunk
+            else:
+                counts[:len(chunk)] += chunk
+        return {'start': t0, 'bucket': bucket, 'counts': counts, 'rate': counts / bucket}
+
+    def gaps(self, device_code: int, threshold: Optional[float] = None) -> List[Dict[str, float]]:
+        """
+        上报中断检测：相邻两条位置数据的间隔超过阈值的时间段
+
+        Args:
+            device_code: 设备编号
+            threshold: 间隔阈值 (秒)，默认取该设备间隔中位数的 3 倍
+
+        Returns:
+            list: [{'start': 中断前最后一条的时间, 'end': 恢复后第一条的时间, 'duration': 间隔秒数}, ...]
+        """
+        t = self.track(device_code)['time']
+        if len(t) < 2:
+            return []
+        d = np.diff(t)
+        if threshold is None:
+            threshold = 3 * float(np.median(d))
+        index = np.flatnonzero(d > threshold)
+        return [{'start': float(t[i]), 'end': float(t[i + 1]), 'duration': float(d[i])} for i in index]
+
+    def frames(self, device_code: Optional[int] = None, start: Optional[float] = None,
+               end: Optional[float] = None) -> Dict[str, 'np.ndarray']:
+        """
+        目标帧（每次目标上报一行）
+
+        Returns:
+            dict: device, time, obj_cnt, first 的数组；某帧的目标为 targets 表中 [first, first + obj_cnt) 行
+        """
+        index = self._select('frames', device_code, start, end)
+        return self._gather('frames', index, ('device', 'time', 'obj_cnt', 'first'))
+
+    def targets(self, device_code: Optional[int] = None, start: Optional[float] = None,
+                end: Optional[float] = None, cls: Optional[int] = None) -> Dict[str, 'np.ndarray']:
+        """
+        目标明细
+
+        Args:
+            cls: 只返回该类别 (0:人, 1:车, 2:飞机)
+
+        Returns:
+            dict: targets 表各列的数组
+        """
+        index = self._select('targets', device_code, start, end)
+        if cls is not None:
+            index = index[np.asarray(self.columns['targets']['cls'][index]) == cls]
+        return self._gather('targets', index, [name for name, _ in TABLES['targets']])
+
+    def class_counts(self, device_code: Optional[int] = None) -> Dict[int, int]:
+        """按类别统计目标数"""
+        cols = self.columns['targets']
+        n = len(cols['cls'])
+        counts = np.zeros(256, dtype=np.int64)
+        for lo in range(0, n, CHUNK_ROWS):
+            hi = min(n, lo + CHUNK_ROWS)
+            cls = cols['cls'][lo:hi]
+            if device_code is not None:
+                cls = cls[cols['device'][lo:hi] == device_code]
+            counts += np.bincount(cls, minlength=256)
+        return {int(c): int(counts[c]) for c in np.flatnonzero(counts)}
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        存储概况
+
+        Returns:
+            dict: rows ({表: 行数}), devices, start / end (位置数据的时间范围), bytes (磁盘占用)
+        """
+        time_col = self.columns['positions']['time']
+        n = len(time_col)
+        start = end = None
+        for lo in range(0, n, CHUNK_ROWS):
+            chunk = time_col[lo:lo + CHUNK_ROWS]
+            lo_t, hi_t = float(chunk.min()), float(chunk.max())
+            start = lo_t if start is None else min(start, lo_t)
+            end = hi_t if end is None else max(end, hi_t)
+
+        size = 0
+        for table, columns in TABLES.items():
+            for name, _ in columns:
+                size += os.path.getsize(_column_path(self.path, table, name))
+        return {
+            'rows': {table: self.rows(table) for table in TABLES},
+            'devices': len(self.devices()),
+            'start': start,
+            'end': end,
+            'bytes': size
+        }
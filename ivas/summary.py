@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+IVAS 无头模式汇总模块
+
+大规模压测时不使用 Rich 界面、不逐条打印日志 (客户端 quiet=True)，改为：
+1. 按固定间隔输出一行机队汇总：各接口实际速率、错误数、延迟分位数、登录次数
+2. 退出时写入最终 JSON 报告：请求指标、平均速率、周期统计、启动耗时、调度器状态
+
+汇总直接读取客户端内置的请求指标 (ivas.metrics)，不在请求路径上增加任何开销。
+
+使用示例:
+    summary = FleetSummary(fleet, interval=5.0, report_path='report.json').start()
+    # ...
+    summary.stop()  # 输出最后一行并写入报告
+
+支持 IVASFleet、AsyncFleetRunner 以及任何具有 clients 属性（列表或 {device_code: client}）的对象；
+数据源提供 fleet_stats() 时 (如多进程的 ShardedFleet) 直接使用其汇总结果。
+"""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, TextIO
+
+from .metrics import LATENCY_BUCKETS_MS, merge_snapshots, quantiles
+
+
+# 汇总行中各接口的简称
+SHORT_NAMES = {'reportUserData': "位置", 'postTarPos': "目标", 'outdoorTask': "任务"}
+
+
+def aggregate_timing(timing: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总多架无人机的周期统计
+
+    Args:
+        timing: 各客户端 timing_stats() 的结果
+
+    Returns:
+        dict: target_hz (当前有效频率), base_hz (配置频率), achieved_hz (总和), ticks, missed, skipped,
+              rate_decreases (自适应减速次数), min_achieved_ratio (实际/目标频率的最小比值), jitter_p99_ms_max
+    """
+    timing = list(timing)
+    return {
+        'target_hz': sum(t['target_hz'] for t in timing),
+        'base_hz': sum(t.get('base_hz', t['target_hz']) for t in timing),
+        'achieved_hz': sum(t['achieved_hz'] for t in timing),
+        'ticks': sum(t['ticks'] for t in timing),
+        'missed': sum(t['missed'] for t in timing),
+        'skipped': sum(t['skipped'] for t in timing),
+        'rate_decreases': sum(t['rate']['decreases'] for t in timing if 'rate' in t),
+        'min_achieved_ratio': min(
+            (t['achieved_hz'] / t['target_hz'] for t in timing if t['target_hz'] and t['ticks']),
+            default=None
+        ),
+        'jitter_p99_ms_max': max((t['jitter_ms']['p99'] for t in timing), default=0.0)
+    }
+
+
+def merge_timing(aggregates: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合并多个 aggregate_timing 结果（例如多进程机队的各个分片）
+
+    Returns:
+        dict: 同 aggregate_timing
+    """
+    aggregates = list(aggregates)
+    ratios = [a['min_achieved_ratio'] for a in aggregates if a['min_achieved_ratio'] is not None]
+    keys = ('target_hz', 'base_hz', 'achieved_hz', 'ticks', 'missed', 'skipped', 'rate_decreases')
+    merged = {key: sum(a[key] for a in aggregates) for key in keys}
+    merged['min_achieved_ratio'] = min(ratios, default=None)
+    merged['jitter_p99_ms_max'] = max((a['jitter_p99_ms_max'] for a in aggregates), default=0.0)
+    return merged
+
+
+class FleetSummary:
+    """无头模式的周期汇总与最终报告"""
+
+    def __init__(
+        self,
+        source,
+        interval: float = 5.0,
+        report_path: Optional[str] = None,
+        stream: Optional[TextIO] = None
+    ):
+        """
+        Args:
+            source: IVASFleet / AsyncFleetRunner 或具有 clients 属性的对象
+            interval: 汇总行输出间隔 (秒)
+            report_path: 最终 JSON 报告路径 (可选)
+            stream: 汇总行输出位置，默认标准输出
+        """
+        self.source = source
+        self.interval = interval
+        self.report_path = report_path
+        self.stream = stream or sys.stdout
+
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self._last: Optional[Dict[str, Any]] = None  # 上一行的累计快照
+        self._last_time = self._started
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== 后台输出 ====================
+
+    def start(self) -> 'FleetSummary':
+        """在后台线程中按间隔输出汇总行"""
+        self._thread = threading.Thread(target=self._loop, name='IVAS-summary', daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            print(self.line(), file=self.stream, flush=True)
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """
+        停止输出，打印最后一行，设置了 report_path 时写入报告
+
+        Returns:
+            dict: 最终报告
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        print(self.line(), file=self.stream, flush=True)
+
+        report = self.report()
+        if self.report_path:
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    # ==================== 汇总 ====================
+
+    def _collect(self, ticks: bool = False) -> Dict[str, Any]:
+        """
+        读取数据源的当前状态
+
+        Returns:
+            dict: drones, running, requests (合并的请求指标), ticks (ticks=True 时),
+                  effective_hz (自适应频率的无人机当前频率之和，没有时不包含)
+        """
+        fleet_stats = getattr(self.source, 'fleet_stats', None)
+        if fleet_stats is not None:
+            return fleet_stats(ticks=ticks)
+
+        clients = self.source.clients
+        clients = list(clients.values()) if isinstance(clients, dict) else list(clients)
+        stats = {
+            'drones': len(clients),
+            'running': sum(1 for client in clients if client.running),
+            'requests': merge_snapshots(client.request_stats() for client in clients)
+        }
+        adaptive = [client for client in clients if client.rate_control is not None]
+        if adaptive:
+            stats['effective_hz'] = sum(client.effective_hz() for client in adaptive)
+        if ticks:
+            stats['ticks'] = aggregate_timing(client.timing_stats() for client in clients)
+        return stats
+
+    def line(self) -> str:
+        """
+        生成一行汇总（速率、错误和延迟分位数为与上一行之间的区间值）
+
+        示例:
+            [  30.0s] 运行 500/500 | 位置 4998.1/s 目标 4998.1/s 任务 99.8/s | 错误 0 (累计 3)
+            | 延迟 p50 2.1 p95 8.4 p99 16.0 ms | 登录 500 重登 0 刷新 0
+        """
+        stats = self._collect()
+        total = stats['requests']
+        now = time.monotonic()
+        span = max(now - self._last_time, 1e-9)
+        last = self._last['endpoints'] if self._last else {}
+
+        rates = []
+        errors = 0
+        errors_total = 0
+        counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        max_ms = 0.0
+        for name, ep in total['endpoints'].items():
+            prev = last.get(name)
+            requests = ep['requests'] - (prev['requests'] if prev else 0)
+            errors += ep['errors'] - (prev['errors'] if prev else 0)
+            errors_total += ep['errors']
+            if name == 'zsLogin':
+                continue
+            if name in SHORT_NAMES:
+                rates.append(f"{SHORT_NAMES[name]} {requests / span:.1f}/s")
+            prev_counts = prev['latency_ms']['counts'] if prev else None
+            for i, count in enumerate(ep['latency_ms']['counts']):
+                counts[i] += count - (prev_counts[i] if prev_counts else 0)
+            max_ms = max(max_ms, ep['latency_ms']['max'])
+
+        q = quantiles(counts, max_ms)
+        login = total['endpoints'].get('zsLogin', {}).get('requests', 0)
+        adaptive = f" | 自适应 {stats['effective_hz']:.1f} Hz" if 'effective_hz' in stats else ''
+        spool_stats = getattr(self.source, 'spool_stats', None)
+        spool = spool_stats() if spool_stats is not None else None
+        if spool is not None:
+            adaptive += f" | 积压 {spool['depth']} 补发 {spool['drain_rate']:.1f}/s"
+        breaker_stats = getattr(self.source, 'breaker_stats', None)
+        breakers = breaker_stats() if breaker_stats is not None else None
+        if breakers:
+            tripped = [b['endpoint'] for b in breakers if b['state'] != 'closed']
+            if tripped:
+                adaptive += f" | 熔断 {','.join(sorted(set(tripped)))}"
+
+        self._last = total
+        self._last_time = now
+        return (
+            f"[{now - self._started:7.1f}s] 运行 {stats['running']}/{stats['drones']} | {' '.join(rates)} | "
+            f"错误 {errors} (累计 {errors_total}) | "
+            f"延迟 p50 {q['p50']:.1f} p95 {q['p95']:.1f} p99 {q['p99']:.1f} ms | "
+            f"登录 {login} 重登 {total['relogins']} 刷新 {total['refreshes']}{adaptive}"
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """
+        最终报告
+
+        Returns:
+            dict: started_at, duration_s, drones, running, rates (各接口平均请求/秒),
+                  errors, error_rate, logins, ticks (周期统计汇总), requests (合并的请求指标),
+                  startup / scheduler / shards / tasks / budget / spool / breakers (数据源支持时)
+        """
+        stats = self._collect(ticks=True)
+        duration = time.monotonic() - self._started
+        total = stats['requests']
+
+        requests = sum(ep['requests'] for ep in total['endpoints'].values())
+        errors = sum(ep['errors'] for ep in total['endpoints'].values())
+
+        report = {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'duration_s': duration,
+            'drones': stats['drones'],
+            'running': stats['running'],
+            'rates': {name: ep['requests'] / duration for name, ep in total['endpoints'].items()},
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+            'logins': {
+                'zsLogin': total['endpoints'].get('zsLogin', {}).get('requests', 0),
+                'relogins': total['relogins'],
+                'refreshes': total['refreshes'],
+                'relogins_coalesced': total['relogins_coalesced']
+            },
+            'ticks': stats['ticks'],
+            'requests': total
+        }
+
+        for key, name in (
+            ('startup', 'startup_stats'), ('scheduler', 'scheduler_stats'),
+            ('shards', 'shard_stats'), ('tasks', 'task_stats'), ('budget', 'budget_stats'),
+            ('spool', 'spool_stats'), ('breakers', 'breaker_stats')
+        ):
+            stats = getattr(self.source, name, None)
+            value = stats() if stats is not None else None
+            if value is not None:
+                report[key] = value
+        return report
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+IVAS 机队任务分发模块
+
+任务只针对一架无人机 (id) 或全部无人机 (广播 id 99)，逐架轮询时 N 架无人机每个周期
+发送 N 个几乎相同的 GET。机队统一轮询模式下：
+1. 按分组只发送一次轮询：fleet 模式每个 base_url 一组，account 模式每个 (base_url, account) 一组
+   (服务器按账号返回不同任务时使用)
+2. 轮询由组内一架已登录的无人机发出，响应按 data.id 分发：广播 id 发给组内全部无人机，
+   其他 id 只发给 device_code 相同的无人机；没有任务时每架无人机都收到 "暂无任务"
+3. 统计轮询次数、分发数、无人认领的任务数、节省的请求数，以及从发出轮询到任务送达
+   每架无人机的耗时 (fan-in 延迟) 分位数
+
+轮询调度由 IVASFleet / AsyncFleetRunner 负责 (task_poll='fleet' 或 'account')，本模块只做分组、
+路由和统计。
+
+使用示例:
+    fleet = IVASFleet(device_configs, task_poll='fleet')
+    fleet.start()
+    # ...
+    fleet.task_stats()
+    # {'mode': 'fleet', 'groups': 1, 'polls': 120, 'tasks': 12, 'delivered': 6090, 'polls_saved': 59880,
+    #  'fanin_ms': {'p50': 2.4, 'p95': 7.9, 'p99': 12.0, 'max': 15.3}, ...}
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Hashable, List, Optional
+
+from .metrics import LATENCY_BUCKETS_MS, quantiles
+
+
+DEVICE = 'device'    # 每架无人机自行轮询（默认）
+FLEET = 'fleet'      # 每个 base_url 轮询一次
+ACCOUNT = 'account'  # 每个 (base_url, account) 轮询一次
+
+MODES = (DEVICE, FLEET, ACCOUNT)
+
+# 广播任务的目标 id
+BROADCAST_ID = 99
+
+
+class TaskFanout:
+    """任务轮询分组、按 id 路由与 fan-in 延迟统计"""
+
+    def __init__(self, mode: str = FLEET):
+        """
+        Args:
+            mode: 'fleet' 或 'account'
+        """
+        if mode not in (FLEET, ACCOUNT):
+            raise ValueError(f"未知的任务轮询模式: {mode}")
+        self.mode = mode
+
+        self._lock = threading.Lock()
+        self._groups: Dict[Hashable, Dict[int, Any]] = {}  # 分组 → {device_code: client}
+
+        self.polls = 0        # 实际发出的轮询数
+        self.failed = 0       # 请求或解析失败的轮询数
+        self.no_task = 0      # 返回 "暂无任务" 的轮询数
+        self.tasks = 0        # 返回任务的轮询数
+        self.broadcast = 0    # 其中广播任务数
+        self.unrouted = 0     # 组内没有对应 id 的任务数
+        self.delivered = 0    # 送达无人机的响应数
+        self.polls_saved = 0  # 相比逐架轮询少发的请求数
+        self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._fanin_max = 0.0
+
+    # ==================== 分组 ====================
+
+    def key(self, client) -> Hashable:
+        """客户端所属分组"""
+        base_url = client.base_url.rstrip('/')
+        return base_url if self.mode == FLEET else (base_url, client.account)
+
+    def add(self, client) -> Hashable:
+        """加入客户端，返回分组（客户端不再自行轮询）"""
+        client.poll_tasks = False
+        key = self.key(client)
+        with self._lock:
+            self._groups.setdefault(key, {})[client.device_code] = client
+        return key
+
+    def remove(self, client):
+        with self._lock:
+            members = self._groups.get(self.key(client))
+            if members is not None:
+                members.pop(client.device_code, None)
+
+    def members(self, key: Hashable) -> List[Any]:
+        """分组中运行中且已登录的客户端（尚未登录的无人机不接收任务）"""
+        with self._lock:
+            return [client for client in self._groups.get(key, {}).values() if client.running and client.token]
+
+    @staticmethod
+    def leader(members: List[Any]) -> Optional[Any]:
+        """选择发出轮询的客户端（组内第一架，使用它的 token）"""
+        return members[0] if members else None
+
+    # ==================== 路由 ====================
+
+    def deliver(self, result: Optional[Dict[str, Any]], members: List[Any], started: float) -> int:
+        """
+        把一次轮询的响应分发给组内无人机
+
+        Args:
+            result: leader.fetch_task() 的返回值，None 表示轮询失败
+            members: 本次轮询时组内运行中的客户端
+            started: 发出轮询的时间 (time.monotonic())
+
+        Returns:
+            int: 送达的无人机数
+        """
+        if result is None:
+            with self._lock:
+                self.polls += 1
+                self.failed += 1
+            return 0
+
+        task = result.get('data') if isinstance(result, dict) else None
+        target = task.get('id') if isinstance(task, dict) else None
+        if task is None or target == BROADCAST_ID:
+            targets = members
+        else:
+            targets = [client for client in members if client.device_code == target]
+
+        latencies = []
+        for client in targets:
+            client._log('task', result)
+            latencies.append((time.monotonic() - started) * 1000)
+
+        with self._lock:
+            self.polls += 1
+            self.polls_saved += len(members) - 1
+            if task is None:
+                self.no_task += 1
+            else:
+                self.tasks += 1
+                if target == BROADCAST_ID:
+                    self.broadcast += 1
+                elif not targets:
+                    self.unrouted += 1
+            self.delivered += len(targets)
+            for ms in latencies:
+                self._buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+                if ms > self._fanin_max:
+                    self._fanin_max = ms
+        return len(targets)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        任务分发统计
+
+        Returns:
+            dict: mode, groups, polls, failed, no_task, tasks, broadcast, unrouted, delivered,
+                  polls_saved, fanin_ms (发出轮询到送达无人机的耗时 p50/p95/p99/max)
+        """
+        with self._lock:
+            fanin = quantiles(self._buckets, self._fanin_max)
+            fanin['max'] = self._fanin_max
+            return {
+                'mode': self.mode,
+                'groups': sum(1 for members in self._groups.values() if members),
+                'polls': self.polls,
+                'failed': self.failed,
+                'no_task': self.no_task,
+                'tasks': self.tasks,
+                'broadcast': self.broadcast,
+                'unrouted': self.unrouted,
+                'delivered': self.delivered,
+                'polls_saved': self.polls_saved,
+                'fanin_ms': fanin
+            }
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+IVAS 周期调度模块
+
+基于单调时钟的截止时间调度，替代 "睡眠 report_interval - elapsed" 的做法：
+1. 截止时间按固定网格推进，不会累积漂移，也不受系统时间跳变影响
+2. 错过截止时间时支持 skip（跳过积压周期）或 catchup（连续补发）两种策略
+3. 统计实际频率、周期抖动分位数和错过截止时间的次数
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+SKIP = 'skip'
+CATCHUP = 'catchup'
+
+
+class TickStats:
+    """周期统计
+
+    - ticks: 已执行的周期数
+    - missed: 周期结束时已经超过下一截止时间的次数
+    - skipped: skip 策略下被丢弃的周期数
+    - jitter: 周期实际开始时间相对截止时间的延迟（保留最近 window 个样本）
+    """
+
+    def __init__(self, interval: float, window: int = 1024):
+        self.interval = interval
+        self.ticks = 0
+        self.missed = 0
+        self.skipped = 0
+        self.first_tick = None
+        self.last_tick = None
+        self._jitter = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_tick(self, now: float, lateness: float):
+        """记录一次周期开始"""
+        with self._lock:
+            if self.first_tick is None:
+                self.first_tick = now
+            self.last_tick = now
+            self.ticks += 1
+            self._jitter.append(lateness)
+
+    def record_miss(self, skipped: int = 0):
+        """记录一次错过截止时间"""
+        with self._lock:
+            self.missed += 1
+            self.skipped += skipped
+
+    def achieved_hz(self) -> float:
+        """实际频率 (Hz)"""
+        with self._lock:
+            if self.ticks < 2:
+                return 0.0
+            span = self.last_tick - self.first_tick
+        return (self.ticks - 1) / span if span > 0 else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        统计快照
+
+        Returns:
+            dict: target_hz, achieved_hz, ticks, missed, skipped,
+                  jitter_ms (p50 / p95 / p99 / max)
+        """
+        achieved = self.achieved_hz()
+        with self._lock:
+            samples = sorted(self._jitter)
+            ticks, missed, skipped = self.ticks, self.missed, self.skipped
+
+        return {
+            'target_hz': 1.0 / self.interval,
+            'achieved_hz': achieved,
+            'ticks': ticks,
+            'missed': missed,
+            'skipped': skipped,
+            'jitter_ms': {
+                'p50': _percentile(samples, 0.50) * 1000,
+                'p95': _percentile(samples, 0.95) * 1000,
+                'p99': _percentile(samples, 0.99) * 1000,
+                'max': (samples[-1] if samples else 0.0) * 1000
+            }
+        }
+
+
+def _percentile(samples, q: float) -> float:
+    """已排序样本的分位数（最近秩）"""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(q * len(samples)))
+    return samples[index]
+
+
+class Ticker:
+    """单调时钟截止时间调度器
+
+    使用方式:
+        ticker = Ticker(0.1, policy='skip')
+        ticker.reset()
+        while running:
+            ticker.begin()
+            do_work()
+            time.sleep(max(0, ticker.advance() - time.monotonic()))
+    """
+
+    def __init__(self, interval: float, policy: str = SKIP, stats: Optional[TickStats] = None):
+        """
+        Args:
+            interval: 周期 (秒)
+            policy: 错过截止时间时的策略
+                - 'skip': 丢弃积压的整周期，尽快执行一次后回到原网格
+                - 'catchup': 保留所有周期，连续执行直到追上网格
+            stats: 统计对象 (可选，不传则自行创建)
+        """
+        if policy not in (SKIP, CATCHUP):
+            raise ValueError(f"未知的调度策略: {policy}")
+        self.interval = interval
+        self.policy = policy
+        self.stats = stats if stats is not None else TickStats(interval)
+        self.deadline = None
+
+    def reset(self, start: Optional[float] = None) -> float:
+        """
+        重新开始调度
+
+        Args:
+            start: 第一个截止时间 (time.monotonic())，默认立即
+
+        Returns:
+            float: 第一个截止时间
+        """
+        self.deadline = time.monotonic() if start is None else start
+        return self.deadline
+
+    def set_interval(self, interval: float):
+        """修改周期（从下一个截止时间起生效，统计中的目标频率同步更新）"""
+        self.interval = interval
+        self.stats.interval = interval
+
+    def begin(self) -> float:
+        """周期开始时调用，记录相对截止时间的抖动，返回当前时间"""
+        now = time.monotonic()
+        if self.deadline is None:
+            self.deadline = now
+        self.stats.record_tick(now, max(0.0, now - self.deadline))
+        return now
+
+    def advance(self) -> float:
+        """
+        周期结束时调用，推进到下一截止时间
+
+        Returns:
+            float: 下一截止时间 (time.monotonic())
+        """
+        now = time.monotonic()
+        self.deadline += self.interval
+
+        if now > self.deadline:
+            skipped = 0
+            if self.policy == SKIP:
+                # 丢弃已经完整错过的周期，保留网格对齐
+                skipped = int((now - self.deadline) // self.interval)
+                self.deadline += skipped * self.interval
+            self.stats.record_miss(skipped)
+
+        return self.deadline
+
+    def sleep(self):
+        """推进截止时间并睡眠到该时间（同步循环使用）"""
+        delay = self.advance() - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
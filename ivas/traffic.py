@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+IVAS 流量录制与回放模块
+
+1. TrafficRecorder: 把机队实际发出的请求写入紧凑的追加式二进制日志
+   - reportUserData 记录查询串，postTarPos 记录 JSON body，outdoorTask 记录响应 body
+   - zsLogin 只记录时间和状态码（不记录账号密码），token 不记录
+   - 每条记录带发送/接收时间戳和 HTTP 状态码
+   - 热路径只做一次 struct.pack 和 deque.append，由后台线程批量写盘
+2. read_traffic: 逐条读取日志（生成器，不会把整个文件读入内存）；日志按请求完成顺序写入，
+   in_send_order 用有界的重排堆把它还原成发送顺序
+3. TrafficReplayer: 按原始的请求间隔把日志重新发送到任意 base_url，支持 1x / Nx / 最大速度
+
+日志格式（小端序）：
+    文件头   8 字节 b'IVASTRF1'
+    每条记录 27 字节头 + payload
+        endpoint (u8) | status (u16, 0 表示请求异常) | device_code (u32)
+        sent_at (f64, Unix 秒) | received_at (f64, Unix 秒) | payload 长度 (u32)
+
+使用方法：
+    recorder = TrafficRecorder('traffic.bin')
+    client = IVASClient(..., traffic_recorder=recorder)
+    ...
+    recorder.close()
+
+    python -m ivas.traffic info traffic.bin
+    python -m ivas.traffic replay traffic.bin --base-url http://localhost:5001 --speed 10
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Any, Iterable, Iterator, NamedTuple, Optional
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - 可选依赖
+    aiohttp = None
+
+from .encoding import REPORT_POSITION_PATH, POST_TARGETS_PATH, OUTDOOR_TASK_PATH, LOGIN_PATH, dumps
+from .metrics import ClientMetrics, LATENCY_BUCKETS_MS, quantiles
+
+
+MAGIC = b'IVASTRF1'
+RECORD = struct.Struct('<BHIddI')
+
+# 接口编号（写入日志，只能追加不能修改）
+ZS_LOGIN = 0
+REPORT_POSITION = 1
+POST_TARGETS = 2
+OUTDOOR_TASK = 3
+
+ENDPOINT_IDS = {
+    'zsLogin': ZS_LOGIN,
+    'reportUserData': REPORT_POSITION,
+    'postTarPos': POST_TARGETS,
+    'outdoorTask': OUTDOOR_TASK
+}
+ENDPOINT_NAMES = {value: key for key, value in ENDPOINT_IDS.items()}
+
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise ImportError("流量回放需要 aiohttp，请执行: pip install aiohttp")
+
+
+class TrafficRecord(NamedTuple):
+    """日志中的一条记录"""
+    endpoint: str
+    status: int
+    device_code: int
+    sent_at: float
+    received_at: float
+    payload: bytes
+
+
+# ==================== 录制 ====================
+
+class TrafficRecorder:
+    """追加式二进制流量日志
+
+    record() 可以从任意线程 / 事件循环调用，不加锁：打包好的记录放入 deque，
+    后台线程每 flush_interval 秒批量写入文件。写盘跟不上时超过 max_pending 的记录被丢弃并计数。
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.2, max_pending: int = 1_000_000):
+        """
+        Args:
+            path: 日志文件路径（已存在时追加）
+            flush_interval: 后台写盘间隔 (秒)
+            max_pending: 内存中最多积压的记录数
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+        # time.perf_counter() → Unix 时间，客户端传入已有的计时值，不必再调用 time.time()
+        self._wall_offset = time.time() - time.perf_counter()
+
+        self._pending: deque = deque()
+        self.records = 0
+        self.bytes = 0
+        self.dropped = 0
+
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._writer, name='IVAS-traffic', daemon=True)
+        self._thread.start()
+
+    def record(
+        self,
+        endpoint: str,
+        device_code: int,
+        started: float,
+        finished: float,
+        status,
+        url: str,
+        body=None,
+        response: Optional[bytes] = None
+    ):
+        """
+        记录一次请求
+
+        Args:
+            endpoint: 接口名
+            device_code: 设备编号
+            started: 发送时间 (time.perf_counter())
+            finished: 收到响应或失败的时间 (time.perf_counter())
+            status: HTTP 状态码，请求异常时传 'error'
+            url: 完整请求 URL（reportUserData 取查询串）
+            body: 请求 body（postTarPos）
+            response: 响应 body（outdoorTask）
+        """
+        endpoint_id = ENDPOINT_IDS.get(endpoint)
+        if endpoint_id is None:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+
+        if endpoint_id == REPORT_POSITION:
+            payload = url.partition('?')[2].encode()
+        elif endpoint_id == POST_TARGETS:
+            payload = body.encode() if isinstance(body, str) else (body or b'')
+        elif endpoint_id == OUTDOOR_TASK:
+            payload = response or b''
+        else:
+            payload = b''
+
+        offset = self._wall_offset
+        code = status if isinstance(status, int) else 0
+        self._pending.append(
+            RECORD.pack(endpoint_id, code, device_code, offset + started, offset + finished, len(payload)) + payload
+        )
+
+    def _writer(self):
+        while not self._closed.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        pending = self._pending
+        chunks = []
+        while pending:
+            chunks.append(pending.popleft())
+        if chunks:
+            data = b''.join(chunks)
+            self._file.write(data)
+            self._file.flush()
+            self.records += len(chunks)
+            self.bytes += len(data)
+
+    def close(self):
+        """写入剩余记录并关闭文件"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join()
+        self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        录制统计
+
+        Returns:
+            dict: records (已写入), bytes, pending (尚未写盘), dropped
+        """
+        return {
+            'records': self.records,
+            'bytes': self.bytes,
+            'pending': len(self._pending),
+            'dropped': self.dropped
+        }
+
+
+# ==================== 读取 ====================
+
+def read_traffic(path: str) -> Iterator[TrafficRecord]:
+    """
+    逐条读取流量日志
+
+    Raises:
+        ValueError: 文件头不正确或记录被截断（录制进程异常退出时最后一条记录可能不完整，会被忽略）
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是 IVAS 流量日志: {path}")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            endpoint_id, status, device_code, sent_at, received_at, length = RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield TrafficRecord(
+                ENDPOINT_NAMES.get(endpoint_id, str(endpoint_id)), status, device_code, sent_at, received_at, payload
+            )
+
+
+def in_send_order(records: Iterable[TrafficRecord], window: float) -> Iterator[TrafficRecord]:
+    """
+    把按完成顺序写入的记录还原为发送顺序
+
+    记录在请求完成时写入，慢请求（超时）排在比它晚发送的请求后面。后续记录的完成时间不早于当前记录，
+    发送时间不早于 完成时间 - 最大耗时，因此发送时间早于 当前完成时间 - window 的记录可以放心输出，
+    堆中只保留 window 秒内的记录。
+
+    Args:
+        records: read_traffic 的结果
+        window: 不小于日志中单个请求的最大耗时 (秒)
+    """
+    heap = []
+    for seq, rec in enumerate(records):
+        heapq.heappush(heap, (rec.sent_at, seq, rec))
+        horizon = rec.received_at - window
+        while heap[0][0] <= horizon:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def summarize(path: str) -> Dict[str, Any]:
+    """
+    日志概况
+
+    Returns:
+        dict: records, devices, duration_s, rate (请求/秒), endpoints ({接口: {records, errors, bytes}})
+    """
+    endpoints: Dict[str, Dict[str, int]] = {}
+    devices = set()
+    first = last = None
+    records = 0
+    for rec in read_traffic(path):
+        records += 1
+        devices.add(rec.device_code)
+        first = rec.sent_at if first is None else min(first, rec.sent_at)
+        last = rec.sent_at if last is None else max(last, rec.sent_at)
+        ep = endpoints.setdefault(rec.endpoint, {'records': 0, 'errors': 0, 'bytes': 0})
+        ep['records'] += 1
+        ep['errors'] += rec.status != 200
+        ep['bytes'] += len(rec.payload)
+
+    duration = (last - first) if records else 0.0
+    return {
+        'records': records,
+        'devices': len(devices),
+        'duration_s': duration,
+        'rate': records / duration if duration else 0.0,
+        'endpoints': endpoints
+    }
+
+
+# ==================== 回放 ====================
+
+class TrafficReplayer:
+    """按原始请求间隔回放流量日志
+
+    每个出现在日志中的设备编号先登录一次（不计入回放时间），然后按
+    (sent_at - 第一条的 sent_at) / speed 的时间表发送请求；speed 为 None 或 <= 0 时不等待，
+    只受 concurrency 限制。日志中的 zsLogin 记录不回放，401 时重新登录并重试一次。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        base_url: str,
+        speed: Optional[float] = 1.0,
+        password: str = '000000',
+        account_format: str = 'ZSDX{:03d}',
+        concurrency: int = 256,
+        timeout: float = 3.0,
+        recorder: Optional[TrafficRecorder] = None
+    ):
+        """
+        Args:
+            path: 流量日志路径
+            base_url: 回放目标服务器地址
+            speed: 回放倍速，1.0 为原速，None 或 <= 0 为最大速度
+            password: 登录密码
+            account_format: 由设备编号生成账号的格式串
+            concurrency: 最大并发请求数
+            timeout: 单次请求超时 (秒)
+            recorder: 把回放发出的请求另行录制 (可选)
+        """
+        _require_aiohttp()
+        self.path = path
+        self.base_url = base_url.rstrip('/')
+        self.speed = speed if speed and speed > 0 else None
+        self.password = password
+        self.account_format = account_format
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.recorder = recorder
+
+        self.metrics = ClientMetrics()
+        self._tokens: Dict[int, str] = {}
+        self._login_locks: Dict[int, asyncio.Lock] = {}
+        self._lag_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._lag_max = 0.0
+        self._session: Optional['aiohttp.ClientSession'] = None
+
+    async def _login(self, device_code: int, stale: Optional[str] = None) -> Optional[str]:
+        """登录（同一设备并发 401 只登录一次）"""
+        lock = self._login_locks.setdefault(device_code, asyncio.Lock())
+        async with lock:
+            token = self._tokens.get(device_code)
+            if token is not None and token != stale:
+                return token
+            body = dumps({'account': self.account_format.format(device_code), 'password': self.password})
+            try:
+                data = await self._fetch(
+                    'POST', f"{self.base_url}{LOGIN_PATH}", ZS_LOGIN, device_code,
+                    data=body, headers={'Content-Type': 'application/json'}
+                )
+                token = json.loads(data[1])['resData']['token']
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError):
+                return None
+            self._tokens[device_code] = token
+            return token
+
+    async def _fetch(self, method: str, url: str, endpoint_id: int, device_code: int, **kwargs):
+        """发送一次请求并记录指标，返回 (状态码, 响应 body)"""
+        name = ENDPOINT_NAMES[endpoint_id]
+        sent = len(url) + len(kwargs.get('data') or b'')
+        start = time.perf_counter()
+        try:
+            async with self._session.request(
+                method, url, timeout=aiohttp.ClientTimeout(total=self.timeout), **kwargs
+            ) as resp:
+                content = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            finished = time.perf_counter()
+            self.metrics.record(name, 'error', finished - start, sent)
+            if self.recorder is not None:
+                self.recorder.record(name, device_code, start, finished, 'error', url, kwargs.get('data'))
+            raise
+        finished = time.perf_counter()
+        self.metrics.record(name, resp.status, finished - start, sent, len(content))
+        if self.recorder is not None:
+            self.recorder.record(name, device_code, start, finished, resp.status, url, kwargs.get('data'), content)
+        return resp.status, content
+
+    def _request_args(self, rec: TrafficRecord):
+        """由日志记录还原请求 (method, url, endpoint_id, kwargs)"""
+        if rec.endpoint == 'reportUserData':
+            return 'POST', f"{self.base_url}{REPORT_POSITION_PATH}?{rec.payload.decode()}", REPORT_POSITION, {}
+        if rec.endpoint == 'postTarPos':
+            return 'POST', f"{self.base_url}{POST_TARGETS_PATH}", POST_TARGETS, {
+                'data': rec.payload, 'headers': {'Content-Type': 'application/json'}
+            }
+        return 'GET', f"{self.base_url}{OUTDOOR_TASK_PATH}", OUTDOOR_TASK, {}
+
+    async def _replay_one(self, rec: TrafficRecord, semaphore: asyncio.Semaphore):
+        try:
+            method, url, endpoint_id, kwargs = self._request_args(rec)
+            headers = kwargs.pop('headers', {})
+            for _ in range(2):
+                token = self._tokens.get(rec.device_code) or ''
+                try:
+                    status, _ = await self._fetch(
+                        method, url, endpoint_id, rec.device_code, headers=dict(headers, token=token), **kwargs
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    return
+                if status != 401 or await self._login(rec.device_code, token) is None:
+                    return
+        finally:
+            semaphore.release()
+
+    def _record_lag(self, lag: float):
+        ms = lag * 1000
+        self._lag_counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        if ms > self._lag_max:
+            self._lag_max = ms
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        回放整个日志
+
+        Returns:
+            dict: records (回放的请求数), devices, duration_s, source_duration_s (日志原始时长),
+                  speedup (原始时长 / 回放时长), schedule_lag_ms (实际发送晚于计划的 p50/p95/p99/max),
+                  requests (ivas.metrics 快照)
+        """
+        # 预扫描：设备列表、发送时间范围和重排窗口 (单个请求的最大耗时)
+        codes = set()
+        first = last = None
+        window = 0.0
+        for rec in read_traffic(self.path):
+            if rec.endpoint == 'zsLogin':
+                continue
+            codes.add(rec.device_code)
+            first = rec.sent_at if first is None else min(first, rec.sent_at)
+            last = rec.sent_at if last is None else max(last, rec.sent_at)
+            window = max(window, rec.received_at - rec.sent_at)
+        devices = sorted(codes)
+        # 多线程写入时完成顺序与 received_at 之间有微小抖动，多留 1 秒余量
+        window += 1.0
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        )
+        try:
+            await asyncio.gather(*(self._login(code) for code in devices))
+
+            loop = asyncio.get_running_loop()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            tasks = set()
+            records = 0
+            started = loop.time()
+
+            replayed = (rec for rec in read_traffic(self.path) if rec.endpoint != 'zsLogin')
+            for rec in in_send_order(replayed, window):
+                target = None
+                if self.speed is not None:
+                    target = started + (rec.sent_at - first) / self.speed
+                    delay = target - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                await semaphore.acquire()
+                if target is not None:
+                    self._record_lag(max(0.0, loop.time() - target))
+                records += 1
+                task = asyncio.create_task(self._replay_one(rec, semaphore))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+            duration = loop.time() - started
+        finally:
+            await self._session.close()
+
+        source_duration = (last - first) if records else 0.0
+        lag = quantiles(self._lag_counts, self._lag_max)
+        lag['max'] = self._lag_max
+        return {
+            'records': records,
+            'devices': len(devices),
+            'duration_s': duration,
+            'source_duration_s': source_duration,
+            'speedup': source_duration / duration if duration else 0.0,
+            'schedule_lag_ms': lag if self.speed is not None else None,
+            'requests': self.metrics.snapshot()
+        }
+
+
+def replay(path: str, base_url: str, **kwargs) -> Dict[str, Any]:
+    """同步回放（参数见 TrafficReplayer）"""
+    return asyncio.run(TrafficReplayer(path, base_url, **kwargs).run())
+
+
+# ==================== 命令行 ====================
+
+def _speed(value: str) -> Optional[float]:
+    return None if value in ('max', '0') else float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IVAS 流量日志查看与回放")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    info = sub.add_parser('info', help='查看日志概况')
+    info.add_argument('path', help='流量日志路径')
+
+    rep = sub.add_parser('replay', help='回放日志')
+    rep.add_argument('path', help='流量日志路径')
+    rep.add_argument('--base-url', required=True, help='回放目标服务器地址')
+    rep.add_argument('--speed', type=_speed, default=1.0, help='回放倍速 (1 为原速，max 为最大速度)')
+    rep.add_argument('--password', default='000000', help='登录密码')
+    rep.add_argument('--account-format', default='ZSDX{:03d}', help='由设备编号生成账号的格式串')
+    rep.add_argument('--concurrency', type=int, default=256, help='最大并发请求数')
+    rep.add_argument('--output', default=None, help='回放结果 JSON 路径 (可选)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        print(json.dumps(summarize(args.path), ensure_ascii=False, indent=2))
+        return
+
+    result = replay(
+        args.path, args.base_url, speed=args.speed, password=args.password,
+        account_format=args.account_format, concurrency=args.concurrency
+    )
+    endpoints = result['requests']['endpoints']
+    print(f"回放 {result['records']} 条请求 ({result['devices']} 架)，"
+          f"用时 {result['duration_s']:.2f}s / 原始 {result['source_duration_s']:.2f}s，加速 {result['speedup']:.1f}x")
+    for name, ep in endpoints.items():
+        if ep['requests']:
+            lat = ep['latency_ms']
+            print(f"  {name:<16} {ep['requests']:>8} 次  错误 {ep['errors']:>6}  "
+                  f"p50 {lat['p50']:.1f} / p99 {lat['p99']:.1f} ms")
+    if result['schedule_lag_ms'] is not None:
+        lag = result['schedule_lag_ms']
+        print(f"  发送滞后 p50 {lag['p50']:.1f} / p99 {lag['p99']:.1f} / max {lag['max']:.1f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()